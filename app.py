@@ -1,6 +1,13 @@
 import streamlit as st
 import os
+import json
+from collections import deque
+from utils import profiler
 from utils.storage import ensure_data_dir
+from utils.health import start_health_prober
+from utils.metrics import start_metrics_server
+from utils.job_queue import start_job_workers
+from utils.analytics import start_analytics_refresher
 from st_pages import add_page_title, get_nav_from_toml
 
 # 초기 설정
@@ -15,11 +22,68 @@ def initialize():
     
     # 데이터 파일 초기화
     ensure_data_dir()
+    # 엔드포인트 상태 확인 (프로세스당 한 번만 시작됨)
+    start_health_prober()
+    # Prometheus 수집용 /metrics (METRICS_PORT)
+    start_metrics_server()
+    # 테스터 요청을 처리하는 백그라운드 작업 스레드 (중단된 작업은 다시 실행)
+    start_job_workers()
+    # 새 이력을 실험실 분석 저장소(Parquet)에 주기적으로 반영
+    start_analytics_refresher()
     
     # 세션 상태 초기화
     if "api_url" not in st.session_state:
         st.session_state.api_url = "http://www.test.ai.com/cam"
 
+# rerun 측정 결과 (?debug=1 또는 PROFILE_RERUNS)
+def show_profile_panel():
+    profiles = st.session_state.get("rerun_profiles")
+    if not profiles:
+        return
+    latest = profiles[-1]
+    with st.sidebar.expander(f"🐞 rerun 측정 ({latest['total'] * 1000:.0f} ms)", expanded=False):
+        st.caption(
+            f"{latest['page']} · 읽기 {latest['reads']}회 ({latest['bytes_parsed'] / 1024:.1f} KB 파싱) · "
+            f"쓰기 {latest['writes']}회 ({latest['bytes_written'] / 1024:.1f} KB)"
+        )
+        for name in latest["slow_sections"]:
+            st.warning(f"느린 구간: {name} ({latest['sections'][name]['self_time'] * 1000:.0f} ms)")
+
+        rows = [
+            {
+                "구간": name,
+                "호출": stats["calls"],
+                "전체(ms)": round(stats["time"] * 1000, 1),
+                "자체(ms)": round(stats["self_time"] * 1000, 1),
+                "읽기": stats["reads"],
+                "쓰기": stats["writes"],
+                "파싱(KB)": round(stats["bytes_parsed"] / 1024, 1),
+            }
+            for name, stats in sorted(latest["sections"].items(), key=lambda item: item[1]["self_time"], reverse=True)
+        ]
+        st.dataframe(rows, hide_index=True, use_container_width=True)
+
+        st.markdown("**최근 rerun**")
+        st.dataframe([
+            {"페이지": p["page"], "전체(ms)": round(p["total"] * 1000, 1), "읽기": p["reads"], "쓰기": p["writes"]}
+            for p in reversed(profiles)
+        ], hide_index=True, use_container_width=True)
+
+        st.markdown("**페이지별 누적 (프로세스 전체)**")
+        totals = profiler.page_totals()
+        st.dataframe([
+            {"페이지": page, "rerun": t["reruns"], "평균(ms)": round(t["time"] / t["reruns"] * 1000, 1),
+             "최대(ms)": round(t["max"] * 1000, 1), "읽기": t["reads"], "파싱(KB)": round(t["bytes_parsed"] / 1024, 1)}
+            for page, t in sorted(totals.items(), key=lambda item: item[1]["time"], reverse=True)
+        ], hide_index=True, use_container_width=True)
+
+        st.download_button(
+            "JSON 내보내기",
+            json.dumps({"reruns": list(profiles), "page_totals": totals}, ensure_ascii=False, indent=2),
+            file_name="rerun_profile.json",
+            mime="application/json",
+        )
+
 # 메인 앱
 def main():
     initialize()
@@ -29,7 +93,20 @@ def main():
     pg = st.navigation(nav)
     add_page_title(pg)
     
-    pg.run()
+    # 환경 변수로 전체를 켜거나, 특정 세션만 ?debug=1 로 측정
+    enabled = profiler.PROFILE_RERUNS or st.query_params.get("debug") == "1"
+    profile = None
+    try:
+        with profiler.rerun(pg.title, enabled) as profile:
+            pg.run()
+    finally:
+        # st.rerun()/st.stop()으로 끝난 실행도 다음 화면에 표시되도록 저장
+        if profile is not None:
+            if "rerun_profiles" not in st.session_state:
+                st.session_state.rerun_profiles = deque(maxlen=20)
+            st.session_state.rerun_profiles.append(profile.to_dict())
+    if enabled:
+        show_profile_panel()
 
 if __name__ == "__main__":
     main()
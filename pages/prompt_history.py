@@ -1,3 +1,146 @@
+import os
 import streamlit as st
+from datetime import datetime, time as dt_time, timedelta
+from utils.storage import load_prompts, load_endpoints, query_history, image_blob_path, search, search_prompts_by_response
+from utils.metrics import format_timings
+from utils.profiler import profiled
 
-st.write("This is 프롬프트 이력!")
\ No newline at end of file
+@profiled
+class PromptHistoryPage:
+    PAGE_SIZE = 20
+
+    def __init__(self):
+        self.initialize_session_state()
+
+    def initialize_session_state(self):
+        """세션 상태 초기화"""
+        if "history_cursors" not in st.session_state:
+            # 지금까지 지나온 페이지들의 시작 커서 (첫 페이지는 None)
+            st.session_state.history_cursors = [None]
+        if "history_filters" not in st.session_state:
+            st.session_state.history_filters = None
+
+    def render_filters(self):
+        """조회 조건 섹션 렌더링"""
+        prompts = load_prompts()
+        prompt_options = {"전체": None}
+        prompt_options.update({p["name"]: p["id"] for p in prompts})
+
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            prompt_name = st.selectbox("프롬프트", options=list(prompt_options.keys()))
+        with col2:
+            status = st.selectbox("상태", options=["전체", "OK", "FAIL"])
+        with col3:
+            endpoint = st.selectbox("엔드포인트", options=["전체"] + load_endpoints())
+
+        date_range = st.date_input("기간", value=(), help="시작일과 종료일을 선택하세요")
+
+        since = until = None
+        if len(date_range) == 2:
+            since = datetime.combine(date_range[0], dt_time.min).isoformat()
+            until = datetime.combine(date_range[1] + timedelta(days=1), dt_time.min).isoformat()
+
+        filters = {
+            "prompt_id": prompt_options[prompt_name],
+            "status": None if status == "전체" else status,
+            "endpoint": None if endpoint == "전체" else endpoint,
+            "since": since,
+            "until": until,
+        }
+
+        # 조건이 바뀌면 첫 페이지부터 다시 조회
+        if filters != st.session_state.history_filters:
+            st.session_state.history_filters = filters
+            st.session_state.history_cursors = [None]
+        return filters
+
+    def render_entry(self, entry):
+        """이력 한 건 렌더링"""
+        icon = "✅" if entry.get("status") == "OK" else "❌"
+        with st.expander(f"{icon} {entry.get('timestamp', '')} · {entry.get('endpoint') or '-'}"):
+            if entry.get("prompt"):
+                st.write("**프롬프트**")
+                st.code(entry["prompt"])
+            if entry.get("image_path"):
+                st.write(f"**이미지:** {entry['image_path']}")
+            if entry.get("image_blob") and os.path.exists(image_blob_path(entry["image_blob"])):
+                st.image(image_blob_path(entry["image_blob"]), width=240)
+            st.write("**응답**")
+            if isinstance(entry.get("response"), (dict, list)):
+                st.json(entry["response"])
+            else:
+                st.code(str(entry.get("response")))
+            timings = entry.get("timings")
+            if timings:
+                st.caption(format_timings(timings))
+            if entry.get("group_id"):
+                st.caption(f"비교 그룹 {entry['group_id'][:8]}")
+            if entry.get("prompt_hash"):
+                st.caption(f"프롬프트 해시 {entry['prompt_hash'][:12]}")
+            resilience = entry.get("resilience")
+            if resilience and (resilience["retries"] or resilience["hedged"] or resilience["breaker"] != "closed"):
+                st.caption(
+                    f"시도 {resilience['attempts']}회 · 재시도 {resilience['retries']}회"
+                    f"{' · 헤징' if resilience['hedged'] else ''} · 차단기 {resilience['breaker']}"
+                )
+                for error in resilience.get("errors", []):
+                    st.caption(f"- {error}")
+
+    def render_search_results(self, query):
+        """검색 결과 렌더링 (응답에 검색어가 나온 프롬프트, 관련 이력)"""
+        prompt_tab, history_tab = st.tabs(["프롬프트", "이력"])
+        with prompt_tab:
+            matches = search_prompts_by_response(query, limit=self.PAGE_SIZE)
+            prompts = search(query, kind="prompt", limit=self.PAGE_SIZE)
+            if not matches and not prompts:
+                st.info("검색 결과가 없습니다.")
+            for match in matches:
+                st.write(f"**{match['prompt']['name']}** · 응답 {match['hits']}건에서 발견")
+                st.code(match["prompt"]["content"])
+            for hit in prompts:
+                st.write(f"**{hit['doc']['name']}** · 프롬프트 내용에서 발견")
+                st.code(hit["doc"]["content"])
+        with history_tab:
+            hits = search(query, kind="history", limit=self.PAGE_SIZE)
+            if not hits:
+                st.info("검색 결과가 없습니다.")
+            for hit in hits:
+                self.render_entry(hit["doc"])
+
+    def render_history_list(self, filters):
+        """이력 목록과 페이지 이동 버튼 렌더링"""
+        cursors = st.session_state.history_cursors
+        entries, next_cursor = query_history(limit=self.PAGE_SIZE, cursor=cursors[-1], **filters)
+
+        if not entries:
+            st.info("조건에 맞는 이력이 없습니다.")
+        for entry in entries:
+            self.render_entry(entry)
+
+        prev_col, page_col, next_col = st.columns([1, 4, 1])
+        with prev_col:
+            if st.button("이전", disabled=len(cursors) == 1, use_container_width=True):
+                cursors.pop()
+                st.rerun()
+        with page_col:
+            st.caption(f"{len(cursors)} 페이지")
+        with next_col:
+            if st.button("다음", disabled=next_cursor is None, use_container_width=True):
+                cursors.append(next_cursor)
+                st.rerun()
+
+    def render(self):
+        """페이지 전체 렌더링"""
+        query = st.text_input("검색", placeholder="프롬프트나 응답에 포함된 단어 (한글/영어)")
+        if query.strip():
+            self.render_search_results(query)
+            return
+        filters = self.render_filters()
+        st.markdown("---")
+        self.render_history_list(filters)
+
+# 전역 인스턴스 생성
+page = PromptHistoryPage()
+# 페이지 렌더링
+page.render()
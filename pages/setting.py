@@ -1,7 +1,13 @@
 import streamlit as st
-from utils.storage import save_endpoint, load_endpoints, delete_endpoint
+from utils.storage import (
+    save_endpoint, load_endpoints, delete_endpoint, get_response_cache_stats, clear_response_cache,
+    load_endpoint_policies, save_endpoint_policy, load_endpoint_groups, save_endpoint_group, delete_endpoint_group
+)
+from utils import http_pool, resilience, health
 import time  # 파일 상단에 추가
+from utils.profiler import profiled
 
+@profiled
 class SettingPage:
     def __init__(self):
         self.initialize_session_state()
@@ -88,11 +94,150 @@ class SettingPage:
                                 st.success("엔드포인트가 삭제되었습니다.")
                                 st.rerun()
     
+    def render_connection_stats(self):
+        """엔드포인트별 연결 풀 상태 (이 프로세스 기준)"""
+        st.subheader("연결 풀 상태")
+        st.caption(
+            f"풀 크기 {http_pool.HTTP_POOL_SIZE} · keep-alive {'사용' if http_pool.HTTP_KEEPALIVE else '사용 안 함'} · "
+            f"연결 타임아웃 {http_pool.HTTP_CONNECT_TIMEOUT:g}초 · 읽기 타임아웃 {http_pool.HTTP_READ_TIMEOUT:g}초"
+        )
+        stats = http_pool.pool_stats()
+        if not stats:
+            st.info("아직 전송된 요청이 없습니다.")
+            return
+        st.dataframe(
+            [
+                {
+                    "엔드포인트": key,
+                    "요청 수": s["requests"],
+                    "새 연결 수": s["connections"],
+                    "연결 재사용률": f"{s['reuse_rate']:.0%}",
+                    "오류 수": s["errors"],
+                }
+                for key, s in stats.items()
+            ],
+            use_container_width=True,
+            hide_index=True,
+        )
+
+    def render_endpoint_groups(self):
+        """같은 API를 제공하는 엔드포인트 묶음 (테스터에서 요청마다 상태가 좋은 엔드포인트로 보냄)"""
+        st.subheader("엔드포인트 그룹")
+        endpoints = load_endpoints()
+        groups = load_endpoint_groups()
+        strategy_labels = {
+            health.STRATEGY_HEALTHIEST: "가용률 우선 (healthiest)",
+            health.STRATEGY_FASTEST: "지연 시간 우선 (fastest)",
+        }
+
+        with st.form("endpoint_group_form", clear_on_submit=True):
+            name = st.text_input("그룹 이름")
+            members = st.multiselect("엔드포인트", options=endpoints)
+            strategy = st.radio("라우팅 방식", health.STRATEGIES, format_func=strategy_labels.get, horizontal=True)
+            if st.form_submit_button("그룹 저장"):
+                if not name or not members:
+                    st.error("그룹 이름과 엔드포인트를 입력해주세요.")
+                else:
+                    save_endpoint_group(name, members, strategy)
+                    st.success("그룹이 저장되었습니다.")
+                    st.rerun()
+
+        for name, group in groups.items():
+            col1, col2 = st.columns([4, 1])
+            with col1:
+                st.write(f"**{name}** · {strategy_labels.get(group['strategy'], group['strategy'])}")
+                st.caption(" · ".join(group["endpoints"]))
+            with col2:
+                if st.button("삭제", key=f"delete_group_{name}"):
+                    delete_endpoint_group(name)
+                    st.rerun()
+
+    def render_endpoint_policy(self):
+        """엔드포인트별 타임아웃, 재시도, 차단기, 헤징 정책"""
+        st.subheader("엔드포인트 안정성 정책")
+        endpoints = load_endpoints()
+        if not endpoints:
+            st.info("등록된 엔드포인트가 없습니다.")
+            return
+        endpoint = st.selectbox("엔드포인트", options=endpoints, key="policy_endpoint")
+        policy = resilience.normalize_policy(load_endpoint_policies().get(endpoint))
+
+        with st.form(f"policy_form_{endpoint}"):
+            col1, col2, col3 = st.columns(3)
+            with col1:
+                connect_timeout = st.number_input("연결 타임아웃(초)", min_value=0.1, value=float(policy["connect_timeout"]))
+                read_timeout = st.number_input("응답 타임아웃(초)", min_value=0.1, value=float(policy["read_timeout"]))
+                max_retries = st.number_input("최대 재시도 횟수", min_value=0, max_value=10, value=int(policy["max_retries"]))
+            with col2:
+                backoff_base = st.number_input("재시도 대기 시작값(초)", min_value=0.0, value=float(policy["backoff_base"]))
+                backoff_max = st.number_input("재시도 대기 상한(초)", min_value=0.0, value=float(policy["backoff_max"]))
+                retry_post = st.checkbox(
+                    "POST 요청도 재시도", value=policy["retry_post"],
+                    help="끄면 POST는 연결 타임아웃(서버에 도달하지 않은 요청)일 때만 재시도합니다."
+                )
+            with col3:
+                breaker_threshold = st.number_input(
+                    "차단 기준 연속 실패 수", min_value=0, value=int(policy["breaker_threshold"]),
+                    help="0이면 차단기를 사용하지 않습니다."
+                )
+                breaker_reset = st.number_input("차단 유지 시간(초)", min_value=1.0, value=float(policy["breaker_reset"]))
+                hedge = st.checkbox(
+                    "헤징 사용", value=policy["hedge"],
+                    help="응답이 최근 지연 시간 백분위수보다 늦으면 같은 요청을 한 번 더 보내 먼저 온 응답을 사용합니다."
+                )
+                hedge_percentile = st.slider("헤징 기준 백분위수", 50, 99, int(policy["hedge_percentile"]))
+            if st.form_submit_button("정책 저장"):
+                save_endpoint_policy(endpoint, {
+                    "connect_timeout": connect_timeout,
+                    "read_timeout": read_timeout,
+                    "max_retries": int(max_retries),
+                    "backoff_base": backoff_base,
+                    "backoff_max": backoff_max,
+                    "retry_post": retry_post,
+                    "breaker_threshold": int(breaker_threshold),
+                    "breaker_reset": breaker_reset,
+                    "hedge": hedge,
+                    "hedge_percentile": hedge_percentile,
+                })
+                st.success("정책이 저장되었습니다.")
+
+        states = resilience.breaker_states()
+        if states:
+            st.write("**차단기 상태** (이 프로세스 기준)")
+            for key, state in states.items():
+                col1, col2 = st.columns([4, 1])
+                with col1:
+                    st.write(f"{key} · {state['state']} · 연속 실패 {state['failures']}회")
+                with col2:
+                    if state["state"] != resilience.BREAKER_CLOSED and st.button("초기화", key=f"breaker_reset_{key}"):
+                        resilience.get_breaker(key).reset()
+                        st.rerun()
+
+    def render_response_cache(self):
+        """API 응답 캐시 상태와 비우기"""
+        st.subheader("응답 캐시")
+        stats = get_response_cache_stats()
+        st.caption(
+            f"적중률 {stats['hit_rate']:.0%} (메모리 hit {stats['memory_hits']} / 디스크 hit {stats['disk_hits']} / "
+            f"miss {stats['misses']}) · 메모리 {stats['memory_entries']}건, {stats['memory_bytes'] / 1024:.0f} KB"
+        )
+        if st.button("응답 캐시 비우기"):
+            clear_response_cache()
+            st.success("응답 캐시를 비웠습니다.")
+
     def render(self):
         """페이지 전체 렌더링"""
         self.render_endpoint_input()
         st.markdown("---")
         self.render_endpoint_list()
+        st.markdown("---")
+        self.render_endpoint_groups()
+        st.markdown("---")
+        self.render_connection_stats()
+        st.markdown("---")
+        self.render_endpoint_policy()
+        st.markdown("---")
+        self.render_response_cache()
 
 # 전역 인스턴스 생성
 page = SettingPage()
@@ -1,7 +1,11 @@
 import streamlit as st
 import os
-from utils.storage import load_endpoints
+import time
+from utils.storage import load_endpoints, get_cache_stats
+from utils.health import health_stats, prober
+from utils.profiler import profiled
 
+@profiled
 class StartFrontPage:
     def __init__(self):
         self.data_path = "./app_data"
@@ -11,6 +15,7 @@ class StartFrontPage:
         self.show_welcome_message()
         self.show_announcements()
         self.show_system_status()
+        self.show_endpoint_health()
     
     def show_title(self):
         st.title("🤖 Gemini 프롬프트 관리 시스템")
@@ -86,6 +91,44 @@ class StartFrontPage:
             st.subheader("데이터 저장 위치")
             data_path = "./app_data"  # 앱 데이터 디렉토리
             st.code(f"데이터 경로: {os.path.abspath(data_path)}")
+            
+            cache_stats = get_cache_stats()
+            st.caption(
+                f"파일 캐시 적중률: {cache_stats['hit_rate']:.0%} "
+                f"(hit {cache_stats['hits']} / miss {cache_stats['misses']})"
+            )
+
+    def show_endpoint_health(self):
+        st.subheader("엔드포인트 상태")
+        endpoints = load_endpoints()
+        if not endpoints:
+            return
+        stats = health_stats()
+        col1, col2 = st.columns([4, 1])
+        with col1:
+            st.caption(f"{prober.interval:g}초마다 {prober.path} 경로로 확인 · 가용률과 지연 시간은 최근 확인 결과 기준")
+        with col2:
+            if st.button("지금 확인", use_container_width=True):
+                prober.check_now()
+                time.sleep(min(prober.timeout, 1.0))
+                st.rerun()
+
+        rows = []
+        for endpoint in endpoints:
+            s = stats.get(endpoint)
+            if s is None or not s["probes"]:
+                rows.append({"엔드포인트": endpoint, "상태": "⏳ 확인 전"})
+                continue
+            rows.append({
+                "엔드포인트": endpoint,
+                "상태": "🟢 정상" if s["up"] else "🔴 응답 없음",
+                "가용률": f"{s['availability']:.0%}",
+                "지연 p50 (ms)": round(s["latency"] * 1000) if s["latency"] is not None else None,
+                "지연 p95 (ms)": round(s["latency_p95"] * 1000) if s["latency_p95"] is not None else None,
+                "마지막 확인": time.strftime("%H:%M:%S", time.localtime(s["last_checked"])),
+                "오류": s["last_error"] or "",
+            })
+        st.dataframe(rows, use_container_width=True, hide_index=True)
     
 
 # 전역 인스턴스 생성
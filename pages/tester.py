@@ -1,16 +1,42 @@
 import streamlit as st
-import requests
 import json
 import time
-import hashlib
 import uuid
-from datetime import datetime
-from utils.storage import load_prompts, save_prompts, save_history_entry, load_endpoints
+from utils.storage import (
+    load_prompts, save_new_prompt, save_history_entry, load_endpoints, add_history_to_prompt,
+    save_image_blob, image_blob_path, load_recent_image_blobs, save_benchmark_run, load_benchmark_runs,
+    get_response_cache_stats, load_endpoint_groups, get_cassette, list_cassettes, prompt_content_hash
+)
 from utils.api_handler import APIHandler  # 상단에 import 추가
+from utils.batch_runner import BatchRun, load_image_folder, parse_dataset_file
+from utils.compare import compare_endpoints
+from utils.benchmark import Benchmark, MODE_OPEN, MODE_CLOSED, PERCENTILES
+from utils import http_pool, health
+from utils.response_cache import RESPONSE_CACHE_ENABLED
+from utils.streaming import StreamReader
+from utils.image_preprocess import preprocess_available, current_settings
+from utils.resilience import summary as resilience_summary
+from utils.metrics import format_timings
+from utils.cassette import MODE_RECORD, MODE_REPLAY
+from utils.prompt_template import compile_template, expand_prompts, load_frame, TemplateError
+from utils.job_queue import (
+    job_queue, KIND_TEST_REQUEST, ACTIVE_STATUSES, STATUS_QUEUED, STATUS_RUNNING, STATUS_DONE, STATUS_FAILED,
+    STATUS_CANCELLED, STATUS_INTERRUPTED
+)
+from utils.profiler import profiled
 
+@profiled
 class TesterPage:
     def __init__(self):
         self.api_handler = APIHandler()
+        self.selected_endpoint = None
+        self.endpoint_group = None
+        self.url_path = "/"
+        self.selected_prompt_id = None
+        self.use_cache = False
+        self.cassette = None
+        self.use_stream = False
+        self.use_background = False
         self.initialize_session_state()
         
     def initialize_session_state(self):
@@ -21,17 +47,28 @@ class TesterPage:
             st.session_state.api_request_status = {"text": "send", "color": "primary", "result": None}
         if "response" not in st.session_state:
             st.session_state.response = None
-    
-    def get_prompt_hash(self, prompt_text):
-        """프롬프트 텍스트의 해시값을 계산하여 중복 확인에 사용"""
-        return hashlib.md5(prompt_text.encode()).hexdigest()
+        if "uploaded_blobs" not in st.session_state:
+            # 업로드 파일 ID -> 이미지 해시 (rerun마다 다시 해시/저장하지 않도록)
+            st.session_state.uploaded_blobs = {}
+        if "batch_run" not in st.session_state:
+            st.session_state.batch_run = None
+        if "benchmark" not in st.session_state:
+            st.session_state.benchmark = None
+        if "compare_result" not in st.session_state:
+            st.session_state.compare_result = None
+        if "job_owner" not in st.session_state:
+            # 이 세션에서 제출한 백그라운드 작업을 찾기 위한 ID
+            st.session_state.job_owner = str(uuid.uuid4())
+        if "use_response_cache" not in st.session_state:
+            st.session_state.use_response_cache = RESPONSE_CACHE_ENABLED
     
     def render_api_settings(self):
         """API 설정 섹션 렌더링"""
         st.write("**API 서버 선택**")
         
-        # 저장된 엔드포인트 불러오기
+        # 저장된 엔드포인트와 엔드포인트 그룹 불러오기
         endpoints = load_endpoints()
+        groups = load_endpoint_groups()
         
         if not endpoints:
             st.error("등록된 API 엔드포인트가 없습니다. 환경설정에서 엔드포인트를 먼저 등록해주세요.")
@@ -39,11 +76,12 @@ class TesterPage:
                 st.switch_page("pages/setting.py")
             return None, None
         
-        # 엔드포인트 선택 드롭다운
+        # 엔드포인트 선택 드롭다운 (그룹은 요청마다 상태가 가장 좋은 엔드포인트로 보냄)
         selected_endpoint = st.selectbox(
             "API 엔드포인트 선택",
-            options=endpoints,
-            format_func=lambda x: x,  # 전체 URL 표시
+            options=endpoints + [("group", name) for name in groups],
+            format_func=lambda x: f"그룹: {x[1]} ({len(groups[x[1]]['endpoints'])}개 엔드포인트)"
+            if isinstance(x, tuple) else x,  # 전체 URL 표시
             label_visibility="collapsed"
         )
         
@@ -53,8 +91,19 @@ class TesterPage:
                                    help="API 서버 주소 뒤에 추가될 경로")
         with col2:
             http_method = st.selectbox("HTTP 메소드", options=["GET", "POST"])
+        self.url_path = url_path
         
-        full_url = f"{selected_endpoint.rstrip('/')}{url_path}"
+        if isinstance(selected_endpoint, tuple):
+            self.endpoint_group = selected_endpoint[1]
+            self.selected_endpoint, full_url = health.route(self.endpoint_group, url_path)
+            if full_url is None:
+                st.error("그룹에 엔드포인트가 없습니다. 환경설정에서 그룹을 수정해주세요.")
+                return None, None
+            st.caption(f"그룹 '{self.endpoint_group}'의 요청은 보낼 때마다 엔드포인트를 다시 선택합니다. (현재: {self.selected_endpoint})")
+        else:
+            self.endpoint_group = None
+            self.selected_endpoint = selected_endpoint
+            full_url = f"{selected_endpoint.rstrip('/')}{url_path}"
         # 요청 URL을 한 줄에 표시
         url_cols = st.columns([1, 4])
         with url_cols[0]:
@@ -108,6 +157,9 @@ class TesterPage:
             selected_prompt = next((p for p in saved_prompts if p["name"] == selected_prompt_name), None)
             if selected_prompt:
                 prompt = st.text_area("프롬프트 입력", value=selected_prompt["content"], height=150, key="prompt_input")
+                # 저장된 내용 그대로 보낼 때만 해당 프롬프트의 이력으로 연결
+                if prompt == selected_prompt["content"]:
+                    self.selected_prompt_id = selected_prompt["id"]
                 if "last_prompt" not in st.session_state or st.session_state.last_prompt != prompt:
                     st.session_state.prompt_save_status = "already"
                     st.session_state.last_prompt = prompt
@@ -122,27 +174,13 @@ class TesterPage:
             return
         
         with st.spinner("프롬프트 저장 중..."):
-            prompt_hash = self.get_prompt_hash(prompt)
-            if any(self.get_prompt_hash(p["content"]) == prompt_hash for p in saved_prompts):
+            # 중복 검사와 번호 발급은 저장소의 해시 인덱스에서 처리
+            new_prompt = save_new_prompt(prompt)
+            if new_prompt is None:
                 st.session_state.prompt_save_status = "already"
                 st.warning("이미 동일한 내용의 프롬프트가 저장되어 있습니다.")
                 return
             
-            existing_numbers = [int(p["name"].split("#")[1]) if "#" in p["name"] else 0 for p in saved_prompts]
-            next_number = max(existing_numbers) + 1 if existing_numbers else 1
-            
-            new_prompt = {
-                "id": str(uuid.uuid4()),
-                "name": f"Prompt #{next_number}",
-                "description": f"자동 저장된 프롬프트 #{next_number}",
-                "content": prompt,
-                "created_at": datetime.now().isoformat(),
-                "related_history": []
-            }
-            
-            saved_prompts.append(new_prompt)
-            save_prompts(saved_prompts)
-            
             time.sleep(0.5)
             st.session_state.prompt_save_status = "saved"
             st.success(f"프롬프트가 '{new_prompt['name']}'으로 저장되었습니다.")
@@ -154,10 +192,7 @@ class TesterPage:
         
         data = None
         if data_type == "이미지":
-            uploaded_file = st.file_uploader("이미지 파일 업로드", type=["jpg", "jpeg", "png"])
-            if uploaded_file:
-                st.image(uploaded_file, caption="업로드된 이미지", use_column_width=True)
-                data = uploaded_file
+            data = self.render_image_input()
         elif data_type == "문자열":
             data = st.text_area("문자열 입력", height=100)
         elif data_type == "JSON":
@@ -170,40 +205,150 @@ class TesterPage:
         
         return data_type, data
     
+    def render_image_input(self):
+        """
+        이미지 입력 (새로 업로드하거나 저장된 이미지 재사용)
+
+        Returns:
+            dict: 이미지 해시, 파일명, MIME 타입 (선택하지 않았으면 None)
+        """
+        source = st.radio("이미지 선택", ["새로 업로드", "저장된 이미지"], horizontal=True)
+
+        if source == "새로 업로드":
+            uploaded_file = st.file_uploader("이미지 파일 업로드", type=["jpg", "jpeg", "png"])
+            if not uploaded_file:
+                return None
+            file_key = getattr(uploaded_file, "file_id", None) or f"{uploaded_file.name}:{uploaded_file.size}"
+            digest = st.session_state.uploaded_blobs.get(file_key)
+            if digest is None:
+                digest = save_image_blob(uploaded_file, uploaded_file.name, uploaded_file.type)
+                st.session_state.uploaded_blobs[file_key] = digest
+            image = {"blob": digest, "name": uploaded_file.name, "mime_type": uploaded_file.type}
+        else:
+            blobs = load_recent_image_blobs()
+            if not blobs:
+                st.info("저장된 이미지가 없습니다.")
+                return None
+            selected = st.selectbox(
+                "저장된 이미지",
+                options=blobs,
+                format_func=lambda b: f"{b['name'] or b['digest'][:12]} ({b['size'] / 1024:.1f} KB)"
+            )
+            image = {"blob": selected["digest"], "name": selected["name"] or selected["digest"][:12],
+                     "mime_type": selected["mime_type"]}
+
+        st.image(image_blob_path(image["blob"]), caption=image["name"], use_column_width=True)
+        if preprocess_available():
+            settings = current_settings()
+            st.caption(
+                f"전송 시 긴 변 최대 {settings['max_dimension'] or '원본'}px, 품질 {settings['quality']}로 변환"
+                f"{', EXIF 제거' if settings['strip_exif'] else ''}"
+            )
+        return image
+
+    def resolve_target(self, full_url):
+        """
+        요청을 보낼 (엔드포인트, URL)
+
+        그룹을 선택했다면 요청 시점의 상태 통계로 엔드포인트를 다시 고른다.
+        """
+        if self.endpoint_group:
+            endpoint, url = health.route(self.endpoint_group, self.url_path)
+            if url:
+                return endpoint, url
+        return self.selected_endpoint, full_url
+
     def handle_api_request(self, full_url, http_method, prompt, data_type, data):
         """API 요청 처리"""
+        self.selected_endpoint, full_url = self.resolve_target(full_url)
+        if self.use_background and not self.use_stream:
+            self.submit_api_job(full_url, http_method, prompt, data_type, data)
+            return
         try:
-            response = self.send_api_request(full_url, http_method, prompt, data_type, data)
-            self.handle_api_response(response, prompt, data_type, data)
+            started_at = time.perf_counter()
+            response = self.send_api_request(full_url, http_method, prompt, data_type, data, stream=self.use_stream)
+            if self.use_stream:
+                self.handle_stream_response(response, started_at, prompt, data_type, data)
+            else:
+                # 헤더까지 받은 시간을 첫 바이트 시간으로 사용
+                timings = self.api_handler.timings(response, started_at)
+                self.handle_api_response(response, prompt, data_type, data, timings)
         except Exception as e:
             self.handle_api_error(e, prompt, data_type, data)
     
-    def send_api_request(self, full_url, http_method, prompt, data_type, data):
+    def send_api_request(self, full_url, http_method, prompt, data_type, data, stream=False):
         """API 요청 전송"""
-        if http_method == "POST":
-            if data_type == "이미지":
-                files = {'image': data} if data else {}
-                data = {'prompt': prompt} if prompt else {}
-                return requests.post(full_url, files=files, data=data)
-            else:
-                request_data = {}
-                if prompt:
-                    request_data['prompt'] = prompt
-                if data_type == "문자열":
-                    request_data['text'] = data
-                elif data_type == "JSON":
-                    request_data.update(data or {})
-                return requests.post(full_url, json=request_data)
-        else:  # GET
-            params = {}
-            if prompt:
-                params['prompt'] = prompt
-            if data_type == "문자열":
-                params['text'] = data
-            elif data_type == "JSON":
-                params.update(data or {})
-            return requests.get(full_url, params=params)
+        return self.api_handler.send_test_request(
+            full_url, http_method, prompt, data_type, data, use_cache=self.use_cache, stream=stream,
+            cassette=self.cassette
+        )
     
+    def submit_api_job(self, full_url, http_method, prompt, data_type, data):
+        """요청을 백그라운드 작업 큐에 넣음 (응답을 기다리지 않으므로 화면이 멈추지 않고 rerun에도 유지됨)"""
+        cassette = self.cassette
+        job_queue.submit(KIND_TEST_REQUEST, {
+            "full_url": full_url,
+            "http_method": http_method,
+            "prompt": prompt,
+            "data_type": data_type,
+            "data": data,
+            "use_cache": self.use_cache,
+            "prompt_id": self.selected_prompt_id,
+            "endpoint": self.selected_endpoint,
+            "cassette": {"name": cassette.name, "mode": cassette.mode, "rules": cassette.rules} if cassette else None,
+        }, owner=st.session_state.job_owner)
+        st.toast("요청을 작업 큐에 넣었습니다.")
+
+    def render_jobs(self):
+        """백그라운드 작업 목록 (진행 중인 작업이 있으면 이 부분만 1초마다 갱신)"""
+        show_all = st.checkbox("모든 세션의 작업 보기", key="show_all_jobs",
+                               help="다른 탭이나 재시작 전에 제출한 작업도 표시합니다.")
+        owner = None if show_all else st.session_state.job_owner
+        jobs = job_queue.list(owner)
+        if not jobs:
+            return
+        active = any(job["status"] in ACTIVE_STATUSES for job in jobs)
+        st.fragment(run_every=1.0 if active else None)(self.render_job_list)(owner, active)
+
+    def render_job_list(self, owner, was_active):
+        jobs = job_queue.list(owner)
+        active = any(job["status"] in ACTIVE_STATUSES for job in jobs)
+        st.subheader("작업 목록")
+        icons = {STATUS_QUEUED: "⏳", STATUS_RUNNING: "🔄", STATUS_DONE: "✅", STATUS_FAILED: "❌",
+                 STATUS_CANCELLED: "⛔", STATUS_INTERRUPTED: "⚠️"}
+        for job in jobs:
+            result = job["result"] or {}
+            status = job["status"]
+            if status == STATUS_DONE and result.get("status") != "OK":
+                icon = "❌"
+            else:
+                icon = icons.get(status, "")
+            elapsed = (job["finished_at"] or time.time()) - (job["started_at"] or job["created_at"])
+            prompt = job["payload"].get("prompt") or ""
+            label = f"{icon} {job['payload']['http_method']} {job['payload']['full_url']} · {prompt[:30]} · {elapsed:.1f}초"
+            with st.expander(label, expanded=status == STATUS_DONE and job is jobs[0]):
+                st.caption(f"{status} · 시도 {job['attempts']}회 · 작업 ID {job['id']}")
+                if status == STATUS_QUEUED and st.button("취소", key=f"cancel_job_{job['id']}"):
+                    job_queue.cancel(job["id"])
+                    st.rerun(scope="fragment")
+                if job["error"]:
+                    st.error(job["error"])
+                if not result:
+                    continue
+                if result.get("from_cache"):
+                    st.info("캐시된 응답입니다.")
+                if result.get("from_cassette"):
+                    st.info("카세트에서 재생한 응답입니다.")
+                if isinstance(result["response"], (dict, list)):
+                    st.json(result["response"])
+                else:
+                    st.code(result["response"])
+                if result.get("timings"):
+                    self.render_timings(result["timings"])
+        # 모든 작업이 끝났으면 전체를 다시 실행해 주기적인 갱신을 멈춤
+        if was_active and not active:
+            st.rerun()
+
     def send_request(self, url: str, method: str, data: dict) -> dict:
         """API 요청을 보내는 메서드"""
         response_data, error = self.api_handler.handle_api_request(url, method, data)
@@ -231,6 +376,8 @@ class TesterPage:
         else:
             st.error(f"API 요청 중 오류가 발생했습니다: {error_msg}")
         
+        self.record_history(prompt, data_type, data, error_msg, "FAIL", resilience=getattr(error, "resilience", None))
+        
         # 디버깅을 위한 상세 정보
         with st.expander("디버그 정보"):
             st.write("요청 정보:")
@@ -240,20 +387,80 @@ class TesterPage:
                 "data": data
             })
     
-    def handle_api_response(self, response, prompt, data_type, data):
+    def record_history(self, prompt, data_type, data, response, status, timings=None, resilience=None):
+        """API 호출 결과를 이력에 기록 (resilience: 응답이나 예외에 붙은 재시도/차단기 실행 정보)"""
+        image = data if data_type == "이미지" and data else None
+        history_id = save_history_entry(
+            prompt, image["name"] if image else None, response, status,
+            prompt_id=self.selected_prompt_id, endpoint=self.selected_endpoint,
+            image_blob=image["blob"] if image else None, timings=timings,
+            resilience=resilience_summary(resilience)
+        )
+        if self.selected_prompt_id:
+            add_history_to_prompt(self.selected_prompt_id, history_id)
+    
+    def render_timings(self, timings):
+        """첫 바이트 시간, 전체 응답 시간과 단계별 시간/크기 표시"""
+        st.caption(format_timings(timings))
+
+    def handle_stream_response(self, response, started_at, prompt, data_type, data):
+        """스트리밍 응답을 도착하는 대로 화면에 이어 붙이고, 다 받으면 이력에 기록"""
+        st.subheader("응답 결과")
+        if response.status_code >= 400:
+            st.session_state.api_request_status["result"] = "FAIL"
+            st.error(f"HTTP {response.status_code}")
+            st.code(response.text)
+            timings = self.api_handler.timings(response, started_at)
+            self.record_history(prompt, data_type, data, response.text, "FAIL", timings,
+                                getattr(response, "resilience", None))
+            return
+
+        reader = StreamReader(response, started_at)
+        placeholder = st.empty()
+        for _ in reader:
+            placeholder.markdown(reader.text + " ▌")
+        placeholder.markdown(reader.text)
+
+        result = reader.result()
+        st.session_state.response = result
+        st.session_state.api_request_status["result"] = "OK"
+        with st.expander("전체 응답"):
+            if isinstance(result, (dict, list)):
+                st.json(result)
+            else:
+                st.code(result)
+        # 본문은 화면에 그리면서 읽었으므로 수신 시간과 크기는 StreamReader 기준
+        timings = {**(getattr(response, "phases", None) or {}), **reader.timings()}
+        timings["download"] = max(reader.total - response.elapsed.total_seconds(), 0.0)
+        timings["response_bytes"] = reader.bytes
+        self.render_timings(timings)
+        self.record_history(prompt, data_type, data, result, "OK", timings, getattr(response, "resilience", None))
+
+    def handle_api_response(self, response, prompt, data_type, data, timings=None):
         """API 응답 처리"""
         try:
             response_json = response.json()
             st.session_state.response = response_json
             st.session_state.api_request_status["result"] = "OK"
+            if getattr(response, "from_cache", False):
+                st.info("캐시된 응답입니다. (같은 요청을 다시 보내려면 응답 캐시를 끄세요)")
+            if getattr(response, "from_cassette", False):
+                st.info("카세트에서 재생한 응답입니다. (실제로 보내려면 카세트 재생을 끄세요)")
             
             # 응답 결과 표시
             st.subheader("응답 결과")
             st.json(response_json)
+            if timings:
+                self.render_timings(timings)
+            
+            self.record_history(prompt, data_type, data, response_json, "OK", timings,
+                                getattr(response, "resilience", None))
             
         except Exception as e:
             st.session_state.api_request_status["result"] = "FAIL"
             st.error(f"응답 처리 중 오류가 발생했습니다: {str(e)}")
+            self.record_history(prompt, data_type, data, response.text, "FAIL", timings,
+                                getattr(response, "resilience", None))
             
             # 디버그 정보
             with st.expander("응답 상세 정보"):
@@ -261,11 +468,413 @@ class TesterPage:
                 st.write("Headers:", dict(response.headers))
                 st.write("Content:", response.text)
     
+    def render_batch_section(self, full_url, http_method):
+        """배치 테스트: 여러 프롬프트 × 데이터셋 전체 조합을 한 번에 실행"""
+        st.subheader("배치 테스트")
+        saved_prompts = load_prompts()
+        prompt_names = st.multiselect("프롬프트 선택", [p["name"] for p in saved_prompts])
+        prompts = [p for p in saved_prompts if p["name"] in prompt_names]
+
+        source = st.radio("데이터셋", ["이미지 폴더", "CSV/JSONL 파일", "템플릿 변수 (CSV/Parquet)"], horizontal=True)
+        template_prompts = None
+        if source == "이미지 폴더":
+            folder = st.text_input("이미지 폴더 경로", help="서버에서 접근 가능한 폴더 경로 (jpg, jpeg, png)")
+            dataset_file = None
+        elif source == "템플릿 변수 (CSV/Parquet)":
+            folder = dataset_file = None
+            template_prompts = self.render_template_dataset(prompts)
+        else:
+            folder = None
+            dataset_file = st.file_uploader(
+                "데이터셋 파일 업로드", type=["csv", "jsonl"],
+                help="CSV는 열이 하나면 문자열, 여러 개면 JSON으로 전송 / JSONL은 줄마다 문자열 또는 JSON 객체"
+            )
+
+        col1, col2 = st.columns(2)
+        with col1:
+            concurrency = st.slider("동시 요청 수", min_value=1, max_value=32, value=4)
+        with col2:
+            rate_limit = st.number_input("초당 최대 요청 수 (0이면 제한 없음)", min_value=0.0, value=0.0, step=1.0)
+
+        running = st.session_state.batch_run is not None and st.session_state.batch_run.running
+        if st.button("배치 실행", type="primary", disabled=running or not full_url):
+            if not prompts:
+                st.error("프롬프트를 하나 이상 선택해주세요.")
+            else:
+                if template_prompts is not None:
+                    # 템플릿을 채운 프롬프트마다 데이터 없이 한 번씩 요청
+                    prompts, items = template_prompts, [("선택안함", None)]
+                    if not prompts:
+                        st.error("변수 데이터셋을 업로드하고 위의 오류를 확인해주세요.")
+                else:
+                    items = self.load_batch_dataset(folder, dataset_file)
+                if prompts and items:
+                    st.session_state.batch_run = BatchRun(
+                        full_url, http_method, self.selected_endpoint, prompts, items,
+                        concurrency=concurrency, rate_limit=rate_limit, use_cache=self.use_cache,
+                        cassette=self.cassette,
+                        route=(lambda: self.resolve_target(full_url)) if self.endpoint_group else None
+                    ).start()
+
+        self.render_batch_progress()
+
+    def render_template_dataset(self, prompts):
+        """
+        선택한 프롬프트의 {{ 변수 }}를 데이터셋 열로 채운 프롬프트 목록 (보내기 전에 검증)
+
+        Returns:
+            list: 배치 실행할 프롬프트 목록 (데이터셋이 없거나 검증에 실패하면 빈 목록)
+        """
+        variables_file = st.file_uploader(
+            "변수 데이터셋 업로드", type=["csv", "parquet"], key="template_dataset",
+            help="열 이름이 변수 이름입니다. 프롬프트의 {{ 변수 }}를 행마다 채워 한 번씩 요청합니다."
+        )
+        for prompt in prompts:
+            variables = compile_template(prompt["content"]).variables
+            st.caption(f"{prompt['name']}: " + (", ".join(variables) if variables else "변수 없음"))
+        if variables_file is None:
+            return []
+
+        cached = st.session_state.get("template_frame")
+        if cached is None or cached[0] != variables_file.file_id:
+            try:
+                frame = load_frame(variables_file.name, variables_file.getvalue())
+            except ValueError as e:
+                st.error(f"데이터셋을 읽을 수 없습니다: {e}")
+                return []
+            st.session_state.template_frame = cached = (variables_file.file_id, frame)
+        frame = cached[1]
+
+        # 데이터셋과 선택한 프롬프트(내용 해시)가 그대로면 이전에 채운 결과를 재사용 (다시 실행할 때마다 펼치지 않음)
+        key = (variables_file.file_id, tuple((p["id"], p["name"], prompt_content_hash(p["content"])) for p in prompts))
+        cached = st.session_state.get("template_prompts")
+        if cached is None or cached[0] != key:
+            try:
+                expanded, error = expand_prompts(prompts, frame), None
+            except TemplateError as e:
+                expanded, error = [], str(e)
+            st.session_state.template_prompts = cached = (key, expanded, error)
+        _, expanded, error = cached
+        if error:
+            st.error(error)
+            return []
+        st.caption(f"{len(frame)}행 × 프롬프트 {len(prompts)}개 = 요청 {len(expanded)}건")
+        if expanded:
+            with st.expander("미리보기"):
+                for prompt in expanded[:5]:
+                    st.code(prompt["content"])
+        return expanded
+
+    def load_batch_dataset(self, folder, dataset_file):
+        """배치 데이터셋 로드 (실패하면 오류를 표시하고 빈 목록 반환)"""
+        try:
+            if folder:
+                items = load_image_folder(folder)
+            elif dataset_file:
+                items = parse_dataset_file(dataset_file.name, dataset_file.getvalue())
+            else:
+                st.error("데이터셋을 선택해주세요.")
+                return []
+        except (OSError, ValueError) as e:
+            st.error(f"데이터셋을 읽을 수 없습니다: {e}")
+            return []
+        if not items:
+            st.warning("데이터셋에 항목이 없습니다.")
+        return items
+
+    def render_batch_progress(self):
+        """진행 중이거나 마지막으로 실행한 배치의 진행 상황 (실행 중이면 이 부분만 1초마다 갱신)"""
+        batch_run = st.session_state.batch_run
+        if batch_run is None:
+            return
+        running = batch_run.running
+        st.fragment(run_every=1.0 if running else None)(self.render_batch_status)(batch_run, running)
+
+    def render_batch_status(self, batch_run, was_running):
+        progress = batch_run.progress()
+        st.progress(
+            progress["done"] / progress["total"] if progress["total"] else 1.0,
+            text=f"{progress['done']} / {progress['total']} 완료 · {progress['rate']:.1f} 건/초"
+        )
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("OK", progress["ok"])
+        col2.metric("FAIL", progress["failed"])
+        col3.metric("이력 저장", progress["saved"])
+        col4.metric("경과 시간", f"{progress['elapsed']:.0f}초")
+        if batch_run.error:
+            st.error(batch_run.error)
+
+        if batch_run.running:
+            if st.button("중단", key="cancel_batch_btn"):
+                batch_run.cancel()
+            with st.expander("최근 결과"):
+                for name, status in progress["recent"]:
+                    st.write(f"{'✅' if status == 'OK' else '❌'} {name}")
+        elif batch_run.cancelled:
+            st.warning("배치 실행이 중단되었습니다.")
+        else:
+            st.success("배치 실행이 완료되었습니다.")
+        # 배치가 끝났으면 전체를 다시 실행해 주기적인 갱신을 멈추고 실행 버튼을 다시 활성화
+        if was_running and not batch_run.running:
+            st.rerun()
+
+    def render_compare_section(self, http_method, prompt, data_type, data):
+        """비교 테스트: 같은 요청을 여러 엔드포인트에 동시에 보내고 응답을 나란히 비교"""
+        st.subheader("비교 테스트")
+        endpoints = load_endpoints()
+        selected = st.multiselect(
+            "비교할 엔드포인트", options=endpoints, default=endpoints[:2],
+            help="첫 번째로 선택한 엔드포인트의 응답을 기준으로 차이를 표시합니다. 상세 URL 경로는 위에서 입력한 값을 사용합니다."
+        )
+        if st.button("동시에 보내기", type="primary", disabled=len(selected) < 2):
+            if data_type == "선택안함":
+                data = None
+            with st.spinner(f"{len(selected)}개 엔드포인트에 요청 중..."):
+                st.session_state.compare_result = compare_endpoints(
+                    selected, self.url_path, http_method, prompt, data_type, data,
+                    prompt_id=self.selected_prompt_id, use_cache=self.use_cache,
+                    cassette=self.cassette
+                )
+        self.render_compare_result()
+
+    def render_compare_result(self):
+        """엔드포인트별 응답을 나란히 표시하고 기준 응답과의 구조적 차이 표시"""
+        result = st.session_state.compare_result
+        if result is None:
+            return
+        results = result["results"]
+        serial_time = sum(r["timings"]["total"] for r in results)
+        st.caption(
+            f"전체 소요 시간 {result['wall_time'] * 1000:.0f} ms (순서대로 보냈다면 약 {serial_time * 1000:.0f} ms) · "
+            f"비교 그룹 {result['group_id'][:8]}"
+        )
+
+        columns = st.columns(len(results))
+        for column, r in zip(columns, results):
+            with column:
+                icon = "✅" if r["status"] == "OK" else "❌"
+                st.write(f"{icon} **{r['endpoint']}**")
+                st.caption(
+                    f"HTTP {r['status_code'] or '-'} · 전체 {r['timings']['total'] * 1000:.0f} ms"
+                    + (f" · 첫 바이트 {r['timings']['ttfb'] * 1000:.0f} ms" if r["timings"]["ttfb"] is not None else "")
+                )
+                if isinstance(r["response"], (dict, list)):
+                    st.json(r["response"])
+                else:
+                    st.code(str(r["response"]))
+
+        baseline = results[0]["endpoint"]
+        for r in results[1:]:
+            with st.expander(f"{baseline} ↔ {r['endpoint']} · 차이 {len(r['diff'])}건", expanded=bool(r["diff"])):
+                if not r["diff"]:
+                    st.success("응답이 같습니다.")
+                    continue
+                st.dataframe(
+                    [
+                        {
+                            "경로": change["path"],
+                            "종류": {"added": "추가", "removed": "삭제", "changed": "변경"}[change["kind"]],
+                            "기준": json.dumps(change["left"], ensure_ascii=False),
+                            "비교": json.dumps(change["right"], ensure_ascii=False),
+                        }
+                        for change in r["diff"]
+                    ],
+                    use_container_width=True,
+                    hide_index=True,
+                )
+
+    def render_benchmark_section(self, full_url, http_method, prompt, data_type, data):
+        """벤치마크: 같은 요청을 정해진 시간 동안 반복해 보내고 처리량/지연 시간 분포 측정"""
+        st.subheader("벤치마크")
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            mode = st.radio(
+                "부하 방식", [MODE_CLOSED, MODE_OPEN], horizontal=True,
+                format_func=lambda m: "동시 요청 수 고정 (closed)" if m == MODE_CLOSED else "목표 RPS (open)"
+            )
+        with col2:
+            if mode == MODE_CLOSED:
+                concurrency = st.number_input("동시 요청 수", min_value=1, max_value=256, value=8)
+                rate = None
+            else:
+                rate = st.number_input("목표 RPS", min_value=0.1, max_value=5000.0, value=20.0)
+                concurrency = None
+        with col3:
+            duration = st.number_input("실행 시간 (초)", min_value=1, max_value=3600, value=10)
+
+        benchmark = st.session_state.benchmark
+        running = benchmark is not None and benchmark.running
+        if st.button("벤치마크 시작", type="primary", disabled=running or not full_url):
+            if data_type == "선택안함":
+                data = None
+            # 동시 요청 수만큼 연결을 재사용할 수 있도록 풀 크기를 맞춤
+            group = load_endpoint_groups().get(self.endpoint_group) if self.endpoint_group else None
+            for endpoint in (group["endpoints"] if group else [full_url]):
+                http_pool.ensure_pool_size(endpoint, concurrency or min(int(rate) + 1, 256))
+            st.session_state.benchmark = Benchmark(
+                lambda: self.send_api_request(self.resolve_target(full_url)[1], http_method, prompt, data_type, data),
+                mode=mode, duration=duration, concurrency=concurrency or 1, rate=rate or 1,
+            ).start()
+            st.session_state.benchmark_saved = False
+            st.session_state.benchmark_target = (
+                f"{http_method} 그룹 {self.endpoint_group}{self.url_path}" if self.endpoint_group
+                else f"{http_method} {full_url}"
+            )
+
+        self.render_benchmark_result()
+        self.render_benchmark_history()
+
+    def render_benchmark_result(self):
+        """진행 중이거나 마지막으로 실행한 벤치마크 결과 (측정 중이면 이 부분만 1초마다 갱신)"""
+        benchmark = st.session_state.benchmark
+        if benchmark is None:
+            return
+        running = benchmark.running
+        st.fragment(run_every=1.0 if running else None)(self.render_benchmark_status)(benchmark, running)
+
+    def render_benchmark_status(self, benchmark, was_running):
+        result = benchmark.result()
+        st.progress(min(result["elapsed"] / result["duration"], 1.0),
+                    text=f"{result['elapsed']:.0f} / {result['duration']:g}초")
+        col1, col2, col3, col4 = st.columns(4)
+        col1.metric("요청 수", result["requests"])
+        col2.metric("처리량", f"{result['throughput']:.1f} req/s")
+        col3.metric("오류율", f"{result['error_rate']:.1%}")
+        col4.metric("평균 지연", f"{result['latency']['mean'] * 1000:.0f} ms")
+        st.dataframe(
+            [{f"p{q:g}": f"{result['latency'][f'p{q:g}'] * 1000:.1f} ms" for q in PERCENTILES}],
+            use_container_width=True, hide_index=True
+        )
+        if result["dropped"]:
+            st.warning(f"동시 진행 요청 한도를 넘어 보내지 못한 요청: {result['dropped']}건")
+        if result["error_samples"]:
+            with st.expander("오류 예시"):
+                for sample in result["error_samples"]:
+                    st.code(sample)
+
+        if benchmark.running:
+            if st.button("중단", key="stop_benchmark_btn"):
+                benchmark.stop()
+        elif not st.session_state.get("benchmark_saved"):
+            # 끝난 실행은 한 번만 저장해 이후 실행과 비교
+            save_benchmark_run({"target": st.session_state.get("benchmark_target"), **result})
+            st.session_state.benchmark_saved = True
+        # 측정이 끝났으면 전체를 다시 실행해 주기적인 갱신을 멈추고 저장된 실행 비교에 반영
+        if was_running and not benchmark.running:
+            st.rerun()
+
+    def render_benchmark_history(self):
+        """저장된 벤치마크 실행 비교"""
+        runs = load_benchmark_runs()
+        if not runs:
+            return
+        with st.expander(f"이전 실행 비교 ({len(runs)}건)"):
+            st.dataframe(
+                [
+                    {
+                        "시각": run["timestamp"][:19],
+                        "대상": run.get("target"),
+                        "방식": f"closed × {run['concurrency']}" if run["mode"] == MODE_CLOSED
+                                else f"open {run['target_rps']:g} RPS",
+                        "요청 수": run["requests"],
+                        "처리량 (req/s)": round(run["throughput"], 1),
+                        "오류율": f"{run['error_rate']:.1%}",
+                        **{f"p{q:g} (ms)": round(run["latency"][f"p{q:g}"] * 1000, 1) for q in PERCENTILES},
+                    }
+                    for run in reversed(runs)
+                ],
+                use_container_width=True, hide_index=True
+            )
+
+    def render_cache_toggle(self):
+        """응답 캐시 사용 여부와 적중률"""
+        cache_col, stats_col = st.columns([1, 3])
+        with cache_col:
+            self.use_cache = st.toggle(
+                "응답 캐시 사용", key="use_response_cache",
+                help="URL, 메소드, 프롬프트, 데이터가 모두 같은 요청은 저장된 응답을 재사용합니다."
+            )
+        with stats_col:
+            stats = get_response_cache_stats()
+            st.caption(
+                f"응답 캐시 적중률: {stats['hit_rate']:.0%} "
+                f"(hit {stats['hits']} / miss {stats['misses']}, 디스크 hit {stats['disk_hits']})"
+            )
+
+    def render_cassette_controls(self):
+        """요청/응답 녹화 또는 녹화된 응답 재생 (모델 변경 전후 회귀 비교용)"""
+        with st.expander("카세트 녹화/재생"):
+            mode = st.radio("카세트", ["사용 안 함", "녹화", "재생"], horizontal=True, key="cassette_mode")
+            if mode == "사용 안 함":
+                self.cassette = None
+                return
+            if mode == "녹화":
+                name = st.text_input("카세트 이름", value="baseline", key="cassette_name",
+                                     help="같은 요청을 다시 녹화하면 마지막 응답으로 교체됩니다. 스트리밍 응답은 녹화하지 않습니다.")
+            else:
+                names = list_cassettes()
+                if not names:
+                    st.warning("녹화된 카세트가 없습니다.")
+                    self.cassette = None
+                    return
+                name = st.selectbox("재생할 카세트", names, key="cassette_replay_name")
+            col1, col2, col3 = st.columns([2, 2, 1])
+            with col1:
+                ignore_fields = st.text_input(
+                    "무시할 필드", key="cassette_ignore_fields",
+                    help="쉼표로 구분, 점으로 경로 지정 (예: prompt, data.request_id)"
+                )
+            with col2:
+                ignore_query = st.text_input("무시할 쿼리 파라미터", key="cassette_ignore_query", help="쉼표로 구분")
+            with col3:
+                ignore_host = st.checkbox("호스트 무시", key="cassette_ignore_host",
+                                          help="다른 엔드포인트에서 녹화한 응답도 경로가 같으면 재생")
+            if not name.strip():
+                self.cassette = None
+                return
+            self.cassette = get_cassette(name, MODE_RECORD if mode == "녹화" else MODE_REPLAY, {
+                "ignore_fields": ignore_fields.split(","),
+                "ignore_query": ignore_query.split(","),
+                "ignore_host": ignore_host,
+            })
+            stats = self.cassette.stats()
+            st.caption(
+                f"녹화된 요청 {self.cassette.size()}건 · 이번 실행: 녹화 {stats['recorded']} / "
+                f"재생 {stats['hits']} / 불일치 {stats['misses']}"
+            )
+
     def render(self):
         """페이지 전체 렌더링"""
         full_url, http_method = self.render_api_settings()
+        mode = st.radio("테스트 모드", ["단일 테스트", "비교 테스트", "배치 테스트", "벤치마크"], horizontal=True)
+        if mode != "벤치마크":
+            # 벤치마크는 항상 실제 요청을 보냄
+            self.render_cache_toggle()
+            self.render_cassette_controls()
+        if mode == "배치 테스트":
+            self.render_batch_section(full_url, http_method)
+            return
+        if mode == "비교 테스트":
+            prompt, has_prompt = self.render_prompt_section()
+            data_type, data = self.render_data_input()
+            self.render_compare_section(http_method, prompt if has_prompt else None, data_type, data)
+            return
+        if mode == "벤치마크":
+            prompt, has_prompt = self.render_prompt_section()
+            data_type, data = self.render_data_input()
+            self.render_benchmark_section(full_url, http_method, prompt if has_prompt else None, data_type, data)
+            return
         prompt, has_prompt = self.render_prompt_section()
         data_type, data = self.render_data_input()
+        self.use_stream = st.toggle(
+            "스트리밍 응답", key="use_stream_response",
+            help="SSE 또는 chunked 응답을 도착하는 대로 표시합니다. (응답 캐시는 사용하지 않음)"
+        )
+        self.use_background = st.toggle(
+            "백그라운드 실행", value=True, key="use_background_jobs", disabled=self.use_stream,
+            help="요청을 작업 큐에 넣고 결과를 아래 작업 목록에서 확인합니다. 기다리는 동안 화면을 계속 사용할 수 있고, "
+                 "페이지를 옮기거나 다시 실행해도 요청이 유지됩니다. (스트리밍 응답은 바로 표시)"
+        )
         
         # API 요청 버튼 및 상태 표시
         status_col, send_col = st.columns([8,1])
@@ -286,6 +895,7 @@ class TesterPage:
             if data_type == "선택안함":
                 data = None
             self.handle_api_request(full_url, http_method, prompt if has_prompt else None, data_type, data)
+        self.render_jobs()
 
 # 전역 인스턴스 생성
 page = TesterPage()
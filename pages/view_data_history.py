@@ -1,3 +1,131 @@
 import streamlit as st
+import pandas as pd
+from datetime import datetime
+from utils.storage import load_prompts
+from utils.analytics import history_analytics, analytics_available, filter_frame, summarize, field_distribution
+from utils.profiler import profiled
 
-st.write("This is 실험실!")
\ No newline at end of file
+@profiled
+class ExperimentPage:
+    GROUP_OPTIONS = {"프롬프트": "prompt_key", "엔드포인트": "endpoint", "날짜": "day"}
+
+    def __init__(self):
+        self.prompt_names = {p["id"]: p["name"] for p in load_prompts()}
+
+    def prompt_label(self, key):
+        """집계의 프롬프트 키를 화면에 표시할 이름으로 변환"""
+        if key in self.prompt_names:
+            return self.prompt_names[key]
+        if key.startswith("#"):
+            return f"직접 입력 {key[1:9]}"
+        return key or "(없음)"
+
+    def render_refresh(self):
+        """
+        분석 저장소 반영 상태 (새 이력은 백그라운드 스레드가 반영하고, 화면은 저장된 집계만 읽음)
+
+        새로고침 버튼을 누르면 그때까지 쌓인 새 이력을 바로 반영한다.
+        """
+        col1, col2 = st.columns([4, 1])
+        with col2:
+            added = history_analytics.refresh() if st.button("새로고침", key="refresh_analytics_btn") else 0
+        refreshed_at = history_analytics.last_refreshed()
+        with col1:
+            st.caption(
+                (f"새 이력 {added}건 반영 · " if added else "")
+                + (f"마지막 반영 {datetime.fromtimestamp(refreshed_at):%Y-%m-%d %H:%M:%S}" if refreshed_at
+                   else "아직 반영된 이력이 없습니다. 새로고침을 누르면 바로 반영합니다.")
+            )
+
+    def render_filters(self, aggregates):
+        """기간, 프롬프트, 엔드포인트 조건과 묶을 기준"""
+        days = sorted(d for d in aggregates["day"].unique() if d)
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            date_range = st.date_input(
+                "기간", value=(), help="시작일과 종료일을 선택하세요 (선택하지 않으면 전체)",
+                min_value=datetime.fromisoformat(days[0]) if days else None,
+                max_value=datetime.fromisoformat(days[-1]) if days else None,
+            )
+        with col2:
+            prompt_keys = st.multiselect(
+                "프롬프트", sorted(aggregates["prompt_key"].unique()), format_func=self.prompt_label
+            )
+        with col3:
+            endpoints = st.multiselect("엔드포인트", sorted(e for e in aggregates["endpoint"].unique() if e))
+        group_by = st.radio("묶는 기준", list(self.GROUP_OPTIONS), horizontal=True)
+
+        since = until = None
+        if len(date_range) == 2:
+            since, until = date_range[0].isoformat(), date_range[1].isoformat()
+        filters = {"since": since, "until": until, "prompt_keys": prompt_keys, "endpoints": endpoints}
+        return filters, self.GROUP_OPTIONS[group_by]
+
+    def render_summary(self, aggregates):
+        """전체 실행 수, 성공률, 지연 시간 백분위수"""
+        total = summarize(aggregates).iloc[0]
+        col1, col2, col3, col4, col5 = st.columns(5)
+        col1.metric("실행", f"{int(total['runs']):,}")
+        col2.metric("성공률", f"{total['success_rate']:.1%}" if total["runs"] else "-")
+        for col, name in ((col3, "p50"), (col4, "p90"), (col5, "p99")):
+            col.metric(name, f"{total[name] * 1000:.0f} ms" if pd.notna(total[name]) else "-")
+
+    def render_groups(self, aggregates, by):
+        """기준별 성공률과 지연 시간 표, 날짜별 추이"""
+        summary = summarize(aggregates, by)
+        rows = [
+            {
+                "기준": self.prompt_label(key) if by == "prompt_key" else key,
+                "실행": int(row["runs"]),
+                "성공률": round(row["success_rate"] * 100, 1),
+                "평균(ms)": round(row["mean"] * 1000, 1),
+                "p50(ms)": round(row["p50"] * 1000, 1),
+                "p90(ms)": round(row["p90"] * 1000, 1),
+                "p99(ms)": round(row["p99"] * 1000, 1),
+            }
+            for key, row in summary.sort_values("runs", ascending=False).iterrows()
+        ]
+        st.dataframe(rows, use_container_width=True, hide_index=True)
+
+        daily = summarize(aggregates, "day").sort_index()
+        if len(daily) > 1:
+            col1, col2 = st.columns(2)
+            with col1:
+                st.write("**날짜별 성공률**")
+                st.line_chart(daily["success_rate"])
+            with col2:
+                st.write("**날짜별 지연 시간 (초)**")
+                st.line_chart(daily[["p50", "p90"]])
+
+    def render_fields(self, filters):
+        """응답 필드 값 분포"""
+        fields = filter_frame(history_analytics.fields(), **filters)
+        names = sorted(fields["field"].unique())
+        if not names:
+            return
+        st.subheader("응답 필드 분포")
+        field = st.selectbox("필드", names)
+        st.bar_chart(field_distribution(fields, field))
+
+    def render(self):
+        if not analytics_available():
+            st.info("실험실 분석에는 pyarrow가 필요합니다. (pip install pyarrow)")
+            return
+        self.render_refresh()
+        aggregates = history_analytics.aggregates()
+        if aggregates.empty:
+            st.info("분석할 이력이 없습니다.")
+            return
+        filters, by = self.render_filters(aggregates)
+        filtered = filter_frame(aggregates, **filters)
+        if filtered.empty:
+            st.info("조건에 맞는 이력이 없습니다.")
+            return
+        self.render_summary(filtered)
+        self.render_groups(filtered, by)
+        self.render_fields(filters)
+
+# 전역 인스턴스 생성
+page = ExperimentPage()
+# 페이지 렌더링
+page.render()
@@ -1,8 +1,12 @@
-from fastapi import FastAPI, File, UploadFile
+from fastapi import FastAPI, File, UploadFile, Request, Body
+from fastapi.responses import StreamingResponse
+import asyncio
+import json
 from fastapi.middleware.cors import CORSMiddleware
 import random
 import uvicorn
-from typing import List
+from typing import List, Dict, Any
+from simulator import simulate, resolve_settings, load_config, MOCK_CONFIG
 
 app = FastAPI()
 
@@ -15,6 +19,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 지연/오류/타임아웃/응답 크기/스트리밍/동시 요청 한도 시뮬레이션 (설정이 없으면 원래 응답 그대로)
+app.middleware("http")(simulate)
+
 @app.post("/single")
 async def process_image(image: UploadFile = File(...)):
     """이미지를 받아서 랜덤한 음식 3개를 반환합니다."""
@@ -40,5 +47,44 @@ async def get_quota():
     used = random.randint(0, 100)
     return {"used": str(used)}
 
+@app.get("/echo")
+async def echo_get(request: Request):
+    """쿼리 파라미터를 그대로 반환합니다. (벤치마크 대상용)"""
+    return dict(request.query_params)
+
+@app.post("/echo")
+async def echo_post(payload: Dict[str, Any] = Body(default={})):
+    """JSON 본문을 그대로 반환합니다. (벤치마크 대상용)"""
+    return payload
+
+STREAM_TEXT = "요청하신 이미지를 분석한 결과 햄버거, 콜라, 치즈가 보입니다. 전체적으로 패스트푸드 세트로 판단됩니다."
+
+async def generate_tokens(fmt: str, delay: float):
+    tokens = STREAM_TEXT.split(" ")
+    for i, token in enumerate(tokens):
+        await asyncio.sleep(delay)
+        piece = token if i == 0 else " " + token
+        if fmt == "sse":
+            yield f"data: {json.dumps({'delta': piece}, ensure_ascii=False)}\n\n"
+        else:
+            yield json.dumps({"index": i, "delta": piece}, ensure_ascii=False) + "\n"
+    if fmt == "sse":
+        yield "data: [DONE]\n\n"
+
+@app.api_route("/stream", methods=["GET", "POST"])
+async def stream(format: str = "sse", delay: float = 0.2):
+    """토큰을 나눠 스트리밍으로 반환합니다. (format=sse 또는 ndjson, delay=토큰 간격 초)"""
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(generate_tokens(format, delay), media_type=media_type)
+
+@app.get("/mock/config")
+async def mock_config(request: Request, path: str = "/single"):
+    """path 라우트에 적용될 시뮬레이션 설정을 반환합니다. (mock_* 쿼리 파라미터도 반영)"""
+    return {
+        "config_file": MOCK_CONFIG,
+        "config": load_config(),
+        "effective": resolve_settings(path, request.query_params),
+    }
+
 if __name__ == "__main__":
     uvicorn.run("main:app", host="0.0.0.0", port=9001, reload=True) 
\ No newline at end of file
@@ -0,0 +1,203 @@
+import os
+import json
+import math
+import random
+import asyncio
+from fastapi import Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+
+# 라우트별 시뮬레이션 설정 파일 (JSON, 파일이 바뀌면 다음 요청부터 다시 읽음)
+MOCK_CONFIG = os.environ.get("MOCK_CONFIG", os.path.join(os.path.dirname(__file__), "mock_config.json"))
+# 요청마다 설정을 덮어쓰는 쿼리 파라미터 접두사 (예: ?mock_latency=lognormal&mock_latency_ms=300)
+QUERY_PREFIX = "mock_"
+
+# 기본값은 지연/오류 없이 원래 응답 그대로
+DEFAULTS = {
+    "latency": "fixed",          # fixed, uniform, normal, lognormal, exponential
+    "latency_ms": 0.0,           # fixed: 값, uniform/normal/exponential: 평균, lognormal: 중앙값
+    "latency_spread_ms": 0.0,    # uniform: 평균에서 ± 범위, normal: 표준편차
+    "latency_sigma": 0.5,        # lognormal: 로그 표준편차 (클수록 꼬리가 김)
+    "error_rate": 0.0,           # 오류 응답 비율 (0~1)
+    "error_status": 503,
+    "timeout_rate": 0.0,         # 응답하지 않고 멈추는 비율 (0~1)
+    "timeout_s": 60.0,           # 멈춘 뒤 504로 끝내기까지의 시간
+    "payload_bytes": 0,          # 응답에 덧붙일 패딩 크기
+    "stream": "",                # "", "sse", "chunked"
+    "chunks": 10,                # 스트리밍할 조각 수
+    "chunk_interval_ms": 50.0,   # 조각 간 간격
+    "concurrency": 0,            # 클라이언트별 동시 요청 한도 (0이면 제한 없음)
+    "concurrency_status": 429,
+}
+
+_config_cache = {"key": None, "config": {}}
+# (라우트, 클라이언트) -> 처리 중인 요청 수 (이벤트 루프 하나에서만 접근)
+_in_flight = {}
+
+
+def load_config() -> dict:
+    """
+    설정 파일 읽기
+
+    형식: {"default": {설정}, "routes": {"/single": {설정}, ...}}
+    """
+    try:
+        stat = os.stat(MOCK_CONFIG)
+    except OSError:
+        return {}
+    key = (stat.st_mtime_ns, stat.st_size)
+    if _config_cache["key"] != key:
+        try:
+            with open(MOCK_CONFIG, "r", encoding="utf-8") as f:
+                _config_cache["config"] = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"시뮬레이션 설정을 읽을 수 없습니다 ({MOCK_CONFIG}): {e}")
+            _config_cache["config"] = {}
+        _config_cache["key"] = key
+    return _config_cache["config"]
+
+
+def resolve_settings(path: str, query_params) -> dict:
+    """기본값 < 설정 파일 default < 설정 파일 라우트 < 쿼리 파라미터 순으로 합친 설정"""
+    config = load_config()
+    settings = dict(DEFAULTS)
+    settings.update(config.get("default", {}))
+    settings.update(config.get("routes", {}).get(path, {}))
+    for name, value in query_params.items():
+        if not name.startswith(QUERY_PREFIX):
+            continue
+        name = name[len(QUERY_PREFIX):]
+        if name in DEFAULTS:
+            settings[name] = value
+    # 쿼리 파라미터는 문자열이므로 기본값의 타입으로 변환
+    for name, default in DEFAULTS.items():
+        try:
+            settings[name] = type(default)(settings[name])
+        except (TypeError, ValueError):
+            settings[name] = default
+    return settings
+
+
+def sample_latency(settings: dict) -> float:
+    """설정된 분포에서 지연 시간(초)을 하나 뽑음"""
+    center = settings["latency_ms"]
+    spread = settings["latency_spread_ms"]
+    distribution = settings["latency"]
+    if center <= 0:
+        return 0.0
+    if distribution == "uniform":
+        value = random.uniform(center - spread, center + spread)
+    elif distribution == "normal":
+        value = random.normalvariate(center, spread)
+    elif distribution == "lognormal":
+        value = random.lognormvariate(math.log(center), settings["latency_sigma"])
+    elif distribution == "exponential":
+        value = random.expovariate(1 / center)
+    else:
+        value = center
+    return max(0.0, value) / 1000
+
+
+def client_id(request: Request) -> str:
+    """X-Client-Id 헤더가 있으면 그 값, 없으면 접속 주소"""
+    return request.headers.get("x-client-id") or (request.client.host if request.client else "unknown")
+
+
+def _pad(body: bytes, size: int) -> bytes:
+    """JSON 객체면 _padding 필드를 추가하고, 그 밖의 JSON은 {"data", "_padding"}으로 감쌈"""
+    try:
+        data = json.loads(body) if body else None
+    except ValueError:
+        return body + b" " * size
+    padding = "x" * size
+    if isinstance(data, dict):
+        data["_padding"] = padding
+    else:
+        data = {"data": data, "_padding": padding}
+    return json.dumps(data, ensure_ascii=False).encode("utf-8")
+
+
+async def _stream_chunks(body: bytes, settings: dict):
+    chunks = max(1, settings["chunks"])
+    size = math.ceil(len(body) / chunks) or 1
+    interval = settings["chunk_interval_ms"] / 1000
+    if settings["stream"] == "sse":
+        text = body.decode("utf-8", errors="replace")
+        size = math.ceil(len(text) / chunks) or 1
+        for start in range(0, len(text), size):
+            await asyncio.sleep(interval)
+            yield f"data: {json.dumps({'delta': text[start:start + size]}, ensure_ascii=False)}\n\n".encode("utf-8")
+        yield b"data: [DONE]\n\n"
+        return
+    for start in range(0, len(body), size):
+        await asyncio.sleep(interval)
+        yield body[start:start + size]
+
+
+def _release(key):
+    _in_flight[key] -= 1
+    if not _in_flight[key]:
+        del _in_flight[key]
+
+
+async def _released(chunks, key):
+    try:
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        _release(key)
+
+
+async def simulate(request: Request, call_next):
+    """
+    라우트별 설정에 따라 응답을 지연/실패/변형하는 미들웨어
+
+    순서: 클라이언트별 동시 요청 한도 → 지연 → 타임아웃 → 오류 → 원래 처리 → 패딩 → 스트리밍
+    """
+    if request.url.path.startswith("/mock/"):
+        return await call_next(request)
+    settings = resolve_settings(request.url.path, request.query_params)
+
+    key = (request.url.path, client_id(request))
+    limit = settings["concurrency"]
+    if limit > 0 and _in_flight.get(key, 0) >= limit:
+        return JSONResponse(
+            {"error": "too many concurrent requests", "limit": limit},
+            status_code=settings["concurrency_status"],
+            headers={"Retry-After": "1"},
+        )
+    _in_flight[key] = _in_flight.get(key, 0) + 1
+    streaming = False
+    try:
+        await asyncio.sleep(sample_latency(settings))
+
+        roll = random.random()
+        if roll < settings["timeout_rate"]:
+            await asyncio.sleep(settings["timeout_s"])
+            return JSONResponse({"error": "simulated timeout"}, status_code=504)
+        if roll < settings["timeout_rate"] + settings["error_rate"]:
+            return JSONResponse({"error": "simulated error"}, status_code=settings["error_status"])
+
+        response = await call_next(request)
+        media_type = response.headers.get("content-type", "")
+        # 원래부터 스트리밍하는 라우트(/stream)는 그대로 전달
+        if media_type.startswith(("text/event-stream", "application/x-ndjson")):
+            response.body_iterator = _released(response.body_iterator, key)
+            streaming = True
+            return response
+        if settings["payload_bytes"] <= 0 and not settings["stream"]:
+            return response
+
+        body = b"".join([chunk async for chunk in response.body_iterator])
+        if settings["payload_bytes"] > 0:
+            body = _pad(body, settings["payload_bytes"])
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in ("content-length", "content-type")}
+        if settings["stream"] in ("sse", "chunked"):
+            stream_type = "text/event-stream" if settings["stream"] == "sse" else media_type
+            streaming = True
+            return StreamingResponse(_released(_stream_chunks(body, settings), key), status_code=response.status_code,
+                                     headers=headers, media_type=stream_type)
+        return Response(body, status_code=response.status_code, headers=headers, media_type=media_type)
+    finally:
+        # 스트리밍 응답은 본문을 다 보낸 뒤에 한도에서 뺌
+        if not streaming:
+            _release(key)
@@ -0,0 +1,64 @@
+import hashlib
+import os
+from utils.multipart import MultipartBody, CHUNK_SIZE
+
+
+def _expected(body, path):
+    return (
+        f'--{body.boundary}\r\nContent-Disposition: form-data; name="prompt"\r\n\r\nhello\r\n'
+        f'--{body.boundary}\r\nContent-Disposition: form-data; name="file"; filename="photo.jpg"\r\n'
+        f"Content-Type: image/jpeg\r\n\r\n".encode("utf-8")
+        + open(path, "rb").read()
+        + f"\r\n--{body.boundary}--\r\n".encode("utf-8")
+    )
+
+
+def test_read_streams_large_body(tmp_path):
+    # 20MB가 넘는 파일을 작은 크기로 끝까지 읽어도 (조각 경계가 맞지 않게) 내용과 길이가 그대로여야 함
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(os.urandom(24 * 1024 * 1024 + 123))
+    body = MultipartBody({"prompt": "hello"}, {"file": ("photo.jpg", str(path), "image/jpeg")})
+    expected = _expected(body, path)
+
+    for size in (8192, CHUNK_SIZE + 1000):
+        body.seek(0)
+        digest, total = hashlib.sha256(), 0
+        while True:
+            chunk = body.read(size)
+            if not chunk:
+                break
+            assert len(chunk) <= size
+            digest.update(chunk)
+            total += len(chunk)
+        assert total == len(body) == len(expected) == body.tell()
+        assert digest.hexdigest() == hashlib.sha256(expected).hexdigest()
+
+
+def test_iter_matches_read(tmp_path):
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(os.urandom(3 * CHUNK_SIZE + 7))
+    body = MultipartBody({"prompt": "hello"}, {"file": ("photo.jpg", str(path), "image/jpeg")})
+    assert b"".join(body) == _expected(body, path)
+    body.seek(0)
+    assert body.read() == _expected(body, path)
+
+
+def test_buffer_source_matches_file(tmp_path):
+    # 메모리 매핑 같은 버퍼를 넘겨도 파일 경로를 넘긴 것과 같은 본문이어야 함
+    import mmap
+    path = tmp_path / "photo.jpg"
+    path.write_bytes(os.urandom(2 * CHUNK_SIZE + 11))
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    body = MultipartBody({"prompt": "hello"}, {"file": ("photo.jpg", buffer, "image/jpeg")})
+    expected = _expected(body, path)
+    assert len(body) == len(expected)
+    chunks = []
+    while True:
+        chunk = body.read(5000)
+        if not chunk:
+            break
+        chunks.append(chunk)
+    assert b"".join(chunks) == expected
+    body.close()
+    assert buffer.closed
@@ -0,0 +1,336 @@
+import os
+import json
+import time
+import threading
+import numpy as np
+import pandas as pd
+from utils.locking import FileLock, atomic_write_json
+from utils.storage import ANALYTICS_DIR, read_history_changes, file_cache
+
+try:
+    import pyarrow  # noqa: F401 (pandas의 Parquet 엔진)
+except ImportError:  # pyarrow가 없으면 실험실 분석을 사용할 수 없음 (나머지 기능은 그대로 동작)
+    pyarrow = None
+
+# 새 이력을 분석 저장소에 반영하는 주기(초), 0이면 실험실 화면의 새로고침 버튼을 누를 때만 반영
+ANALYTICS_REFRESH_INTERVAL = float(os.environ.get("ANALYTICS_REFRESH_INTERVAL", "60"))
+
+# 지연 시간 분포 구간 (1ms ~ 10분을 로그 간격으로 나눔), 구간별 개수는 합칠 수 있으므로 백분위수를 증분 집계할 수 있음
+LATENCY_EDGES = np.geomspace(0.001, 600, 121)
+BUCKET_COLUMNS = [f"b{i:02d}" for i in range(len(LATENCY_EDGES) - 1)]
+GROUP_KEYS = ["source", "day", "prompt_key", "endpoint"]
+FIELD_KEYS = GROUP_KEYS + ["field", "value"]
+# 응답 필드 분포에 넣을 값의 최대 길이 (이보다 긴 값은 자유 텍스트로 보고 제외)
+FIELD_VALUE_MAX_LENGTH = 80
+
+RUN_COLUMNS = ["id", "timestamp", "day", "prompt_key", "prompt_id", "prompt_hash", "endpoint", "status", "ok",
+               "total", "ttfb", "response_bytes", "group_id"]
+
+
+def analytics_available() -> bool:
+    return pyarrow is not None
+
+
+def _prompt_key(entry) -> str:
+    """저장된 프롬프트면 프롬프트 ID, 직접 입력한 프롬프트면 '#' + 프롬프트 해시"""
+    if entry.get("prompt_id"):
+        return entry["prompt_id"]
+    return f"#{entry['prompt_hash']}" if entry.get("prompt_hash") else ""
+
+
+def runs_frame(entries) -> pd.DataFrame:
+    """이력 목록을 열 단위 실행 기록으로 변환"""
+    timings = [entry.get("timings") or {} for entry in entries]
+    timestamps = [entry.get("timestamp") or "" for entry in entries]
+    status = [entry.get("status") for entry in entries]
+    return pd.DataFrame({
+        "id": [entry["id"] for entry in entries],
+        "timestamp": timestamps,
+        "day": [timestamp[:10] for timestamp in timestamps],
+        "prompt_key": [_prompt_key(entry) for entry in entries],
+        "prompt_id": [entry.get("prompt_id") for entry in entries],
+        "prompt_hash": [entry.get("prompt_hash") for entry in entries],
+        "endpoint": [entry.get("endpoint") or "" for entry in entries],
+        "status": status,
+        "ok": [s == "OK" for s in status],
+        "total": pd.array([t.get("total") for t in timings], dtype="Float64").astype(float),
+        "ttfb": pd.array([t.get("ttfb") for t in timings], dtype="Float64").astype(float),
+        "response_bytes": pd.array([t.get("response_bytes") for t in timings], dtype="Int64"),
+        "group_id": [entry.get("group_id") for entry in entries],
+    }, columns=RUN_COLUMNS)
+
+
+def _response_fields(response):
+    """
+    응답에서 분포를 셀 (필드, 값) 목록
+
+    객체면 최상위와 한 단계 아래의 값, 객체 목록이면 각 항목의 값을 "[].필드" 이름으로 센다.
+    """
+    def scalars(obj, prefix):
+        for key, value in obj.items():
+            if key.startswith("_"):
+                continue
+            if isinstance(value, dict) and not prefix:
+                yield from scalars(value, f"{key}.")
+            elif isinstance(value, (str, int, float, bool)) and len(str(value)) <= FIELD_VALUE_MAX_LENGTH:
+                yield f"{prefix}{key}", str(value)
+
+    if isinstance(response, dict):
+        return list(scalars(response, ""))
+    if isinstance(response, list):
+        return [(f"[].{field}", value) for item in response if isinstance(item, dict)
+                for field, value in scalars(item, "")]
+    return []
+
+
+def aggregate_runs(runs: pd.DataFrame) -> pd.DataFrame:
+    """
+    (출처, 날짜, 프롬프트, 엔드포인트)별 실행 수, 성공 수, 지연 시간 합계와 구간별 개수
+
+    모든 값이 합으로 합쳐지므로 새 실행분을 따로 집계해 기존 집계에 더하면 된다.
+    """
+    if runs.empty:
+        return pd.DataFrame(columns=GROUP_KEYS + ["runs", "ok", "latency_count", "latency_sum"] + BUCKET_COLUMNS)
+    grouped = runs.groupby(GROUP_KEYS, sort=False)
+    base = grouped.agg(runs=("ok", "size"), ok=("ok", "sum"), latency_count=("total", "count"),
+                       latency_sum=("total", "sum"))
+    timed = runs[runs["total"].notna()]
+    buckets = np.clip(np.searchsorted(LATENCY_EDGES, timed["total"].to_numpy(), side="right") - 1,
+                      0, len(BUCKET_COLUMNS) - 1)
+    histogram = (
+        timed.assign(bucket=buckets).groupby(GROUP_KEYS + ["bucket"], sort=False).size()
+        .unstack(fill_value=0)
+        .reindex(columns=range(len(BUCKET_COLUMNS)), fill_value=0)
+    )
+    histogram = pd.DataFrame(histogram.reindex(base.index, fill_value=0).to_numpy(dtype="int64"),
+                             index=base.index, columns=BUCKET_COLUMNS)
+    base = base.astype({"runs": "int64", "ok": "int64", "latency_count": "int64"})
+    return pd.concat([base, histogram], axis=1).reset_index()
+
+
+def aggregate_fields(source, entries) -> pd.DataFrame:
+    """(출처, 날짜, 프롬프트, 엔드포인트, 응답 필드, 값)별 개수"""
+    rows = [
+        (source, (entry.get("timestamp") or "")[:10], _prompt_key(entry), entry.get("endpoint") or "", field, value)
+        for entry in entries
+        for field, value in _response_fields(entry.get("response"))
+    ]
+    if not rows:
+        return pd.DataFrame(columns=FIELD_KEYS + ["count"])
+    frame = pd.DataFrame(rows, columns=FIELD_KEYS)
+    return frame.groupby(FIELD_KEYS, sort=False).size().rename("count").reset_index()
+
+
+def _merge(existing: pd.DataFrame, new: pd.DataFrame, keys) -> pd.DataFrame:
+    if existing is None or existing.empty:
+        return new.reset_index(drop=True)
+    if new.empty:
+        return existing
+    return pd.concat([existing, new], ignore_index=True).groupby(keys, sort=False).sum().reset_index()
+
+
+def _write_parquet(frame: pd.DataFrame, path: str):
+    """다른 프로세스가 읽는 도중에도 항상 완전한 파일이 보이도록 임시 파일에 쓴 뒤 교체"""
+    tmp_path = f"{path}.tmp"
+    frame.to_parquet(tmp_path, index=False)
+    os.replace(tmp_path, path)
+
+
+class HistoryAnalytics:
+    """
+    이력의 열 단위(Parquet) 분석 저장소
+
+    새로 기록된 이력만 읽어(storage.read_history_changes) 실행 기록 조각 파일(runs/)로 남기고,
+    날짜/프롬프트/엔드포인트별 집계(aggregates.parquet)와 응답 필드 분포(fields.parquet)에 더한다.
+    화면은 원본 이력이나 실행 기록을 다시 읽지 않고 이 집계 파일만 읽는다.
+    집계는 출처(세그먼트)별로 나뉘어 있어, 세그먼트가 삭제되거나 다시 기록되면 그 출처의 몫만 빼고 다시 더한다.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        self.runs_dir = os.path.join(directory, "runs")
+        self.aggregates_path = os.path.join(directory, "aggregates.parquet")
+        self.fields_path = os.path.join(directory, "fields.parquet")
+        self.state_path = os.path.join(directory, "state.json")
+        self.lock_path = os.path.join(directory, "analytics.lock")
+
+    def _load_state(self) -> dict:
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"positions": {}, "next_part": 0, "refreshed_at": None}
+
+    @staticmethod
+    def _read(path):
+        return pd.read_parquet(path) if os.path.exists(path) else None
+
+    def _drop_sources(self, sources):
+        for name in os.listdir(self.runs_dir):
+            if name.rsplit("-", 1)[0] in sources:
+                os.remove(os.path.join(self.runs_dir, name))
+
+    def refresh(self) -> int:
+        """
+        새 이력을 반영
+
+        Returns:
+            int: 새로 반영한 이력 수
+        """
+        if not analytics_available():
+            return 0
+        os.makedirs(self.runs_dir, exist_ok=True)
+        with FileLock(self.lock_path):
+            state = self._load_state()
+            changes, positions, removed = read_history_changes(state["positions"])
+            if not changes and not removed:
+                return 0
+
+            aggregates = self._read(self.aggregates_path)
+            fields = self._read(self.fields_path)
+            dropped = set(removed) | {source for source, reset, _ in changes if reset}
+            if dropped:
+                self._drop_sources(dropped)
+                if aggregates is not None:
+                    aggregates = aggregates[~aggregates["source"].isin(dropped)]
+                if fields is not None:
+                    fields = fields[~fields["source"].isin(dropped)]
+
+            new_runs, new_fields = [], []
+            count = 0
+            for source, _, entries in changes:
+                if not entries:
+                    continue
+                runs = runs_frame(entries).assign(source=source)
+                _write_parquet(runs, os.path.join(self.runs_dir, f"{source}-{state['next_part']:08d}.parquet"))
+                state["next_part"] += 1
+                new_runs.append(aggregate_runs(runs))
+                new_fields.append(aggregate_fields(source, entries))
+                count += len(entries)
+
+            if new_runs:
+                aggregates = _merge(aggregates, pd.concat(new_runs, ignore_index=True), GROUP_KEYS)
+                fields = _merge(fields, pd.concat(new_fields, ignore_index=True), FIELD_KEYS)
+            _write_parquet(aggregates if aggregates is not None else aggregate_runs(runs_frame([])),
+                           self.aggregates_path)
+            _write_parquet(fields if fields is not None else aggregate_fields(None, []), self.fields_path)
+            state.update(positions=positions, refreshed_at=time.time())
+            atomic_write_json(self.state_path, state)
+            return count
+
+    def aggregates(self) -> pd.DataFrame:
+        """날짜/프롬프트/엔드포인트별 집계 (파일이 바뀌었을 때만 다시 읽음, 반환값을 수정하지 말 것)"""
+        if not os.path.exists(self.aggregates_path):
+            return aggregate_runs(runs_frame([]))
+        return file_cache.get(self.aggregates_path, pd.read_parquet)
+
+    def fields(self) -> pd.DataFrame:
+        """응답 필드 값 분포 (반환값을 수정하지 말 것)"""
+        if not os.path.exists(self.fields_path):
+            return aggregate_fields(None, [])
+        return file_cache.get(self.fields_path, pd.read_parquet)
+
+    def runs(self, columns=None) -> pd.DataFrame:
+        """실행 기록 전체 (세부 분석용, 조각 파일을 모두 읽으므로 화면에서는 집계를 사용)"""
+        if not os.path.isdir(self.runs_dir):
+            return runs_frame([])
+        paths = sorted(os.path.join(self.runs_dir, name) for name in os.listdir(self.runs_dir)
+                       if name.endswith(".parquet"))
+        if not paths:
+            return runs_frame([])
+        return pd.concat([pd.read_parquet(path, columns=columns) for path in paths], ignore_index=True)
+
+    def last_refreshed(self):
+        return self._load_state().get("refreshed_at")
+
+
+# ---------------------------------------------------------------------------
+# 화면용 계산 (집계 행 단위로 벡터 연산)
+# ---------------------------------------------------------------------------
+
+def filter_frame(frame: pd.DataFrame, since=None, until=None, prompt_keys=None, endpoints=None) -> pd.DataFrame:
+    """날짜 [since, until] 구간(YYYY-MM-DD)과 프롬프트/엔드포인트 조건으로 걸러냄 (None이면 조건 없음)"""
+    mask = np.ones(len(frame), dtype=bool)
+    if since:
+        mask &= (frame["day"] >= since).to_numpy()
+    if until:
+        mask &= (frame["day"] <= until).to_numpy()
+    if prompt_keys:
+        mask &= frame["prompt_key"].isin(prompt_keys).to_numpy()
+    if endpoints:
+        mask &= frame["endpoint"].isin(endpoints).to_numpy()
+    return frame[mask]
+
+
+def _percentiles(buckets: np.ndarray, quantiles) -> dict:
+    """구간별 개수 행렬(행: 그룹)에서 백분위수 추정 (해당 구간의 기하 중간값)"""
+    totals = buckets.sum(axis=1)
+    cumulative = buckets.cumsum(axis=1)
+    middles = np.sqrt(LATENCY_EDGES[:-1] * LATENCY_EDGES[1:])
+    result = {}
+    for q in quantiles:
+        index = (cumulative >= np.ceil(totals * q / 100)[:, None]).argmax(axis=1)
+        result[f"p{q:g}"] = np.where(totals > 0, middles[index], np.nan)
+    return result
+
+
+def summarize(aggregates: pd.DataFrame, by=None, quantiles=(50, 90, 99)) -> pd.DataFrame:
+    """
+    성공률과 지연 시간 백분위수
+
+    Args:
+        aggregates: HistoryAnalytics.aggregates() (또는 filter_frame으로 거른 결과)
+        by: 묶을 열 ("day", "prompt_key", "endpoint" 중 하나 또는 목록), None이면 전체 한 행
+
+    Returns:
+        pd.DataFrame: runs, ok, success_rate, mean, p50/p90/p99(초) 열
+    """
+    columns = ["runs", "ok", "latency_count", "latency_sum"] + BUCKET_COLUMNS
+    if by is None:
+        grouped = aggregates[columns].sum().to_frame().T
+    else:
+        grouped = aggregates.groupby(by)[columns].sum()
+    runs = grouped["runs"].to_numpy(dtype=float)
+    latency_count = grouped["latency_count"].to_numpy(dtype=float)
+    summary = pd.DataFrame({
+        "runs": grouped["runs"].astype(int),
+        "ok": grouped["ok"].astype(int),
+        "success_rate": np.divide(grouped["ok"].to_numpy(dtype=float), runs, out=np.full(len(grouped), np.nan),
+                                  where=runs > 0),
+        "mean": np.divide(grouped["latency_sum"].to_numpy(dtype=float), latency_count,
+                          out=np.full(len(grouped), np.nan), where=latency_count > 0),
+    }, index=grouped.index)
+    for name, values in _percentiles(grouped[BUCKET_COLUMNS].to_numpy(), quantiles).items():
+        summary[name] = values
+    return summary
+
+
+def field_distribution(fields: pd.DataFrame, field: str, limit: int = 20) -> pd.Series:
+    """응답 필드의 값별 개수 (많은 순 limit개)"""
+    selected = fields[fields["field"] == field]
+    return selected.groupby("value")["count"].sum().nlargest(limit)
+
+
+history_analytics = HistoryAnalytics(ANALYTICS_DIR)
+
+_refresher_lock = threading.Lock()
+_refresher_started = False
+
+
+def _run_refresher():
+    while True:
+        try:
+            history_analytics.refresh()
+        except Exception as e:
+            print(f"분석 저장소 갱신 중 오류 발생: {e}")
+        time.sleep(ANALYTICS_REFRESH_INTERVAL)
+
+
+def start_analytics_refresher():
+    """프로세스당 하나의 백그라운드 분석 저장소 갱신 스레드 시작"""
+    global _refresher_started
+    with _refresher_lock:
+        if _refresher_started or ANALYTICS_REFRESH_INTERVAL <= 0 or not analytics_available():
+            return
+        _refresher_started = True
+    threading.Thread(target=_run_refresher, name="analytics-refresher", daemon=True).start()
@@ -2,10 +2,156 @@ import requests
 import json
 import streamlit as st
 from typing import Dict, Any, Optional, Tuple
+import time
+from utils import http_pool, metrics
+from utils.resilience import ResilientCall
+from utils.storage import open_image_blob, response_cache, get_endpoint_policy
+from utils.response_cache import cache_key
+from utils.cassette import request_record
+from utils.image_preprocess import preprocess_image
+from utils.multipart import MultipartBody
 
 class APIHandler:
     @staticmethod
-    def handle_api_request(url: str, method: str, data: Dict[str, Any]) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    def request(method: str, url: str, **kwargs) -> requests.Response:
+        """
+        엔드포인트별 keep-alive 연결 풀을 통해 요청 전송 (연결을 매번 새로 맺지 않음)
+
+        엔드포인트에 설정된 정책(환경설정)에 따라 타임아웃, 재시도, 차단기, 헤징이 적용되며,
+        실행 정보는 응답(또는 최종 예외)의 resilience 속성에 남는다.
+
+        Args:
+            method (str): HTTP 메소드
+            url (str): 요청 URL
+            **kwargs: requests에 전달할 인자 (params, json, data, files, timeout 등)
+
+        Returns:
+            requests.Response: 응답 객체
+        """
+        files = kwargs.get("files") or {}
+        body = kwargs.get("data")
+        streamed_body = hasattr(body, "read")
+        # 파일 본문은 동시에 두 번 읽을 수 없고, 스트리밍 응답은 먼저 온 쪽을 고를 수 없으므로 헤징하지 않음
+        call = ResilientCall(method, url, get_endpoint_policy(url),
+                             hedge_allowed=not files and not streamed_body and not kwargs.get("stream"))
+
+        def send(timeout):
+            # 재시도할 때 파일을 처음부터 다시 읽도록 되감기
+            for value in files.values():
+                fileobj = value[1] if isinstance(value, tuple) else value
+                if hasattr(fileobj, "seek"):
+                    fileobj.seek(0)
+            if streamed_body:
+                body.seek(0)
+            started_at = time.perf_counter()
+            try:
+                response = http_pool.request(method, url, **{"timeout": timeout, **kwargs})
+            except Exception:
+                metrics.observe_request(http_pool.endpoint_key(url), method, "error", time.perf_counter() - started_at)
+                raise
+            metrics.observe_request(http_pool.endpoint_key(url), method, response.status_code,
+                                    time.perf_counter() - started_at, response.phases)
+            return response
+
+        return call.run(send)
+
+    @staticmethod
+    def timings(response, started_at: float) -> dict:
+        """
+        이력에 남길 시간 정보
+
+        Args:
+            response: 받은 응답 (캐시된 응답이면 단계별 시간이 없음)
+            started_at: 요청 직전의 time.perf_counter() 값
+
+        Returns:
+            dict: ttfb(헤더 수신까지), total(전체)과 단계별 시간(dns, connect, tls, wait, download), 요청/응답 크기
+        """
+        return {
+            "ttfb": response.elapsed.total_seconds(),
+            "total": time.perf_counter() - started_at,
+            **(getattr(response, "phases", None) or {}),
+        }
+
+    @staticmethod
+    def send_test_request(full_url: str, http_method: str, prompt: Optional[str], data_type: str, data: Any,
+                          use_cache: bool = False, stream: bool = False, cassette=None) -> requests.Response:
+        """
+        테스터 입력(프롬프트 + 데이터)을 API 요청으로 변환해 전송 (단일 테스트와 배치 실행 공용)
+
+        Args:
+            full_url (str): 요청 URL
+            http_method (str): HTTP 메소드 (GET 또는 POST)
+            prompt (Optional[str]): 프롬프트 (없으면 None)
+            data_type (str): 데이터 유형 ("선택안함", "이미지", "문자열", "JSON")
+            data (Any): 이미지면 {"blob", "name", "mime_type"}, 문자열이면 str, JSON이면 dict
+            use_cache (bool): 같은 요청의 캐시된 응답 사용 여부 (캐시된 응답은 from_cache가 True)
+            stream (bool): 본문을 기다리지 않고 헤더만 받은 뒤 반환 (utils.streaming.StreamReader로 읽음).
+                스트리밍 요청은 캐시를 사용하지 않는다.
+            cassette (Cassette): 녹화/재생할 카세트 (utils.cassette). 재생 중이면 네트워크로 보내지 않고
+                녹화된 응답을 돌려주며(from_cassette가 True), 없으면 CassetteMiss를 발생시킨다.
+                녹화 중이면 받은 응답을 저장한다 (스트리밍 응답은 녹화하지 않음).
+
+        Returns:
+            requests.Response: 응답 객체
+        """
+        if http_method == "POST" and data_type == "이미지":
+            # 크기 축소/EXIF 제거한 이미지(해시별로 한 번만 변환)로 바꿔 둠. 캐시와 카세트도 실제로 보낼
+            # 이미지 해시를 키로 쓰므로 변환 설정이 바뀌면 이전 업로드의 응답을 돌려주지 않는다.
+            data = preprocess_image(data)
+        if cassette is not None:
+            recorded_request = request_record(http_method, full_url, prompt, data_type, data)
+            if cassette.replaying:
+                return cassette.play(recorded_request, full_url)
+        if stream or not use_cache:
+            response = APIHandler._send_test_request(full_url, http_method, prompt, data_type, data, stream=stream)
+        else:
+            key = cache_key(http_method, full_url, prompt, data_type, data)
+            response = response_cache.get(key, full_url)
+            if response is None:
+                response = APIHandler._send_test_request(full_url, http_method, prompt, data_type, data)
+                response_cache.put(key, response)
+        if cassette is not None and cassette.recording and not stream:
+            cassette.record(recorded_request, response)
+        return response
+
+    @staticmethod
+    def _send_test_request(full_url, http_method, prompt, data_type, data, **kwargs):
+        if http_method == "POST":
+            if data_type == "이미지":
+                # 이미지(send_test_request에서 변환됨)를 메모리 매핑으로 열어 조각씩 multipart로 전송
+                image = data
+                body = MultipartBody(
+                    fields={'prompt': prompt} if prompt else {},
+                    files={'image': (image["name"], open_image_blob(image["blob"]), image["mime_type"])} if image else {},
+                )
+                headers = {**kwargs.pop("headers", {}), 'Content-Type': body.content_type}
+                try:
+                    return APIHandler.request("POST", full_url, data=body, headers=headers, **kwargs)
+                finally:
+                    # 본문(재시도 포함)은 응답을 돌려받기 전에 모두 전송됨
+                    body.close()
+            else:
+                request_data = {}
+                if prompt:
+                    request_data['prompt'] = prompt
+                if data_type == "문자열":
+                    request_data['text'] = data
+                elif data_type == "JSON":
+                    request_data.update(data or {})
+                return APIHandler.request("POST", full_url, json=request_data, **kwargs)
+        else:  # GET
+            params = {}
+            if prompt:
+                params['prompt'] = prompt
+            if data_type == "문자열":
+                params['text'] = data
+            elif data_type == "JSON":
+                params.update(data or {})
+            return APIHandler.request("GET", full_url, params=params, **kwargs)
+
+    @staticmethod
+    def handle_api_request(url: str, method: str, data: Dict[str, Any], use_cache: bool = False) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
         """
         API 요청을 처리하는 메서드
         
@@ -13,19 +159,25 @@ class APIHandler:
             url (str): API 엔드포인트 URL
             method (str): HTTP 메소드 (GET 또는 POST)
             data (Dict[str, Any]): 요청 데이터
+            use_cache (bool): 같은 요청의 캐시된 응답 사용 여부
             
         Returns:
             Tuple[Optional[Dict[str, Any]], Optional[str]]: (응답 데이터, 에러 메시지)
         """
         try:
             headers = {'Content-Type': 'application/json'}
+            key = cache_key(method, url, data_type="JSON", data=data) if use_cache else None
+            response = response_cache.get(key, url) if use_cache else None
             
-            if method == "GET":
-                response = requests.get(url, params=data, headers=headers)
-            else:  # POST
-                response = requests.post(url, json=data, headers=headers)
+            if response is None:
+                if method == "GET":
+                    response = APIHandler.request("GET", url, params=data, headers=headers)
+                else:  # POST
+                    response = APIHandler.request("POST", url, json=data, headers=headers)
             
             response.raise_for_status()  # HTTP 에러 체크
+            if use_cache:
+                response_cache.put(key, response)
             
             return response.json(), None
             
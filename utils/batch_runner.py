@@ -0,0 +1,333 @@
+import os
+import csv
+import io
+import json
+import time
+import queue
+import itertools
+import mimetypes
+import threading
+from collections import deque, Counter
+from concurrent.futures import ThreadPoolExecutor
+from utils import resilience
+from utils.api_handler import APIHandler
+from utils.http_pool import endpoint_key
+from utils.storage import save_image_blob, save_history_entries, add_history_to_prompts
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+
+
+# ---------------------------------------------------------------------------
+# 데이터셋
+# ---------------------------------------------------------------------------
+
+def load_image_folder(path: str):
+    """
+    폴더의 이미지들을 데이터셋 항목으로 변환 (이미지는 저장소에 한 번만 저장됨)
+
+    Returns:
+        list: ("이미지", {"blob", "name", "mime_type"}) 목록
+    """
+    items = []
+    for name in sorted(os.listdir(path)):
+        if not name.lower().endswith(IMAGE_EXTENSIONS):
+            continue
+        mime_type = mimetypes.guess_type(name)[0]
+        with open(os.path.join(path, name), "rb") as f:
+            digest = save_image_blob(f, name, mime_type)
+        items.append(("이미지", {"blob": digest, "name": name, "mime_type": mime_type}))
+    return items
+
+
+def parse_dataset_file(filename: str, content: bytes):
+    """
+    CSV/JSONL 파일을 데이터셋 항목으로 변환
+
+    - CSV: 열이 하나면 각 행을 문자열로, 여러 개면 각 행을 JSON 객체로 사용
+    - JSONL: 문자열 줄은 문자열로, 객체 줄은 JSON으로 사용
+
+    Returns:
+        list: (데이터 유형, 데이터) 목록
+    """
+    text = content.decode("utf-8-sig")
+    items = []
+    if filename.lower().endswith(".csv"):
+        reader = csv.DictReader(io.StringIO(text))
+        single = len(reader.fieldnames or []) == 1
+        for row in reader:
+            if single:
+                items.append(("문자열", next(iter(row.values()))))
+            else:
+                items.append(("JSON", dict(row)))
+        return items
+
+    for line in text.splitlines():
+        if not line.strip():
+            continue
+        value = json.loads(line)
+        if isinstance(value, dict):
+            items.append(("JSON", value))
+        else:
+            items.append(("문자열", value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)))
+    return items
+
+
+# ---------------------------------------------------------------------------
+# 요청 속도 제한
+# ---------------------------------------------------------------------------
+
+class RateLimiter:
+    """
+    초당 요청 수 제한 (요청 간격을 1/rate초로 고르게 맞춤, 0 이하면 제한 없음)
+
+    같은 엔드포인트를 쓰는 배치들이 각자 지정한 속도를 hold()로 등록하면 그중 가장 엄격한(낮은) 속도를 적용한다.
+    제한 없이 시작한 배치가 다른 배치의 제한을 풀지 않고, 배치가 끝나면 release()로 자기 속도를 뺀다.
+    """
+
+    def __init__(self, rate: float = 0):
+        self._lock = threading.Lock()
+        self._next = time.monotonic()
+        self._rates = Counter()  # 등록된 속도 -> 등록한 배치 수
+        self.hold(rate)
+
+    def _current_rate(self) -> float:
+        return min(self._rates) if self._rates else 0
+
+    @property
+    def rate(self) -> float:
+        with self._lock:
+            return self._current_rate()
+
+    def hold(self, rate: float):
+        if rate > 0:
+            with self._lock:
+                self._rates[rate] += 1
+
+    def release(self, rate: float):
+        if rate > 0:
+            with self._lock:
+                self._rates[rate] -= 1
+                if self._rates[rate] <= 0:
+                    del self._rates[rate]
+
+    def acquire(self):
+        with self._lock:
+            rate = self._current_rate()
+            if rate <= 0:
+                return
+            now = time.monotonic()
+            at = max(self._next, now)
+            self._next = at + 1.0 / rate
+        if at > now:
+            time.sleep(at - now)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_rate_limiter(url: str) -> RateLimiter:
+    """엔드포인트별 속도 제한기 (같은 엔드포인트로 동시에 도는 배치들이 제한을 함께 나눠 씀)"""
+    key = endpoint_key(url)
+    with _limiters_lock:
+        return _limiters.setdefault(key, RateLimiter())
+
+
+# ---------------------------------------------------------------------------
+# 배치 실행
+# ---------------------------------------------------------------------------
+
+def _to_result(response):
+    """응답을 (이력에 남길 응답, 상태)로 변환 (단일 테스트와 같은 기준: JSON이면 OK)"""
+    try:
+        return response.json(), "OK"
+    except ValueError:
+        return response.text, "FAIL"
+
+
+class BatchRun:
+    """
+    프롬프트 × 데이터셋 전체 조합을 엔드포인트에 동시에 요청하는 배치 실행
+
+    concurrency개의 작업 스레드가 조합을 하나씩 가져가 요청하고(엔드포인트별 속도 제한 적용),
+    결과는 별도 기록 스레드가 모아서 flush_size건 또는 flush_interval초마다 이력에 한 번에 저장한다.
+    Streamlit 화면과 무관하게 백그라운드에서 실행되며, progress()로 진행 상황을 확인한다.
+    """
+
+    def __init__(self, full_url, http_method, endpoint, prompts, items, concurrency=4, rate_limit=0.0,
+                 flush_size=50, flush_interval=1.0, use_cache=False, route=None, cassette=None):
+        self.full_url = full_url
+        # 엔드포인트 그룹이면 요청마다 (엔드포인트, URL)을 고르는 함수
+        self.route = route
+        self.http_method = http_method
+        self.endpoint = endpoint
+        self.total = len(prompts) * len(items)
+        self.concurrency = max(1, concurrency)
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.use_cache = use_cache
+        # 녹화/재생할 카세트 (재생 중이면 네트워크로 보내지 않으므로 속도 제한도 적용하지 않음)
+        self.cassette = cassette
+        self.rate_limit = rate_limit
+        # 요청을 보낸 엔드포인트별 속도 제한기 (그룹이면 실제로 라우팅된 엔드포인트 기준)
+        self._limiters = {}
+
+        self._jobs = itertools.product(prompts, items)
+        self._jobs_lock = threading.Lock()
+        self._results = queue.Queue()
+        self._cancel = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = None
+
+        self.done = 0
+        self.ok = 0
+        self.failed = 0
+        self.saved = 0
+        self.error = None
+        self.recent = deque(maxlen=20)
+        self.started_at = None
+        self.finished_at = None
+
+    def start(self):
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="batch-run", daemon=True)
+        self._thread.start()
+        return self
+
+    def cancel(self):
+        """남은 조합은 보내지 않고 중단 (이미 보낸 요청의 결과는 저장됨)"""
+        self._cancel.set()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def progress(self) -> dict:
+        elapsed = (self.finished_at or time.time()) - (self.started_at or time.time())
+        with self._lock:
+            return {
+                "total": self.total,
+                "done": self.done,
+                "ok": self.ok,
+                "failed": self.failed,
+                "saved": self.saved,
+                "elapsed": elapsed,
+                "rate": self.done / elapsed if elapsed > 0 else 0.0,
+                "recent": list(self.recent),
+            }
+
+    def _run(self):
+        writer = threading.Thread(target=self._write_results, name="batch-writer", daemon=True)
+        writer.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch-worker") as executor:
+                for future in [executor.submit(self._work) for _ in range(self.concurrency)]:
+                    future.result()
+        except Exception as e:
+            self.error = str(e)
+        finally:
+            for limiter in self._limiters.values():
+                limiter.release(self.rate_limit)
+            self._results.put(None)
+            writer.join()
+            self.finished_at = time.time()
+
+    def _limiter(self, url):
+        """엔드포인트의 공유 속도 제한기 (처음 쓸 때 이 배치의 속도를 등록)"""
+        key = endpoint_key(url)
+        with self._lock:
+            limiter = self._limiters.get(key)
+            if limiter is None:
+                limiter = self._limiters[key] = get_rate_limiter(url)
+                limiter.hold(self.rate_limit)
+        return limiter
+
+    def _next_job(self):
+        if self._cancel.is_set():
+            return None
+        with self._jobs_lock:
+            return next(self._jobs, None)
+
+    def _work(self):
+        while True:
+            job = self._next_job()
+            if job is None:
+                return
+            prompt, (data_type, data) = job
+            endpoint, full_url = self.route() if self.route else (self.endpoint, self.full_url)
+            if self.cassette is None or not self.cassette.replaying:
+                self._limiter(full_url).acquire()
+            started_at = time.perf_counter()
+            timings = None
+            info = None
+            try:
+                response = APIHandler.send_test_request(
+                    full_url, self.http_method, prompt["content"], data_type, data, use_cache=self.use_cache,
+                    cassette=self.cassette
+                )
+                timings = APIHandler.timings(response, started_at)
+                result, status = _to_result(response)
+                info = getattr(response, "resilience", None)
+            except Exception as e:
+                result, status = str(e), "FAIL"
+                info = getattr(e, "resilience", None)
+
+            self._results.put({
+                "prompt": prompt["content"],
+                "image_path": data["name"] if data_type == "이미지" else None,
+                "response": result,
+                "status": status,
+                "prompt_id": prompt["id"],
+                "endpoint": endpoint,
+                "image_blob": data["blob"] if data_type == "이미지" else None,
+                "timings": timings,
+                "resilience": resilience.summary(info),
+            })
+            with self._lock:
+                self.done += 1
+                if status == "OK":
+                    self.ok += 1
+                else:
+                    self.failed += 1
+                self.recent.appendleft((prompt["name"], status))
+
+    def _write_results(self):
+        batch = []
+        last_flush = time.monotonic()
+        finished = False
+        while not finished:
+            try:
+                record = self._results.get(timeout=self.flush_interval)
+                if record is None:
+                    finished = True
+                else:
+                    batch.append(record)
+            except queue.Empty:
+                pass
+            if batch and (finished or len(batch) >= self.flush_size
+                          or time.monotonic() - last_flush >= self.flush_interval):
+                self._flush(batch)
+                batch = []
+                last_flush = time.monotonic()
+
+    def _flush(self, batch):
+        """결과 묶음을 이력에 저장하고 각 프롬프트의 이력 목록에 연결"""
+        try:
+            history_ids = save_history_entries(batch)
+            links = {}
+            for record, history_id in zip(batch, history_ids):
+                links.setdefault(record["prompt_id"], []).append(history_id)
+            add_history_to_prompts(links)
+        except Exception as e:
+            self.error = f"이력 저장 중 오류 발생: {e}"
+            return
+        with self._lock:
+            self.saved += len(batch)
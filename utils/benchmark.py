@@ -0,0 +1,242 @@
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+MODE_OPEN = "open"  # 목표 RPS로 응답과 무관하게 요청을 보냄
+MODE_CLOSED = "closed"  # 고정된 동시 요청 수로, 응답을 받으면 다음 요청을 보냄
+
+PERCENTILES = (50, 90, 99, 99.9)
+
+
+class LatencyHistogram:
+    """
+    HDR 방식의 지연 시간 히스토그램
+
+    값(마이크로초)을 2^precision_bits 단위로 나눈 로그-선형 구간에 세어,
+    범위와 관계없이 상대 오차 약 1/2^(precision_bits-1) 이내로 백분위수를 구한다.
+    구간별 개수만 저장하므로 기록 수가 늘어도 메모리는 거의 늘지 않고, 다른 히스토그램과 합칠 수 있다.
+    """
+
+    def __init__(self, precision_bits: int = 7):
+        self.precision_bits = precision_bits
+        self._sub_count = 1 << precision_bits
+        self._half = self._sub_count >> 1
+        self.counts = {}
+        self.total = 0
+        self.min = None
+        self.max = None
+        self.sum = 0
+        self._lock = threading.Lock()
+
+    def _index(self, value: int) -> int:
+        if value < self._sub_count:
+            return value
+        shift = value.bit_length() - self.precision_bits
+        return self._sub_count + (shift - 1) * self._half + ((value >> shift) - self._half)
+
+    def _bounds(self, index: int):
+        """구간의 [하한, 상한) 값"""
+        if index < self._sub_count:
+            return index, index + 1
+        shift = (index - self._sub_count) // self._half + 1
+        sub = (index - self._sub_count) % self._half + self._half
+        return sub << shift, (sub + 1) << shift
+
+    def record(self, seconds: float):
+        value = max(int(seconds * 1_000_000), 0)
+        index = self._index(value)
+        with self._lock:
+            self.counts[index] = self.counts.get(index, 0) + 1
+            self.total += 1
+            self.sum += value
+            self.min = value if self.min is None else min(self.min, value)
+            self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "LatencyHistogram"):
+        with self._lock:
+            for index, count in other.counts.items():
+                self.counts[index] = self.counts.get(index, 0) + count
+            self.total += other.total
+            self.sum += other.sum
+            if other.min is not None:
+                self.min = other.min if self.min is None else min(self.min, other.min)
+                self.max = other.max if self.max is None else max(self.max, other.max)
+
+    def percentile(self, q: float) -> float:
+        """백분위수 (초), 기록이 없으면 0"""
+        with self._lock:
+            if not self.total:
+                return 0.0
+            rank = max(1, int(q / 100 * self.total + 0.5))
+            seen = 0
+            for index in sorted(self.counts):
+                seen += self.counts[index]
+                if seen >= rank:
+                    low, high = self._bounds(index)
+                    # 구간 중간값을 대표값으로 하되 실제 최댓값을 넘지 않게 함
+                    return min((low + high - 1) / 2, self.max) / 1_000_000
+            return self.max / 1_000_000
+
+    def mean(self) -> float:
+        return self.sum / self.total / 1_000_000 if self.total else 0.0
+
+    def to_dict(self) -> dict:
+        with self._lock:
+            return {
+                "precision_bits": self.precision_bits,
+                "counts": {str(index): count for index, count in self.counts.items()},
+                "total": self.total,
+                "sum": self.sum,
+                "min": self.min,
+                "max": self.max,
+            }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "LatencyHistogram":
+        histogram = cls(data.get("precision_bits", 7))
+        histogram.counts = {int(index): count for index, count in data.get("counts", {}).items()}
+        histogram.total = data.get("total", 0)
+        histogram.sum = data.get("sum", 0)
+        histogram.min = data.get("min")
+        histogram.max = data.get("max")
+        return histogram
+
+
+class Benchmark:
+    """
+    하나의 요청을 정해진 시간 동안 반복해 보내는 부하 테스트
+
+    - open 모드: 목표 RPS 간격으로 요청을 예약해 보낸다. 지연 시간은 예약된 시각부터 재므로,
+      서버가 느려져 요청이 밀린 시간도 포함된다 (coordinated omission 보정).
+    - closed 모드: concurrency개의 작업자가 응답을 받는 즉시 다음 요청을 보낸다.
+
+    send_fn()은 requests.Response를 돌려주는 함수이며, 예외나 4xx/5xx 응답은 오류로 센다.
+    """
+
+    def __init__(self, send_fn, mode: str = MODE_CLOSED, duration: float = 10, concurrency: int = 4,
+                 rate: float = 10, max_in_flight: int = 256):
+        self.send_fn = send_fn
+        self.mode = mode
+        self.duration = duration
+        self.concurrency = max(1, concurrency)
+        self.rate = rate
+        self.max_in_flight = max_in_flight
+        self.histogram = LatencyHistogram()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.requests = 0
+        self.errors = 0
+        self.dropped = 0
+        self.error_samples = []
+        self.started_at = None
+        self.finished_at = None
+
+    def start(self):
+        self.started_at = time.time()
+        self._thread = threading.Thread(target=self._run, name="benchmark", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def wait(self, timeout=None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def _run(self):
+        try:
+            if self.mode == MODE_OPEN:
+                self._run_open()
+            else:
+                self._run_closed()
+        finally:
+            self.finished_at = time.time()
+
+    def _call(self, scheduled: float):
+        error = None
+        try:
+            response = self.send_fn()
+            if response.status_code >= 400:
+                error = f"HTTP {response.status_code}"
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self.histogram.record(time.perf_counter() - scheduled)
+        with self._lock:
+            self.requests += 1
+            if error is not None:
+                self.errors += 1
+                if len(self.error_samples) < 10:
+                    self.error_samples.append(error)
+
+    def _run_closed(self):
+        deadline = time.perf_counter() + self.duration
+
+        def work():
+            while not self._stop.is_set() and time.perf_counter() < deadline:
+                self._call(time.perf_counter())
+
+        with ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="benchmark") as executor:
+            for future in [executor.submit(work) for _ in range(self.concurrency)]:
+                future.result()
+
+    def _run_open(self):
+        interval = 1.0 / self.rate
+        start = time.perf_counter()
+        deadline = start + self.duration
+        in_flight = threading.BoundedSemaphore(self.max_in_flight)
+
+        def call(scheduled):
+            try:
+                self._call(scheduled)
+            finally:
+                in_flight.release()
+
+        with ThreadPoolExecutor(max_workers=self.max_in_flight, thread_name_prefix="benchmark") as executor:
+            n = 0
+            while not self._stop.is_set():
+                scheduled = start + n * interval
+                if scheduled >= deadline:
+                    break
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                n += 1
+                # 동시에 진행 중인 요청이 한도를 넘으면 보내지 못한 요청으로 기록
+                if not in_flight.acquire(blocking=False):
+                    with self._lock:
+                        self.dropped += 1
+                    continue
+                executor.submit(call, scheduled)
+
+    def result(self) -> dict:
+        """현재까지의 결과 요약 (실행 중에도 호출 가능)"""
+        elapsed = (self.finished_at or time.time()) - (self.started_at or time.time())
+        with self._lock:
+            requests, errors, dropped = self.requests, self.errors, self.dropped
+            error_samples = list(self.error_samples)
+        return {
+            "mode": self.mode,
+            "duration": self.duration,
+            "concurrency": self.concurrency if self.mode == MODE_CLOSED else None,
+            "target_rps": self.rate if self.mode == MODE_OPEN else None,
+            "elapsed": elapsed,
+            "requests": requests,
+            "errors": errors,
+            "dropped": dropped,
+            "throughput": requests / elapsed if elapsed > 0 else 0.0,
+            "error_rate": errors / requests if requests else 0.0,
+            "latency": {
+                "mean": self.histogram.mean(),
+                "min": (self.histogram.min or 0) / 1_000_000,
+                "max": (self.histogram.max or 0) / 1_000_000,
+                **{f"p{q:g}": self.histogram.percentile(q) for q in PERCENTILES},
+            },
+            "histogram": self.histogram.to_dict(),
+            "error_samples": error_samples,
+        }
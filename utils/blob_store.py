@@ -0,0 +1,248 @@
+import os
+import mmap
+import time
+import hashlib
+import threading
+from utils import sqlite_storage
+from utils.locking import FileLock
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    name TEXT,
+    mime_type TEXT,
+    created_at REAL NOT NULL,
+    last_used_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_blobs_last_used_at ON blobs(last_used_at);
+CREATE TABLE IF NOT EXISTS refs (
+    digest TEXT NOT NULL,
+    history_id TEXT NOT NULL,
+    PRIMARY KEY (digest, history_id)
+);
+CREATE INDEX IF NOT EXISTS idx_refs_history_id ON refs(history_id);
+CREATE TABLE IF NOT EXISTS derived (
+    source TEXT NOT NULL,
+    params TEXT NOT NULL,
+    digest TEXT NOT NULL,
+    PRIMARY KEY (source, params)
+);
+CREATE INDEX IF NOT EXISTS idx_derived_digest ON derived(digest);
+"""
+
+CHUNK_SIZE = 1024 * 1024
+
+
+class BlobStore:
+    """
+    내용 해시(sha256)를 키로 파일을 저장하는 저장소
+
+    같은 내용은 한 번만 저장되고, 이력 항목이 참조를 가지며(refs),
+    참조가 없어진 지 일정 시간(gc_grace)이 지난 파일은 gc()로 정리된다.
+    """
+
+    def __init__(self, directory: str, gc_grace: float = 3600):
+        self.directory = directory
+        self.gc_grace = gc_grace
+        self._local = threading.local()
+        self._ready = False
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(self.directory, exist_ok=True)
+            conn = sqlite_storage.open_connection(os.path.join(self.directory, "blobs.db"))
+            self._local.conn = conn
+        if not self._ready:
+            conn.executescript(SCHEMA)
+            self._ready = True
+        return conn
+
+    @property
+    def lock_path(self) -> str:
+        return os.path.join(self.directory, ".lock")
+
+    def path(self, digest: str) -> str:
+        return os.path.join(self.directory, digest[:2], digest)
+
+    def exists(self, digest: str) -> bool:
+        return os.path.exists(self.path(digest))
+
+    def put(self, fileobj, name=None, mime_type=None) -> str:
+        """
+        파일 객체 내용을 스트리밍으로 해시하며 저장
+
+        이미 같은 내용이 있으면 새로 쓰지 않고 기존 파일을 사용한다.
+
+        Returns:
+            str: 내용 해시 (sha256 hex)
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = os.path.join(self.directory, f".upload.{os.getpid()}.{threading.get_ident()}.tmp")
+        digest = hashlib.sha256()
+        size = 0
+        if hasattr(fileobj, "seek"):
+            fileobj.seek(0)
+        try:
+            with open(tmp_path, "wb") as f:
+                while True:
+                    chunk = fileobj.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    f.write(chunk)
+                    size += len(chunk)
+                f.flush()
+                os.fsync(f.fileno())
+            key = digest.hexdigest()
+            target = self.path(key)
+            # gc()와 겹치지 않도록 잠금 안에서 파일 배치와 메타데이터 갱신
+            with FileLock(self.lock_path):
+                if not os.path.exists(target):
+                    os.makedirs(os.path.dirname(target), exist_ok=True)
+                    os.replace(tmp_path, target)
+                now = time.time()
+                with sqlite_storage.transaction(self._conn()) as conn:
+                    conn.execute(
+                        "INSERT INTO blobs (digest, size, name, mime_type, created_at, last_used_at) "
+                        "VALUES (?, ?, ?, ?, ?, ?) "
+                        "ON CONFLICT(digest) DO UPDATE SET last_used_at = excluded.last_used_at, "
+                        "name = COALESCE(excluded.name, blobs.name), "
+                        "mime_type = COALESCE(excluded.mime_type, blobs.mime_type)",
+                        (key, size, name, mime_type, now, now),
+                    )
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        if hasattr(fileobj, "seek"):
+            fileobj.seek(0)
+        return key
+
+    def open_mmap(self, digest: str):
+        """
+        읽기 전용 메모리 매핑으로 열기
+
+        파일 내용을 파이썬 메모리로 복사하지 않고 OS 페이지 캐시를 그대로 사용한다.
+        """
+        with open(self.path(digest), "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                return b""
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def info(self, digest: str):
+        row = self._conn().execute(
+            "SELECT digest, size, name, mime_type, created_at, last_used_at FROM blobs WHERE digest = ?", (digest,)
+        ).fetchone()
+        return self._row_to_info(row) if row else None
+
+    def recent(self, limit: int = 20):
+        """최근에 사용한 파일 목록 (변환 결과로 만들어진 파일은 제외)"""
+        rows = self._conn().execute(
+            "SELECT digest, size, name, mime_type, created_at, last_used_at FROM blobs "
+            "WHERE digest NOT IN (SELECT digest FROM derived WHERE digest != source) "
+            "ORDER BY last_used_at DESC LIMIT ?", (limit,)
+        ).fetchall()
+        return [self._row_to_info(row) for row in rows if self.exists(row[0])]
+
+    @staticmethod
+    def _row_to_info(row):
+        keys = ("digest", "size", "name", "mime_type", "created_at", "last_used_at")
+        return dict(zip(keys, row))
+
+    def add_ref(self, digest: str, history_id: str):
+        """이력 항목이 파일을 참조함을 기록"""
+        with sqlite_storage.transaction(self._conn()) as conn:
+            conn.execute("INSERT OR IGNORE INTO refs (digest, history_id) VALUES (?, ?)", (digest, history_id))
+            conn.execute("UPDATE blobs SET last_used_at = ? WHERE digest = ?", (time.time(), digest))
+
+    def add_refs(self, refs):
+        """여러 (파일 해시, 이력 ID) 참조를 한 트랜잭션으로 기록"""
+        refs = list(refs)
+        if not refs:
+            return
+        now = time.time()
+        with sqlite_storage.transaction(self._conn()) as conn:
+            conn.executemany("INSERT OR IGNORE INTO refs (digest, history_id) VALUES (?, ?)", refs)
+            conn.executemany(
+                "UPDATE blobs SET last_used_at = ? WHERE digest = ?", [(now, digest) for digest in {d for d, _ in refs}]
+            )
+
+    def get_derived(self, source: str, params: str):
+        """
+        source 파일을 params 설정으로 변환해 저장해 둔 결과의 해시 (없거나 파일이 지워졌으면 None)
+
+        조회된 결과는 사용한 것으로 기록해 gc()로 바로 정리되지 않게 한다.
+        """
+        conn = self._conn()
+        row = conn.execute("SELECT digest FROM derived WHERE source = ? AND params = ?", (source, params)).fetchone()
+        if row is None or not self.exists(row[0]):
+            return None
+        with sqlite_storage.transaction(conn):
+            conn.execute("UPDATE blobs SET last_used_at = ? WHERE digest = ?", (time.time(), row[0]))
+        return row[0]
+
+    def set_derived(self, source: str, params: str, digest: str):
+        """변환 결과 기록 (변환할 필요가 없었다면 digest가 source와 같음)"""
+        with sqlite_storage.transaction(self._conn()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO derived (source, params, digest) VALUES (?, ?, ?)", (source, params, digest)
+            )
+
+    def ref_count(self, digest: str) -> int:
+        row = self._conn().execute("SELECT COUNT(*) FROM refs WHERE digest = ?", (digest,)).fetchone()
+        return row[0]
+
+    def gc(self, existing_history_ids, batch_size: int = 500):
+        """
+        참조가 끊긴 파일 정리
+
+        1. 이미 삭제된 이력(보관 기간 만료 등)을 가리키는 참조를 지우고
+        2. 참조가 하나도 없고 gc_grace 동안 사용되지 않은 파일을 삭제한다.
+
+        Args:
+            existing_history_ids: 이력 ID 목록 -> 실제로 존재하는 ID 집합을 돌려주는 함수
+
+        Returns:
+            int: 삭제된 파일 수
+        """
+        conn = self._conn()
+        last = ""
+        while True:
+            ids = [row[0] for row in conn.execute(
+                "SELECT DISTINCT history_id FROM refs WHERE history_id > ? ORDER BY history_id LIMIT ?",
+                (last, batch_size),
+            )]
+            if not ids:
+                break
+            last = ids[-1]
+            missing = set(ids) - set(existing_history_ids(ids))
+            if missing:
+                with sqlite_storage.transaction(conn):
+                    conn.executemany("DELETE FROM refs WHERE history_id = ?", [(i,) for i in missing])
+
+        cutoff = time.time() - self.gc_grace
+        rows = conn.execute(
+            "SELECT digest FROM blobs WHERE last_used_at < ? "
+            "AND NOT EXISTS (SELECT 1 FROM refs WHERE refs.digest = blobs.digest)",
+            (cutoff,),
+        ).fetchall()
+        removed = 0
+        for (digest,) in rows:
+            with FileLock(self.lock_path), sqlite_storage.transaction(conn):
+                # 그사이 다시 참조되었거나 사용되었으면 건너뜀
+                row = conn.execute(
+                    "SELECT 1 FROM blobs WHERE digest = ? AND last_used_at < ? "
+                    "AND NOT EXISTS (SELECT 1 FROM refs WHERE refs.digest = blobs.digest)",
+                    (digest, cutoff),
+                ).fetchone()
+                if row is None:
+                    continue
+                conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+                conn.execute("DELETE FROM derived WHERE source = ? OR digest = ?", (digest, digest))
+                try:
+                    os.remove(self.path(digest))
+                    removed += 1
+                except FileNotFoundError:
+                    pass
+        return removed
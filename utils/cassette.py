@@ -0,0 +1,207 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from urllib.parse import urlsplit, parse_qsl, urlencode
+import requests
+from utils import sqlite_storage
+from utils.response_cache import _canonical, _to_response
+
+MODE_RECORD = "record"
+MODE_REPLAY = "replay"
+
+# 요청을 비교할 때 무시할 부분 (ignore_fields: "prompt", "data.request_id"처럼 점으로 구분한 경로)
+DEFAULT_RULES = {"ignore_fields": [], "ignore_query": [], "ignore_host": False}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS interactions (
+    key TEXT PRIMARY KEY,
+    request TEXT NOT NULL,
+    status_code INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    content BLOB NOT NULL,
+    elapsed REAL,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_interactions_recorded_at ON interactions(recorded_at);
+"""
+
+
+class CassetteMiss(requests.exceptions.RequestException):
+    """재생 중인 카세트에 일치하는 요청이 없음 (네트워크로 보내지 않음)"""
+
+
+def normalize_rules(rules: dict = None) -> dict:
+    rules = {**DEFAULT_RULES, **(rules or {})}
+    return {
+        "ignore_fields": sorted({f.strip() for f in rules["ignore_fields"] if f and f.strip()}),
+        "ignore_query": sorted({q.strip() for q in rules["ignore_query"] if q and q.strip()}),
+        "ignore_host": bool(rules["ignore_host"]),
+    }
+
+
+def request_record(method: str, url: str, prompt=None, data_type=None, data=None) -> dict:
+    """카세트에 저장할 요청 내용 (이미지는 파일명 대신 실제로 보낸(변환된) 이미지의 내용 해시로 비교)"""
+    if data_type == "이미지" and data:
+        data = {"sha256": data["blob"]}
+    return {"method": method.upper(), "url": url.strip(), "prompt": prompt, "data_type": data_type, "data": data}
+
+
+def _drop_field(value, path):
+    head, _, rest = path.partition(".")
+    if not isinstance(value, dict) or head not in value:
+        return
+    if rest:
+        _drop_field(value[head], rest)
+    else:
+        del value[head]
+
+
+def match_key(request: dict, rules: dict) -> str:
+    """규칙을 적용한 요청의 해시 (같은 해시면 같은 요청으로 보고 저장된 응답을 재생)"""
+    request = json.loads(_canonical(request))
+    parts = urlsplit(request["url"])
+    query = sorted((k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True) if k not in rules["ignore_query"])
+    host = "" if rules["ignore_host"] else f"{parts.scheme}://{parts.netloc}"
+    request["url"] = f"{host}{parts.path}" + (f"?{urlencode(query)}" if query else "")
+    for path in rules["ignore_fields"]:
+        _drop_field(request, path)
+    return hashlib.sha256(_canonical(request).encode("utf-8")).hexdigest()
+
+
+class Cassette:
+    """
+    요청/응답 쌍을 녹화하고 다시 재생하는 카세트 (SQLite 파일 하나)
+
+    녹화 모드에서는 실제로 보낸 요청의 응답을 요청 내용과 함께 저장하고(같은 요청은 마지막 응답으로 교체),
+    재생 모드에서는 처음 한 번 카세트 전체를 메모리 색인으로 읽은 뒤 일치하는 응답을 네트워크 없이 돌려준다.
+    일치 규칙은 재생할 때 적용하므로 같은 카세트를 다른 규칙으로 재생할 수 있다.
+    """
+
+    def __init__(self, path: str, mode: str = MODE_REPLAY, rules: dict = None):
+        self.path = path
+        self.name = os.path.splitext(os.path.basename(path))[0]
+        self.mode = mode
+        self.rules = normalize_rules(rules)
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._index = None  # 일치 키 -> (상태 코드, 헤더, 본문)
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+
+    @property
+    def replaying(self) -> bool:
+        return self.mode == MODE_REPLAY
+
+    @property
+    def recording(self) -> bool:
+        return self.mode == MODE_RECORD
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            conn = sqlite_storage.open_connection(self.path)
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _load_index(self):
+        with self._lock:
+            if self._index is not None:
+                return self._index
+        index = {}
+        rows = self._conn().execute(
+            "SELECT request, status_code, headers, content FROM interactions ORDER BY recorded_at"
+        ) if os.path.exists(self.path) else []
+        for request, status_code, headers, content in rows:
+            index[match_key(json.loads(request), self.rules)] = (status_code, json.loads(headers), bytes(content))
+        with self._lock:
+            if self._index is None:
+                self._index = index
+            return self._index
+
+    def play(self, request: dict, url: str = None) -> requests.Response:
+        """
+        녹화된 응답 재생
+
+        Raises:
+            CassetteMiss: 일치하는 요청이 녹화되어 있지 않음
+        """
+        item = self._load_index().get(match_key(request, self.rules))
+        with self._lock:
+            if item is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if item is None:
+            raise CassetteMiss(f"카세트에 일치하는 요청이 없습니다: {request['method']} {request['url']}")
+        response = _to_response(item[0], item[1], item[2], url)
+        response.from_cache = False
+        response.from_cassette = True
+        # 스트리밍으로 읽어도 저장된 본문을 나눠 돌려주도록 이미 읽은 응답으로 표시
+        response._content_consumed = True
+        return response
+
+    def record(self, request: dict, response: requests.Response):
+        """보낸 요청과 받은 응답 저장 (오류 응답도 그대로 저장해 같은 결과를 재생)"""
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in ("content-encoding", "transfer-encoding")}
+        elapsed = response.elapsed.total_seconds() if response.elapsed else None
+        key = match_key(request, normalize_rules())
+        with sqlite_storage.transaction(self._conn()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO interactions (key, request, status_code, headers, content, elapsed, recorded_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, _canonical(request), response.status_code, json.dumps(headers), response.content, elapsed,
+                 time.time()),
+            )
+        with self._lock:
+            self.recorded += 1
+            if self._index is not None:
+                self._index[match_key(request, self.rules)] = (response.status_code, headers, response.content)
+
+    def size(self) -> int:
+        """녹화된 요청 수"""
+        if not os.path.exists(self.path):
+            return 0
+        return self._conn().execute("SELECT COUNT(*) FROM interactions").fetchone()[0]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"mode": self.mode, "hits": self.hits, "misses": self.misses, "recorded": self.recorded}
+
+
+_cassettes = {}
+_cassettes_lock = threading.Lock()
+
+
+def open_cassette(directory: str, name: str, mode: str, rules: dict = None) -> Cassette:
+    """
+    이름별 카세트 (모드와 규칙이 같으면 프로세스 안에서 같은 객체를 재사용해 메모리 색인을 다시 읽지 않음)
+
+    Args:
+        directory: 카세트 파일을 둘 디렉토리
+        name: 카세트 이름 (파일명은 <name>.db)
+        mode: MODE_RECORD 또는 MODE_REPLAY
+        rules: 일치 규칙 {"ignore_fields", "ignore_query", "ignore_host"}
+    """
+    rules = normalize_rules(rules)
+    path = os.path.join(directory, f"{os.path.basename(name.strip())}.db")
+    key = (path, mode, _canonical(rules))
+    with _cassettes_lock:
+        cassette = _cassettes.get(key)
+        if cassette is None:
+            # 같은 파일을 다른 모드/규칙으로 연 객체는 버림 (녹화 후 재생하면 색인을 새로 읽음)
+            for other in [k for k in _cassettes if k[0] == path]:
+                del _cassettes[other]
+            cassette = _cassettes[key] = Cassette(path, mode, rules)
+        return cassette
+
+
+def list_cassettes(directory: str) -> list:
+    """저장된 카세트 이름 목록"""
+    if not os.path.isdir(directory):
+        return []
+    return sorted(name[:-3] for name in os.listdir(directory) if name.endswith(".db"))
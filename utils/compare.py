@@ -0,0 +1,85 @@
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from utils import resilience
+from utils.api_handler import APIHandler
+from utils.json_diff import diff
+from utils.storage import save_history_entries, add_history_to_prompts
+
+
+def compare_endpoints(endpoints, url_path, http_method, prompt, data_type, data, prompt_id=None, use_cache=False,
+                      cassette=None):
+    """
+    같은 요청을 여러 엔드포인트에 동시에 보내고 결과를 모아 비교
+
+    요청은 엔드포인트 수만큼의 스레드에서 동시에 (엔드포인트별 연결 풀로) 보내므로 전체 소요 시간은
+    가장 느린 엔드포인트의 응답 시간과 같다. 결과는 같은 group_id를 가진 이력 묶음으로 저장된다.
+
+    Args:
+        endpoints: 비교할 엔드포인트 URL 목록 (첫 번째가 비교 기준)
+        url_path: 엔드포인트 뒤에 붙일 경로
+        http_method, prompt, data_type, data: 단일 테스트와 같은 요청 내용
+        prompt_id: 저장된 프롬프트를 사용했다면 그 ID (이력 연결용)
+        use_cache: 응답 캐시 사용 여부
+        cassette: 녹화/재생할 카세트 (엔드포인트마다 URL이 다르므로 호스트를 무시하는 규칙이 아니면 따로 저장됨)
+
+    Returns:
+        dict: {"group_id", "wall_time", "results": [{"endpoint", "url", "status", "response",
+        "status_code", "timings", "diff"}, ...]}
+    """
+    group_id = str(uuid.uuid4())
+
+    def send(endpoint):
+        url = f"{endpoint.rstrip('/')}{url_path}"
+        started_at = time.perf_counter()
+        result = {"endpoint": endpoint, "url": url, "status_code": None, "timings": None, "resilience": None}
+        try:
+            response = APIHandler.send_test_request(url, http_method, prompt, data_type, data, use_cache=use_cache,
+                                                    cassette=cassette)
+            result["timings"] = APIHandler.timings(response, started_at)
+            result["status_code"] = response.status_code
+            result["resilience"] = resilience.summary(getattr(response, "resilience", None))
+            try:
+                result["response"], result["status"] = response.json(), "OK"
+            except ValueError:
+                result["response"], result["status"] = response.text, "FAIL"
+        except Exception as e:
+            result["timings"] = {"ttfb": None, "total": time.perf_counter() - started_at}
+            result["resilience"] = resilience.summary(getattr(e, "resilience", None))
+            result["response"], result["status"] = str(e), "FAIL"
+        return result
+
+    started_at = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, len(endpoints)), thread_name_prefix="compare") as executor:
+        results = list(executor.map(send, endpoints))
+    wall_time = time.perf_counter() - started_at
+
+    # 첫 번째 엔드포인트의 응답을 기준으로 구조적 차이 계산
+    baseline = results[0]["response"] if results else None
+    for result in results[1:]:
+        result["diff"] = diff(baseline, result["response"])
+    if results:
+        results[0]["diff"] = []
+
+    image = data if data_type == "이미지" and data else None
+    history_ids = save_history_entries([
+        {
+            "prompt": prompt,
+            "image_path": image["name"] if image else None,
+            "response": result["response"],
+            "status": result["status"],
+            "prompt_id": prompt_id,
+            "endpoint": result["endpoint"],
+            "image_blob": image["blob"] if image else None,
+            "timings": result["timings"],
+            "resilience": result["resilience"],
+            "group_id": group_id,
+        }
+        for result in results
+    ])
+    if prompt_id:
+        add_history_to_prompts({prompt_id: history_ids})
+    for result, history_id in zip(results, history_ids):
+        result["history_id"] = history_id
+
+    return {"group_id": group_id, "wall_time": wall_time, "results": results}
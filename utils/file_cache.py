@@ -0,0 +1,112 @@
+import os
+import threading
+from utils import profiler
+
+
+def stat_key(path):
+    """파일 변경 여부 판단용 키 (mtime, size, inode), 파일이 없으면 None"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+class FileCache:
+    """
+    파일 경로 + (mtime, size, inode) 기준으로 파싱 결과를 보관하는 프로세스 공용 캐시
+
+    파일이 실제로 바뀌기 전까지는 디스크를 다시 읽지 않고 캐시된 객체를 그대로 반환한다.
+    반환된 객체는 여러 세션이 공유하므로 호출자는 수정하지 않아야 한다.
+    """
+
+    def __init__(self):
+        self._entries = {}  # path -> (stat_key, value, offset)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path, loader):
+        """
+        캐시된 파싱 결과 반환, 파일이 바뀌었으면 loader(path)로 다시 읽음
+
+        stat을 읽기 전에 확인하므로, 읽는 도중 파일이 바뀌어도 다음 호출에서 다시 읽게 된다.
+        """
+        key = stat_key(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and key is not None and entry[0] == key:
+                self.hits += 1
+                profiler.count_read()
+                return entry[1]
+            self.misses += 1
+        profiler.count_read(key[1] if key is not None else 0)
+        value = loader(path)
+        if key is not None:
+            with self._lock:
+                self._entries[path] = (key, value, None)
+        return value
+
+    def get_appendable(self, path, parse_chunk):
+        """
+        추가만 되는 로그 파일용 캐시
+
+        같은 파일(inode)이 뒤로 늘어나기만 했다면 새로 추가된 부분만 parse_chunk(bytes)로 파싱해 이어 붙인다.
+        끝이 개행으로 끝나지 않은(기록 중인) 마지막 줄은 다음 호출로 미룬다.
+        """
+        key = stat_key(path)
+        if key is None:
+            return []
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry[0] == key:
+                self.hits += 1
+                profiler.count_read()
+                return entry[1]
+            self.misses += 1
+
+        if entry is not None and entry[2] is not None and entry[0][2] == key[2] and key[1] >= entry[2]:
+            base, offset = entry[1], entry[2]
+        else:
+            base, offset = [], 0
+
+        with open(path, "rb") as f:
+            f.seek(offset)
+            chunk = f.read(key[1] - offset)
+        end = chunk.rfind(b"\n") + 1
+        profiler.count_read(end)
+        value = base + parse_chunk(chunk[:end]) if end else base
+
+        with self._lock:
+            self._entries[path] = (key, value, offset + end)
+        return value
+
+    def put(self, path, value):
+        """방금 저장한 객체를 현재 파일 상태 기준으로 캐시 (쓰기 잠금을 잡은 상태에서 호출)"""
+        key = stat_key(path)
+        with self._lock:
+            if key is None:
+                self._entries.pop(path, None)
+            else:
+                self._entries[path] = (key, value, None)
+
+    def invalidate(self, path):
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        """캐시 적중/미스 통계"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "entries": len(self._entries),
+            }
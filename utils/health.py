@@ -0,0 +1,204 @@
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from utils import http_pool, metrics
+from utils.resilience import breaker_states, BREAKER_OPEN
+from utils.storage import load_endpoints, load_endpoint_groups
+
+# 상태 확인 주기(초, 0 이하면 사용 안 함), 확인 요청 경로와 타임아웃(초)
+HEALTH_PROBE_INTERVAL = float(os.environ.get("HEALTH_PROBE_INTERVAL", "15"))
+HEALTH_PROBE_PATH = os.environ.get("HEALTH_PROBE_PATH", "/")
+HEALTH_PROBE_TIMEOUT = float(os.environ.get("HEALTH_PROBE_TIMEOUT", "3"))
+# 가용률과 지연 시간을 계산할 최근 확인 횟수
+HEALTH_WINDOW = int(os.environ.get("HEALTH_WINDOW", "20"))
+
+STRATEGY_HEALTHIEST = "healthiest"  # 가용률이 가장 높은 엔드포인트 (같으면 더 빠른 쪽)
+STRATEGY_FASTEST = "fastest"  # 응답 중인 엔드포인트 중 지연 시간이 가장 짧은 쪽
+STRATEGIES = (STRATEGY_HEALTHIEST, STRATEGY_FASTEST)
+
+
+class EndpointHealth:
+    """엔드포인트 하나의 최근 확인 결과 (성공 여부, 지연 시간)"""
+
+    def __init__(self, window: int = HEALTH_WINDOW):
+        self._probes = deque(maxlen=window)
+        self._lock = threading.Lock()
+        self.last_checked = None
+        self.last_error = None
+        self.consecutive_failures = 0
+
+    def record(self, ok: bool, latency: float, error=None):
+        with self._lock:
+            self._probes.append((ok, latency))
+            self.last_checked = time.time()
+            self.last_error = error
+            self.consecutive_failures = 0 if ok else self.consecutive_failures + 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            probes = list(self._probes)
+            last_checked, last_error, failures = self.last_checked, self.last_error, self.consecutive_failures
+        latencies = sorted(latency for ok, latency in probes if ok)
+        return {
+            "up": bool(probes) and probes[-1][0],
+            "availability": sum(ok for ok, _ in probes) / len(probes) if probes else None,
+            "latency": latencies[len(latencies) // 2] if latencies else None,
+            "latency_p95": latencies[min(int(len(latencies) * 0.95), len(latencies) - 1)] if latencies else None,
+            "last_latency": probes[-1][1] if probes else None,
+            "probes": len(probes),
+            "consecutive_failures": failures,
+            "last_checked": last_checked,
+            "last_error": last_error,
+        }
+
+
+class HealthProber:
+    """
+    등록된 엔드포인트의 상태를 주기적으로 확인하는 백그라운드 작업 (프로세스당 하나)
+
+    HEALTH_PROBE_INTERVAL초마다 모든 엔드포인트에 동시에 GET 요청을 보내고, 연결되어 5xx가 아닌 응답이 오면
+    살아 있는 것으로 본다 (404 등은 서버가 응답하고 있다는 뜻이므로 정상). 확인 요청은 연결 풀을 쓰지만
+    재시도와 차단기는 거치지 않는다.
+    """
+
+    def __init__(self, interval: float = HEALTH_PROBE_INTERVAL, path: str = HEALTH_PROBE_PATH,
+                 timeout: float = HEALTH_PROBE_TIMEOUT):
+        self.interval = interval
+        self.path = path
+        self.timeout = timeout
+        self._health = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="health-probe")
+        self._wakeup = threading.Event()
+
+    def _get(self, endpoint: str) -> EndpointHealth:
+        with self._lock:
+            return self._health.setdefault(endpoint, EndpointHealth())
+
+    def probe(self, endpoint: str):
+        """엔드포인트 하나 확인"""
+        url = f"{endpoint.rstrip('/')}{self.path}"
+        started_at = time.perf_counter()
+        try:
+            response = http_pool.request("GET", url, timeout=(self.timeout, self.timeout))
+            response.close()
+            ok = response.status_code < 500
+            error = None if ok else f"HTTP {response.status_code}"
+        except Exception as e:
+            ok, error = False, f"{type(e).__name__}: {e}"
+        self._get(endpoint).record(ok, time.perf_counter() - started_at, error)
+
+    def probe_all(self):
+        """등록된 모든 엔드포인트를 동시에 확인하고, 삭제된 엔드포인트의 기록은 지움"""
+        endpoints = load_endpoints()
+        list(self._executor.map(self.probe, endpoints))
+        with self._lock:
+            for endpoint in set(self._health) - set(endpoints):
+                del self._health[endpoint]
+
+    def check_now(self):
+        """다음 주기를 기다리지 않고 바로 확인"""
+        self._wakeup.set()
+
+    def run(self):
+        while True:
+            try:
+                self.probe_all()
+            except Exception as e:
+                print(f"엔드포인트 상태 확인 중 오류 발생: {e}")
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+
+    def stats(self) -> dict:
+        """엔드포인트별 상태 통계"""
+        with self._lock:
+            health = list(self._health.items())
+        return {endpoint: h.stats() for endpoint, h in health}
+
+
+prober = HealthProber()
+_prober_lock = threading.Lock()
+_prober_started = False
+
+
+def start_health_prober():
+    """프로세스당 하나의 백그라운드 상태 확인 스레드 시작"""
+    global _prober_started
+    with _prober_lock:
+        if _prober_started or HEALTH_PROBE_INTERVAL <= 0:
+            return
+        _prober_started = True
+    threading.Thread(target=prober.run, name="health-prober", daemon=True).start()
+
+
+def health_stats() -> dict:
+    return prober.stats()
+
+
+metrics.register_gauge(
+    "promptbox_endpoint_up", "Whether the last health probe of the endpoint succeeded.",
+    lambda: {(endpoint,): int(s["up"]) for endpoint, s in prober.stats().items()}, ("endpoint",)
+)
+metrics.register_gauge(
+    "promptbox_endpoint_availability_ratio", "Share of successful health probes in the recent window.",
+    lambda: {(endpoint,): s["availability"] for endpoint, s in prober.stats().items()}, ("endpoint",)
+)
+metrics.register_gauge(
+    "promptbox_endpoint_probe_latency_seconds", "Median health probe latency in the recent window.",
+    lambda: {(endpoint,): s["latency"] for endpoint, s in prober.stats().items()}, ("endpoint",)
+)
+
+
+def _score(stats, strategy):
+    """작을수록 우선 (확인 기록이 없는 엔드포인트는 살아 있다고 보고 지연 시간을 모르는 것으로 취급)"""
+    up = stats is None or stats["up"]
+    latency = stats["latency"] if stats and stats["latency"] is not None else float("inf")
+    availability = stats["availability"] if stats and stats["availability"] is not None else 1.0
+    if strategy == STRATEGY_FASTEST:
+        return (not up, latency, -availability)
+    return (not up, -availability, latency)
+
+
+def choose_endpoint(endpoints, strategy: str = STRATEGY_HEALTHIEST) -> str:
+    """
+    그룹의 엔드포인트 중 요청을 보낼 하나를 선택
+
+    차단기가 열린 엔드포인트는 다른 선택지가 있으면 제외하고, 모두 죽어 있으면 그중 가장 나은 쪽을 고른다.
+
+    Args:
+        endpoints: 엔드포인트 URL 목록
+        strategy: STRATEGY_HEALTHIEST 또는 STRATEGY_FASTEST
+
+    Returns:
+        str: 선택된 엔드포인트 URL (목록이 비어 있으면 None)
+    """
+    if not endpoints:
+        return None
+    stats = prober.stats()
+    breakers = breaker_states()
+    candidates = [
+        endpoint for endpoint in endpoints
+        if breakers.get(http_pool.endpoint_key(endpoint), {}).get("state") != BREAKER_OPEN
+    ] or list(endpoints)
+    return min(candidates, key=lambda endpoint: _score(stats.get(endpoint), strategy))
+
+
+def route(group_name: str, path: str = "/"):
+    """
+    그룹에 요청할 엔드포인트와 전체 URL
+
+    Returns:
+        tuple: (엔드포인트 URL, 요청 URL), 그룹이 없거나 비어 있으면 (None, None)
+    """
+    group = load_endpoint_groups().get(group_name)
+    if not group:
+        return None, None
+    # 그룹 저장 후 삭제된 엔드포인트는 제외
+    registered = set(load_endpoints())
+    members = [endpoint for endpoint in group["endpoints"] if endpoint in registered]
+    endpoint = choose_endpoint(members, group.get("strategy", STRATEGY_HEALTHIEST))
+    if endpoint is None:
+        return None, None
+    return endpoint, f"{endpoint.rstrip('/')}{path}"
@@ -0,0 +1,182 @@
+import os
+import json
+import threading
+from utils import sqlite_storage
+
+# 스키마가 바뀌면 올려서 기존 인덱스를 버리고 로그로부터 다시 만들게 함
+SCHEMA_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS history_index (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    segment TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    timestamp TEXT,
+    prompt_id TEXT,
+    endpoint TEXT,
+    status TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_history_index_segment ON history_index(segment);
+CREATE INDEX IF NOT EXISTS idx_history_index_prompt_id ON history_index(prompt_id);
+CREATE INDEX IF NOT EXISTS idx_history_index_timestamp ON history_index(timestamp);
+CREATE INDEX IF NOT EXISTS idx_history_index_status ON history_index(status);
+CREATE INDEX IF NOT EXISTS idx_history_index_endpoint ON history_index(endpoint);
+CREATE TABLE IF NOT EXISTS index_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        return 0
+
+
+class HistoryIndex:
+    """
+    세그먼트 이력 로그에 대한 영구 보조 인덱스 (SQLite)
+
+    이력 본문은 로그에 그대로 두고, 조회 조건에 쓰이는 필드와 (세그먼트, 바이트 위치)만 저장한다.
+    인덱스는 로그로부터 만들어지므로, 조회 전에 세그먼트마다 새로 추가된 줄만 따라 읽어(sync)
+    최신 상태를 유지하고, 삭제된 세그먼트의 항목은 지운다.
+    """
+
+    def __init__(self, db_path: str, log):
+        self.db_path = db_path
+        self.log = log
+        self._local = threading.local()
+        self._sync_lock = threading.Lock()
+        self._ready = False
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite_storage.open_connection(self.db_path)
+            self._local.conn = conn
+        if not self._ready:
+            self._prepare(conn)
+            self._ready = True
+        return conn
+
+    def _prepare(self, conn):
+        """스키마 생성, 버전이 다르면 인덱스를 비우고 다시 만듦"""
+        conn.executescript("CREATE TABLE IF NOT EXISTS index_state (key TEXT PRIMARY KEY, value TEXT);")
+        if self._get_state(conn, "schema_version") != SCHEMA_VERSION:
+            conn.executescript("DROP TABLE IF EXISTS history_index; DELETE FROM index_state;")
+        conn.executescript(SCHEMA)
+        self._set_state(conn, "schema_version", SCHEMA_VERSION)
+
+    @staticmethod
+    def _get_state(conn, key):
+        row = conn.execute("SELECT value FROM index_state WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    @staticmethod
+    def _set_state(conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO index_state (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def _pending(self, positions):
+        """
+        인덱스에 반영할 세그먼트 목록
+
+        Returns:
+            Tuple[list, list]: ((세그먼트, 시작 위치) 목록, 디스크에서 사라진 세그먼트 목록)
+        """
+        pending = []
+        segments = self.log.segments()
+        for segment, compressed in segments:
+            indexed = positions.get(segment)
+            if compressed:
+                # 아카이브는 더 이상 바뀌지 않으므로 끝까지 반영되었으면 건너뜀
+                if indexed is None or not indexed.get("complete"):
+                    pending.append((segment, indexed["offset"] if indexed else 0))
+                continue
+            size = _file_size(self.log.segment_path(segment))
+            if indexed is None or indexed["offset"] != size:
+                pending.append((segment, indexed["offset"] if indexed and indexed["offset"] <= size else 0))
+        present = {segment for segment, _ in segments}
+        removed = [segment for segment in positions if segment not in present]
+        return pending, removed
+
+    def sync(self):
+        """로그에 새로 추가되거나 삭제된 세그먼트를 인덱스에 반영"""
+        conn = self._conn()
+        # 이미 최신이면 잠금 없이 바로 반환
+        pending, removed = self._pending(self._get_state(conn, "positions") or {})
+        if not pending and not removed:
+            return
+
+        with self._sync_lock, sqlite_storage.transaction(conn):
+            positions = self._get_state(conn, "positions") or {}
+            pending, removed = self._pending(positions)
+            for segment in removed:
+                conn.execute("DELETE FROM history_index WHERE segment = ?", (segment,))
+                positions.pop(segment, None)
+
+            compressed = dict(self.log.segments())
+            for segment, offset in pending:
+                if offset == 0:
+                    conn.execute("DELETE FROM history_index WHERE segment = ?", (segment,))
+                rows = []
+                for start, end, entry in self.log.iter_from(segment, offset):
+                    offset = end
+                    if entry is None or "id" not in entry:
+                        continue
+                    rows.append((
+                        entry["id"], segment, start, entry.get("timestamp"), entry.get("prompt_id"),
+                        entry.get("endpoint"), entry.get("status"),
+                    ))
+                conn.executemany(
+                    "INSERT OR IGNORE INTO history_index "
+                    "(id, segment, offset, timestamp, prompt_id, endpoint, status) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    rows,
+                )
+                positions[segment] = {"offset": offset, "complete": compressed.get(segment, False)}
+            self._set_state(conn, "positions", positions)
+
+    def _read(self, rows):
+        """(seq, segment, offset) 행 목록을 로그에서 읽어 같은 순서의 이력 목록으로 변환"""
+        by_segment = {}
+        for _, segment, offset in rows:
+            by_segment.setdefault(segment, []).append(offset)
+        entries = {
+            segment: self.log.read_at(segment, offsets)
+            for segment, offsets in by_segment.items()
+        }
+        return [
+            entries[segment][offset] for _, segment, offset in rows
+            if offset in entries[segment]
+        ]
+
+    def query(self, limit, **filters):
+        """
+        조건에 맞는 이력을 최신순으로 한 페이지 조회
+
+        Returns:
+            Tuple[list, Optional[str]]: (이력 목록, 다음 페이지 커서)
+        """
+        self.sync()
+        where, params = sqlite_storage.history_filter_sql(**filters)
+        rows = self._conn().execute(
+            f"SELECT seq, segment, offset FROM history_index {where} ORDER BY seq DESC LIMIT ?",
+            params + [limit + 1],
+        ).fetchall()
+        next_cursor = str(rows[limit - 1][0]) if len(rows) > limit else None
+        return self._read(rows[:limit]), next_cursor
+
+    def get_by_ids(self, history_ids):
+        """여러 이력을 한 번에 조회 (id -> 이력)"""
+        self.sync()
+        conn = self._conn()
+        rows = []
+        for i in range(0, len(history_ids), sqlite_storage.MAX_SQL_VARIABLES):
+            chunk = history_ids[i:i + sqlite_storage.MAX_SQL_VARIABLES]
+            placeholders = ",".join("?" * len(chunk))
+            rows.extend(conn.execute(
+                f"SELECT seq, segment, offset FROM history_index WHERE id IN ({placeholders})", chunk
+            ).fetchall())
+        return {entry["id"]: entry for entry in self._read(rows)}
@@ -0,0 +1,352 @@
+import os
+import json
+import gzip
+import time
+from datetime import datetime, timedelta
+from utils.locking import FileLock, GroupCommitter, atomic_write_json
+from utils import profiler
+
+# fsync 정책: always(매 기록마다), interval(일정 주기마다), never(OS에 맡김)
+FSYNC_ALWAYS = "always"
+FSYNC_INTERVAL = "interval"
+FSYNC_NEVER = "never"
+
+SEGMENT_PREFIX = "history-"
+SEGMENT_SUFFIX = ".jsonl"
+ARCHIVE_SUFFIX = ".jsonl.gz"
+SEGMENT_BASE = datetime(2000, 1, 1)  # 세그먼트 구간 계산 기준 시각
+SEGMENT_GRACE = timedelta(minutes=1)  # 구간이 끝난 뒤에도 늦게 도착하는 기록을 받기 위한 여유
+MIGRATION_FILE = "migrated.json"  # 변환을 마친 이전 형식 이력 파일 기록 (세그먼트 디렉토리 안)
+
+
+def parse_lines(data: bytes) -> list:
+    """여러 줄의 JSON 로그를 파싱 (손상된 줄은 건너뜀)"""
+    entries = []
+    for line in data.split(b"\n"):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            entries.append(json.loads(line))
+        except json.JSONDecodeError:
+            continue
+    return entries
+
+
+def _encode(entry: dict) -> bytes:
+    return json.dumps(entry, ensure_ascii=False).encode("utf-8") + b"\n"
+
+
+class HistoryLog:
+    """
+    한 줄에 하나의 JSON 이력을 추가만 하는(append-only) 로그
+
+    이력은 일정 시간 구간(segment_hours)마다 별도 파일(세그먼트)로 나뉘어 저장된다.
+    현재 구간의 세그먼트만 쓰기 대상이고, 지난 세그먼트는 gzip 아카이브로 압축된 뒤에도
+    같은 바이트 위치로 읽을 수 있다.
+    """
+
+    def __init__(self, directory: str, segment_hours: float = 24, fsync_policy: str = FSYNC_ALWAYS,
+                 fsync_interval: float = 1.0):
+        self.directory = directory
+        self.period = timedelta(hours=segment_hours)
+        self.fsync_policy = fsync_policy
+        self.fsync_interval = fsync_interval
+        self._last_fsync = 0.0
+        # 동시에 들어온 기록은 모아서 한 번의 쓰기/fsync로 처리 (다른 프로세스와는 잠금 파일로 배타 제어)
+        self._committer = GroupCommitter(self.lock_path, self._commit_writes)
+        self._migrated = set()  # 이 프로세스에서 변환 여부를 이미 확인한 파일
+
+    @property
+    def lock_path(self) -> str:
+        return os.path.join(self.directory, ".lock")
+
+    @property
+    def migration_path(self) -> str:
+        return os.path.join(self.directory, MIGRATION_FILE)
+
+    # -----------------------------------------------------------------------
+    # 세그먼트
+    # -----------------------------------------------------------------------
+
+    def exists(self) -> bool:
+        return os.path.isdir(self.directory)
+
+    def create(self):
+        """로그 디렉토리 생성"""
+        os.makedirs(self.directory, exist_ok=True)
+
+    def segment_start(self, timestamp: datetime) -> datetime:
+        """시각이 속한 세그먼트 구간의 시작 시각"""
+        return SEGMENT_BASE + ((timestamp - SEGMENT_BASE) // self.period) * self.period
+
+    def segment_for(self, timestamp: datetime) -> str:
+        """시각이 속한 세그먼트 이름"""
+        return f"{SEGMENT_PREFIX}{self.segment_start(timestamp):%Y%m%dT%H%M}"
+
+    def segment_end(self, segment: str) -> datetime:
+        """세그먼트 구간이 끝나는 시각"""
+        start = datetime.strptime(segment[len(SEGMENT_PREFIX):], "%Y%m%dT%H%M")
+        return start + self.period
+
+    def active_segment(self) -> str:
+        return self.segment_for(datetime.now())
+
+    def segment_path(self, segment: str) -> str:
+        """세그먼트 파일 경로 (압축되었다면 아카이브 경로)"""
+        path = os.path.join(self.directory, segment + SEGMENT_SUFFIX)
+        if os.path.exists(path):
+            return path
+        archive = os.path.join(self.directory, segment + ARCHIVE_SUFFIX)
+        return archive if os.path.exists(archive) else path
+
+    def segments(self):
+        """
+        세그먼트 목록을 오래된 순으로 반환
+
+        Returns:
+            list: (세그먼트 이름, 압축 여부) 목록
+        """
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        found = {}
+        for name in names:
+            if not name.startswith(SEGMENT_PREFIX):
+                continue
+            if name.endswith(ARCHIVE_SUFFIX):
+                found.setdefault(name[:-len(ARCHIVE_SUFFIX)], True)
+            elif name.endswith(SEGMENT_SUFFIX):
+                # 압축 도중이라 둘 다 있으면 원본을 우선
+                found[name[:-len(SEGMENT_SUFFIX)]] = False
+        return sorted(found.items())
+
+    def _open(self, segment: str):
+        path = self.segment_path(segment)
+        if path.endswith(ARCHIVE_SUFFIX):
+            return gzip.open(path, "rb")
+        return open(path, "rb")
+
+    # -----------------------------------------------------------------------
+    # 쓰기
+    # -----------------------------------------------------------------------
+
+    def _repair_tail(self, f):
+        """비정상 종료로 마지막 줄이 개행 없이 끝났다면 개행을 추가해 다음 기록과 섞이지 않게 함"""
+        f.seek(0, os.SEEK_END)
+        if f.tell() == 0:
+            return
+        f.seek(-1, os.SEEK_END)
+        if f.read(1) != b"\n":
+            f.seek(0, os.SEEK_END)
+            f.write(b"\n")
+
+    def _sync(self, f):
+        """fsync 정책에 따라 디스크에 반영"""
+        f.flush()
+        if self.fsync_policy == FSYNC_NEVER:
+            return
+        now = time.monotonic()
+        if self.fsync_policy == FSYNC_INTERVAL and now - self._last_fsync < self.fsync_interval:
+            return
+        os.fsync(f.fileno())
+        self._last_fsync = now
+
+    def _commit_writes(self, items):
+        """잠금을 잡은 상태에서 (세그먼트, 데이터) 요청들을 세그먼트별로 모아 한 번씩 기록"""
+        grouped = {}
+        for segment, data in items:
+            grouped.setdefault(segment, []).append(data)
+        for segment, chunks in grouped.items():
+            path = os.path.join(self.directory, segment + SEGMENT_SUFFIX)
+            with open(path, "a+b") as f:
+                self._repair_tail(f)
+                f.write(b"".join(chunks))
+                self._sync(f)
+        return [None] * len(items)
+
+    def _write(self, segment: str, data: bytes):
+        profiler.count_write(len(data))
+        self._committer.submit((segment, data))
+
+    def _segment_of(self, entry: dict) -> str:
+        """이력의 timestamp가 속한 세그먼트 (시각이 없으면 현재 세그먼트)"""
+        try:
+            return self.segment_for(datetime.fromisoformat(entry["timestamp"]))
+        except (KeyError, TypeError, ValueError):
+            return self.active_segment()
+
+    def append(self, entry: dict):
+        """이력 한 건을 해당 세그먼트 끝에 추가 (기존 이력 크기와 무관하게 일정한 비용)"""
+        self._write(self._segment_of(entry), _encode(entry))
+
+    def import_entries(self, entries):
+        """기존 이력을 각 이력의 시각에 해당하는 세그먼트로 나눠 한 번에 기록"""
+        grouped = {}
+        for entry in entries:
+            grouped.setdefault(self._segment_of(entry), []).append(_encode(entry))
+        for segment, lines in sorted(grouped.items()):
+            self._write(segment, b"".join(lines))
+        return sum(len(lines) for lines in grouped.values())
+
+    def migrated_files(self) -> dict:
+        """변환을 마친 이전 형식 파일 {파일명: {"entries": 이력 수, "migrated_at": 시각}}"""
+        try:
+            with open(self.migration_path, "r") as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def migrate_from_json(self, json_path: str) -> int:
+        """
+        이전 형식(JSON 배열 또는 단일 JSONL 파일)의 이력을 세그먼트로 1회 변환
+
+        원본 파일은 그대로 두고(저장소에서 추적하는 파일일 수 있음), 변환했다는 사실을
+        세그먼트 디렉토리의 migrated.json에 기록해 다시 변환하지 않는다.
+        이전 버전이 원본을 '.migrated'로 이름을 바꿔 둔 경우도 변환한 것으로 본다.
+
+        Returns:
+            int: 변환된 이력 수
+        """
+        name = os.path.basename(json_path)
+        if json_path in self._migrated:
+            return 0
+        self.create()
+        # 여러 프로세스가 동시에 시작해도 한 번만 변환 (기록용 잠금과 별도의 잠금 파일)
+        with FileLock(os.path.join(self.directory, ".migrate.lock")):
+            migrated = self.migrated_files()
+            count = 0
+            if name not in migrated and not os.path.exists(json_path + ".migrated"):
+                try:
+                    with open(json_path, "rb") as f:
+                        data = f.read()
+                except FileNotFoundError:
+                    return 0
+                try:
+                    entries = json.loads(data) if data.lstrip().startswith(b"[") else parse_lines(data)
+                except json.JSONDecodeError:
+                    entries = []
+                count = self.import_entries(entries)
+                migrated[name] = {"entries": count, "migrated_at": datetime.now().isoformat()}
+                atomic_write_json(self.migration_path, migrated)
+        self._migrated.add(json_path)
+        return count
+
+    # -----------------------------------------------------------------------
+    # 읽기
+    # -----------------------------------------------------------------------
+
+    def __iter__(self):
+        """저장된 이력을 오래된 순으로 하나씩 읽어옴 (손상된 줄은 건너뜀)"""
+        for segment, _ in self.segments():
+            for _, _, entry in self.iter_from(segment, 0):
+                if entry is not None:
+                    yield entry
+
+    def read_at(self, segment: str, offsets):
+        """
+        세그먼트에서 바이트 위치 목록에 있는 이력만 읽어옴 (위치 순으로 읽어 디스크 탐색을 줄임)
+
+        Returns:
+            dict: offset -> 이력
+        """
+        entries = {}
+        try:
+            f = self._open(segment)
+        except FileNotFoundError:
+            return entries
+        with f:
+            for offset in sorted(offsets):
+                f.seek(offset)
+                try:
+                    entries[offset] = json.loads(f.readline())
+                except json.JSONDecodeError:
+                    continue
+        return entries
+
+    def iter_from(self, segment: str, offset: int):
+        """
+        세그먼트의 offset 이후 완전한 줄들을 (줄 시작 위치, 줄 끝 위치, 이력) 형태로 읽어옴
+
+        손상되었거나 빈 줄은 이력 자리에 None을 돌려주고,
+        기록 중이라 개행으로 끝나지 않은 마지막 줄은 제외한다.
+        """
+        try:
+            f = self._open(segment)
+        except FileNotFoundError:
+            return
+        with f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                start = offset
+                offset += len(line)
+                try:
+                    entry = json.loads(line) if line.strip() else None
+                except json.JSONDecodeError:
+                    entry = None
+                yield start, offset, entry
+
+    # -----------------------------------------------------------------------
+    # 보관 정책
+    # -----------------------------------------------------------------------
+
+    def cold_segments(self, now: datetime = None):
+        """구간이 끝나 더 이상 기록되지 않는 압축 전 세그먼트 목록"""
+        now = now or datetime.now()
+        return [
+            segment for segment, compressed in self.segments()
+            if not compressed and self.segment_end(segment) + SEGMENT_GRACE <= now
+        ]
+
+    def expired_segments(self, retention_days: float, now: datetime = None):
+        """보관 기간이 지난 세그먼트 목록 (retention_days가 0 이하면 무제한 보관)"""
+        if retention_days <= 0:
+            return []
+        cutoff = (now or datetime.now()) - timedelta(days=retention_days)
+        return [segment for segment, _ in self.segments() if self.segment_end(segment) <= cutoff]
+
+    def compress(self, segment: str):
+        """
+        지난 세그먼트를 gzip 아카이브로 압축
+
+        압축 파일은 원본과 같은 내용이므로 인덱스의 바이트 위치가 그대로 유효하다.
+        압축은 잠금 없이 임시 파일에 하므로 그동안 읽기와 현재 세그먼트 쓰기는 막히지 않고,
+        교체하는 순간에만 잠금을 잡는다. 그 사이 늦은 기록이 들어왔다면 교체하지 않고 다음에 다시 시도한다.
+
+        Returns:
+            bool: 압축 완료 여부
+        """
+        source = os.path.join(self.directory, segment + SEGMENT_SUFFIX)
+        archive = os.path.join(self.directory, segment + ARCHIVE_SUFFIX)
+        tmp_path = f"{archive}.{os.getpid()}.tmp"
+        size = os.path.getsize(source)
+        with open(source, "rb") as src, open(tmp_path, "wb") as raw:
+            with gzip.GzipFile(fileobj=raw, mode="wb") as dst:
+                remaining = size
+                while remaining > 0:
+                    chunk = src.read(min(remaining, 1024 * 1024))
+                    if not chunk:
+                        break
+                    dst.write(chunk)
+                    remaining -= len(chunk)
+            raw.flush()
+            os.fsync(raw.fileno())
+
+        with FileLock(self.lock_path):
+            if not os.path.exists(source) or os.path.getsize(source) != size:
+                os.remove(tmp_path)
+                return False
+            os.replace(tmp_path, archive)
+            os.remove(source)
+        return True
+
+    def delete(self, segment: str):
+        """세그먼트 삭제 (원본과 아카이브 모두)"""
+        for suffix in (SEGMENT_SUFFIX, ARCHIVE_SUFFIX):
+            try:
+                os.remove(os.path.join(self.directory, segment + suffix))
+            except FileNotFoundError:
+                pass
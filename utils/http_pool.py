@@ -0,0 +1,300 @@
+import os
+import time
+import socket
+import threading
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import NameResolutionError, NewConnectionError
+
+# 엔드포인트(scheme://host:port)당 유지할 최대 연결 수
+HTTP_POOL_SIZE = int(os.environ.get("HTTP_POOL_SIZE", "10"))
+# keep-alive 사용 여부 (끄면 요청마다 연결을 닫음)
+HTTP_KEEPALIVE = os.environ.get("HTTP_KEEPALIVE", "true").lower() not in ("0", "false", "no")
+# 유휴 연결에 TCP keep-alive 패킷을 보내기 시작할 시간(초), 게이트웨이가 유휴 연결을 끊지 않도록
+HTTP_KEEPALIVE_IDLE = int(os.environ.get("HTTP_KEEPALIVE_IDLE", "60"))
+HTTP_CONNECT_TIMEOUT = float(os.environ.get("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_READ_TIMEOUT = float(os.environ.get("HTTP_READ_TIMEOUT", "120"))
+
+
+def endpoint_key(url: str) -> str:
+    """URL에서 연결 풀을 나누는 기준 (scheme://host:port)"""
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}".lower()
+
+
+def _socket_options():
+    options = list(HTTPConnection.default_socket_options)
+    if HTTP_KEEPALIVE:
+        options.append((socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1))
+        if hasattr(socket, "TCP_KEEPIDLE"):
+            options.append((socket.IPPROTO_TCP, socket.TCP_KEEPIDLE, HTTP_KEEPALIVE_IDLE))
+    return options
+
+
+# 현재 스레드에서 진행 중인 요청의 단계별 시간 (연결 객체가 기록)
+_phase_local = threading.local()
+
+
+class _TimedConnectionMixin:
+    """
+    새 연결을 맺을 때 DNS 조회, TCP 연결, TLS 핸드셰이크 시간을 나눠 기록하는 연결
+
+    DNS는 직접 조회해 시간을 잰 뒤 조회된 주소로 차례대로 연결을 시도한다 (실패하면 다음 주소).
+    재사용된 연결은 아무것도 기록하지 않는다.
+    """
+
+    def _new_conn(self):
+        phases = getattr(_phase_local, "phases", None)
+        if phases is None:
+            return super()._new_conn()
+        host = self._dns_host
+        started_at = time.perf_counter()
+        try:
+            addresses = list(dict.fromkeys(
+                info[4][0] for info in socket.getaddrinfo(host.strip("[]"), self.port, 0, socket.SOCK_STREAM)
+            ))
+        except socket.gaierror as e:
+            raise NameResolutionError(self.host, self, e) from e
+        resolved_at = time.perf_counter()
+        phases["dns"] = resolved_at - started_at
+        try:
+            for index, address in enumerate(addresses):
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()
+                    break
+                except NewConnectionError:
+                    if index == len(addresses) - 1:
+                        raise
+        finally:
+            self._dns_host = host
+        phases["connect"] = time.perf_counter() - resolved_at
+        return sock
+
+    def connect(self):
+        phases = getattr(_phase_local, "phases", None)
+        started_at = time.perf_counter()
+        super().connect()
+        if phases is not None and "connect" in phases:
+            elapsed = time.perf_counter() - started_at
+            phases["tls"] = max(elapsed - phases["dns"] - phases["connect"], 0.0) if self.scheme == "https" else 0.0
+
+
+class _TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    scheme = "http"
+
+
+class _TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    scheme = "https"
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _KeepAliveAdapter(HTTPAdapter):
+    """연결 소켓에 TCP keep-alive 옵션을 설정하고, 단계별 시간을 기록하는 연결을 쓰는 어댑터"""
+
+    def __init__(self, *args, **kwargs):
+        self._state_lock = threading.Lock()
+        self._in_flight = 0
+        self._retired = False
+        super().__init__(*args, **kwargs)
+
+    def send(self, *args, **kwargs):
+        with self._state_lock:
+            self._in_flight += 1
+        try:
+            return super().send(*args, **kwargs)
+        finally:
+            with self._state_lock:
+                self._in_flight -= 1
+                close = self._retired and self._in_flight == 0
+            if close:
+                self.close()
+
+    def retire(self):
+        """더 이상 새 요청을 받지 않는 어댑터의 연결을 닫음 (진행 중인 요청이 있으면 마지막 요청이 끝날 때)"""
+        with self._state_lock:
+            self._retired = True
+            close = self._in_flight == 0
+        if close:
+            self.close()
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs.setdefault("socket_options", _socket_options())
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+def _body_size(body) -> int:
+    if body is None:
+        return 0
+    if isinstance(body, str):
+        return len(body.encode("utf-8"))
+    try:
+        return len(body)
+    except TypeError:
+        # 길이를 알 수 없는 스트림 (chunked 전송)
+        return 0
+
+
+def _phases(response, phases, started_at, stream):
+    """
+    요청 한 번의 단계별 시간(초)과 크기(바이트)
+
+    - dns / connect / tls: 새 연결을 맺은 경우에만 (재사용된 연결이면 0, reused=True)
+    - wait: 요청 전송부터 응답 헤더 수신까지에서 연결 시간을 뺀 값 (요청 업로드 + 서버 처리)
+    - download: 응답 본문 수신 시간 (stream=True면 호출한 쪽이 본문을 읽으므로 None)
+    """
+    reused = "connect" not in phases
+    dns, connect, tls = phases.get("dns", 0.0), phases.get("connect", 0.0), phases.get("tls", 0.0)
+    headers_at = response.elapsed.total_seconds()
+    total = time.perf_counter() - started_at
+    request = response.request
+    request_bytes = _body_size(request.body) + sum(len(k) + len(v) + 4 for k, v in request.headers.items())
+    if stream:
+        response_bytes = None
+    else:
+        # 압축된 응답이면 전송된 바이트 기준
+        response_bytes = response.raw.tell() if hasattr(response.raw, "tell") and response.raw.tell() else len(response.content)
+    return {
+        "dns": dns,
+        "connect": connect,
+        "tls": tls,
+        "wait": max(headers_at - dns - connect - tls, 0.0),
+        "download": None if stream else max(total - headers_at, 0.0),
+        "reused": reused,
+        "request_bytes": request_bytes,
+        "response_bytes": response_bytes,
+    }
+
+
+class EndpointSession:
+    """
+    엔드포인트 하나에 대한 keep-alive 연결 풀
+
+    requests.Session을 재사용해 TCP/TLS 연결을 요청 간에 다시 쓰고,
+    urllib3 연결 풀의 카운터로 새로 연결한 횟수와 재사용률을 집계한다.
+    """
+
+    def __init__(self, key: str, pool_size: int = HTTP_POOL_SIZE):
+        self.key = key
+        self.pool_size = pool_size
+        self.session = requests.Session()
+        self._mount(pool_size)
+        if not HTTP_KEEPALIVE:
+            self.session.headers["Connection"] = "close"
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.errors = 0
+        self._retired_connections = 0
+
+    def _mount(self, pool_size):
+        adapter = _KeepAliveAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._adapter = adapter
+
+    def _pool_connections(self, adapter):
+        return sum(pool.num_connections for pool in list(adapter.poolmanager.pools._container.values()))
+
+    def resize(self, pool_size: int):
+        """
+        풀 크기를 늘림 (동시 요청 수가 풀보다 크면 연결을 매번 새로 맺게 되므로)
+
+        기존 어댑터의 연결은 진행 중인 요청이 끝나면 닫힌다.
+        """
+        with self._lock:
+            if pool_size <= self.pool_size:
+                return
+            old = self._adapter
+            self._retired_connections += self._pool_connections(old)
+            self.pool_size = pool_size
+            self._mount(pool_size)
+        old.retire()
+
+    def request(self, method: str, url: str, **kwargs):
+        """요청 전송 (응답의 phases 속성에 단계별 시간과 크기가 남음)"""
+        kwargs.setdefault("timeout", (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT))
+        phases = _phase_local.phases = {}
+        started_at = time.perf_counter()
+        try:
+            response = self.session.request(method, url, **kwargs)
+            response.phases = _phases(response, phases, started_at, kwargs.get("stream", False))
+            return response
+        except requests.exceptions.RequestException:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            _phase_local.phases = None
+            with self._lock:
+                self.requests += 1
+
+    def stats(self) -> dict:
+        connections = self._retired_connections + self._pool_connections(self._adapter)
+        requests_count = self.requests
+        reused = max(requests_count - connections, 0)
+        return {
+            "requests": requests_count,
+            "connections": connections,
+            "reused": reused,
+            "reuse_rate": reused / requests_count if requests_count else 0.0,
+            "errors": self.errors,
+            "pool_size": self.pool_size,
+        }
+
+    def close(self):
+        self.session.close()
+
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(url: str) -> EndpointSession:
+    """엔드포인트별 연결 풀 (프로세스 전체에서 공유되어 Streamlit 재실행과 세션 간에 재사용됨)"""
+    key = endpoint_key(url)
+    session = _sessions.get(key)
+    if session is None:
+        with _sessions_lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = _sessions[key] = EndpointSession(key)
+    return session
+
+
+def ensure_pool_size(url: str, pool_size: int):
+    """엔드포인트 연결 풀이 최소 pool_size개의 연결을 유지하도록 함"""
+    get_session(url).resize(pool_size)
+
+
+def request(method: str, url: str, **kwargs):
+    """
+    엔드포인트별 연결 풀을 통해 HTTP 요청 전송
+
+    timeout을 지정하지 않으면 (HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT)을 사용한다.
+
+    Returns:
+        requests.Response
+    """
+    return get_session(url).request(method, url, **kwargs)
+
+
+def pool_stats() -> dict:
+    """엔드포인트별 요청 수, 새 연결 수, 재사용률"""
+    with _sessions_lock:
+        sessions = list(_sessions.items())
+    return {key: session.stats() for key, session in sessions}
+
@@ -0,0 +1,118 @@
+import io
+import os
+import json
+import threading
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow가 없으면 이미지를 변환하지 않고 원본 그대로 전송
+    Image = None
+
+from utils.storage import blob_store
+
+# 전송 전 이미지 변환 설정
+IMAGE_PREPROCESS = os.environ.get("IMAGE_PREPROCESS", "true").lower() in ("1", "true", "yes")
+IMAGE_MAX_DIMENSION = int(os.environ.get("IMAGE_MAX_DIMENSION", "1536"))  # 긴 변 최대 픽셀 (0이면 크기 유지)
+IMAGE_QUALITY = int(os.environ.get("IMAGE_QUALITY", "85"))  # JPEG/WebP 재인코딩 품질
+IMAGE_STRIP_EXIF = os.environ.get("IMAGE_STRIP_EXIF", "true").lower() in ("1", "true", "yes")
+
+# 재인코딩할 형식 (그 밖의 형식은 원본 유지)
+_FORMATS = {"JPEG": "image/jpeg", "PNG": "image/png", "WEBP": "image/webp"}
+
+# 같은 이미지를 동시에 두 번 변환하지 않도록 해시별로 나눈 고정 개수의 잠금
+_LOCK_STRIPES = 64
+_locks = [threading.Lock() for _ in range(_LOCK_STRIPES)]
+
+
+def preprocess_available() -> bool:
+    return IMAGE_PREPROCESS and Image is not None
+
+
+def current_settings() -> dict:
+    return {"max_dimension": IMAGE_MAX_DIMENSION, "quality": IMAGE_QUALITY, "strip_exif": IMAGE_STRIP_EXIF}
+
+
+def _digest_lock(digest):
+    return _locks[hash(digest) % _LOCK_STRIPES]
+
+
+def _convert(path, settings):
+    """
+    이미지를 설정에 맞게 변환
+
+    Returns:
+        tuple: (변환된 본문, 형식) 또는 변환할 필요가 없으면 None
+    """
+    with Image.open(path) as image:
+        image_format = image.format
+        if image_format not in _FORMATS:
+            return None
+        has_exif = bool(image.info.get("exif"))
+        max_dimension = settings["max_dimension"]
+        needs_resize = max_dimension > 0 and max(image.size) > max_dimension
+        if not needs_resize and not (settings["strip_exif"] and has_exif):
+            return None
+
+        # EXIF를 지워도 사진 방향이 유지되도록 회전 정보를 먼저 픽셀에 반영
+        converted = ImageOps.exif_transpose(image) if has_exif else image.copy()
+        if needs_resize:
+            converted.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+        output = io.BytesIO()
+        options = {}
+        if image_format in ("JPEG", "WEBP"):
+            options["quality"] = settings["quality"]
+            if image_format == "JPEG":
+                options["optimize"] = True
+                if converted.mode not in ("RGB", "L"):
+                    converted = converted.convert("RGB")
+        elif image_format == "PNG":
+            options["optimize"] = True
+        if has_exif and not settings["strip_exif"]:
+            options["exif"] = image.info["exif"]
+        converted.save(output, format=image_format, **options)
+        return output.getvalue(), image_format
+
+
+def preprocess_image(image: dict, settings: dict = None) -> dict:
+    """
+    전송할 이미지를 변환 (긴 변 축소, 재인코딩, EXIF 제거)
+
+    결과는 원본 해시와 설정 기준으로 저장소에 남겨 두므로 같은 이미지는 한 번만 변환한다
+    (배치 실행에서 같은 이미지를 여러 프롬프트로 보낼 때 특히 유리).
+    변환이 꺼져 있거나 Pillow가 없거나 변환할 필요가 없으면 원본을 그대로 돌려준다.
+
+    Args:
+        image: {"blob", "name", "mime_type"}
+        settings: 변환 설정 (기본값 current_settings())
+
+    Returns:
+        dict: 전송할 이미지 {"blob", "name", "mime_type"}
+    """
+    if not image or not preprocess_available():
+        return image
+    settings = settings or current_settings()
+    params = json.dumps(settings, sort_keys=True)
+    source = image["blob"]
+
+    with _digest_lock(source):
+        digest = blob_store.get_derived(source, params)
+        if digest is None:
+            try:
+                converted = _convert(blob_store.path(source), settings)
+            except (OSError, ValueError) as e:
+                # 읽을 수 없는 이미지는 서버가 판단하도록 원본 그대로 전송
+                print(f"이미지 변환 중 오류 발생: {e}")
+                converted = None
+            original_size = os.path.getsize(blob_store.path(source))
+            # EXIF 제거가 필요 없는데 변환 결과가 더 크면 원본 사용
+            if converted is None or (len(converted[0]) >= original_size and not settings["strip_exif"]):
+                digest = source
+            else:
+                digest = blob_store.put(io.BytesIO(converted[0]), image["name"], _FORMATS[converted[1]])
+            blob_store.set_derived(source, params, digest)
+
+    if digest == source:
+        return image
+    info = blob_store.info(digest)
+    return {"blob": digest, "name": image["name"], "mime_type": (info or {}).get("mime_type") or image["mime_type"]}
@@ -0,0 +1,337 @@
+import os
+import json
+import time
+import uuid
+import socket
+import threading
+from utils import sqlite_storage, resilience
+from utils.api_handler import APIHandler
+from utils.storage import JOB_QUEUE_FILE, save_history_entry, add_history_to_prompt, get_cassette
+
+# 프로세스당 작업 스레드 수 (동시에 처리하는 요청 수)
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", "8"))
+# 다른 프로세스가 넣은 작업을 확인하는 주기(초)
+JOB_POLL_INTERVAL = float(os.environ.get("JOB_POLL_INTERVAL", "1.0"))
+# 실행 중인 작업의 생존 신호 주기(초), 이 값의 3배 동안 신호가 없으면 중단된 작업으로 봄
+JOB_HEARTBEAT = float(os.environ.get("JOB_HEARTBEAT", "5.0"))
+# 재시작 등으로 중단된 작업을 다시 실행할지 여부와 최대 시도 횟수
+JOB_RESUME_INTERRUPTED = os.environ.get("JOB_RESUME_INTERRUPTED", "true").lower() in ("1", "true", "yes")
+JOB_MAX_ATTEMPTS = int(os.environ.get("JOB_MAX_ATTEMPTS", "2"))
+# 작업 큐 DB 오류(잠김, 디스크 부족 등) 시 재시도 간격의 최대값(초)
+JOB_ERROR_BACKOFF_MAX = float(os.environ.get("JOB_ERROR_BACKOFF_MAX", "30"))
+# 끝난 작업을 보관하는 시간
+JOB_RETENTION_HOURS = float(os.environ.get("JOB_RETENTION_HOURS", "24"))
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+STATUS_CANCELLED = "cancelled"
+STATUS_INTERRUPTED = "interrupted"
+ACTIVE_STATUSES = (STATUS_QUEUED, STATUS_RUNNING)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    kind TEXT NOT NULL,
+    owner TEXT,
+    status TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    worker TEXT,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    heartbeat_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status_created_at ON jobs(status, created_at);
+CREATE INDEX IF NOT EXISTS idx_jobs_owner ON jobs(owner, created_at);
+"""
+
+_COLUMNS = ("id", "kind", "owner", "status", "payload", "result", "error", "attempts", "worker",
+            "created_at", "started_at", "heartbeat_at", "finished_at")
+
+
+def _to_job(row) -> dict:
+    job = dict(zip(_COLUMNS, row))
+    job["payload"] = json.loads(job["payload"])
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+class JobQueue:
+    """
+    여러 프로세스가 함께 쓰는 영속 작업 큐 (SQLite)
+
+    작업은 제출 즉시 저장되고, 각 프로세스의 작업 스레드가 대기 중인 작업을 하나씩 가져가(BEGIN IMMEDIATE로
+    한 곳에서만 가져가도록) 실행한 뒤 결과를 저장한다. 실행 중인 작업은 주기적으로 생존 신호를 남기며,
+    신호가 끊긴 작업(프로세스 재시작 등)은 다시 대기열에 넣거나 중단됨으로 표시한다.
+    """
+
+    def __init__(self, db_path: str, workers: int = JOB_WORKERS):
+        self.db_path = db_path
+        self.workers = max(1, workers)
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}"
+        self._handlers = {}
+        self._local = threading.local()
+        self._wakeup = threading.Event()
+        self._running = set()  # 이 프로세스에서 실행 중인 작업 ID
+        self._running_lock = threading.Lock()
+        self._started = False
+        self._start_lock = threading.Lock()
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite_storage.open_connection(self.db_path)
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def register(self, kind: str, handler):
+        """작업 종류별 실행 함수 등록 (handler(payload) -> JSON으로 저장할 수 있는 결과)"""
+        self._handlers[kind] = handler
+
+    # -----------------------------------------------------------------------
+    # 제출 / 조회
+    # -----------------------------------------------------------------------
+
+    def submit(self, kind: str, payload: dict, owner: str = None) -> str:
+        """
+        작업 제출
+
+        Args:
+            kind: 작업 종류 (register로 등록한 이름)
+            payload: 실행 함수에 넘길 인자 (JSON으로 저장됨)
+            owner: 작업을 제출한 세션 등 조회용 소유자
+
+        Returns:
+            str: 작업 ID
+        """
+        job_id = str(uuid.uuid4())
+        with sqlite_storage.transaction(self._conn()) as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, owner, status, payload, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, owner, STATUS_QUEUED, json.dumps(payload, ensure_ascii=False), time.time()),
+            )
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str):
+        row = self._conn().execute(f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return _to_job(row) if row else None
+
+    def list(self, owner: str = None, limit: int = 20) -> list:
+        """최근 작업 목록 (owner를 지정하면 그 소유자의 작업만)"""
+        if owner is None:
+            rows = self._conn().execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs ORDER BY created_at DESC LIMIT ?", (limit,)
+            )
+        else:
+            rows = self._conn().execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE owner = ? ORDER BY created_at DESC LIMIT ?",
+                (owner, limit),
+            )
+        return [_to_job(row) for row in rows]
+
+    def cancel(self, job_id: str) -> bool:
+        """대기 중인 작업 취소 (이미 실행 중이면 취소할 수 없음)"""
+        with sqlite_storage.transaction(self._conn()) as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, finished_at = ? WHERE id = ? AND status = ?",
+                (STATUS_CANCELLED, time.time(), job_id, STATUS_QUEUED),
+            )
+        return cursor.rowcount > 0
+
+    def stats(self) -> dict:
+        """상태별 작업 수"""
+        return dict(self._conn().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+
+    # -----------------------------------------------------------------------
+    # 실행
+    # -----------------------------------------------------------------------
+
+    def _claim(self):
+        """가장 오래 기다린 작업 하나를 이 프로세스가 가져감"""
+        now = time.time()
+        with sqlite_storage.transaction(self._conn()) as conn:
+            row = conn.execute(
+                f"SELECT {', '.join(_COLUMNS)} FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1",
+                (STATUS_QUEUED,),
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, started_at = ?, heartbeat_at = ? "
+                "WHERE id = ?",
+                (STATUS_RUNNING, self.worker_id, now, now, row[0]),
+            )
+        job = _to_job(row)
+        with self._running_lock:
+            self._running.add(job["id"])
+        return job
+
+    def _finish(self, job_id, status, result=None, error=None):
+        with sqlite_storage.transaction(self._conn()) as conn:
+            conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, finished_at = ? WHERE id = ? AND worker = ?",
+                (status, json.dumps(result, ensure_ascii=False) if result is not None else None, error, time.time(),
+                 job_id, self.worker_id),
+            )
+        # 결과가 저장된 뒤에야 생존 신호 대상에서 뺌 (저장에 실패한 작업이 다시 실행되지 않도록)
+        with self._running_lock:
+            self._running.discard(job_id)
+
+    def _finish_retrying(self, job_id, status, result=None, error=None):
+        """결과 저장이 성공할 때까지 재시도 (그동안 생존 신호가 유지되어 다른 작업 스레드가 다시 실행하지 않음)"""
+        delay = JOB_POLL_INTERVAL
+        while True:
+            try:
+                return self._finish(job_id, status, result, error)
+            except Exception as e:
+                print(f"작업 결과 저장 중 오류 발생 ({delay:.1f}초 후 재시도): {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, JOB_ERROR_BACKOFF_MAX)
+
+    def _work(self):
+        delay = JOB_POLL_INTERVAL
+        while True:
+            try:
+                job = self._claim()
+            except Exception as e:
+                # DB 잠김, 디스크 부족 등: 작업 스레드를 잃지 않도록 점점 늦춰 가며 다시 시도
+                print(f"작업을 가져오는 중 오류 발생 ({delay:.1f}초 후 재시도): {e}")
+                time.sleep(delay)
+                delay = min(delay * 2, JOB_ERROR_BACKOFF_MAX)
+                continue
+            delay = JOB_POLL_INTERVAL
+            if job is None:
+                self._wakeup.wait(JOB_POLL_INTERVAL)
+                self._wakeup.clear()
+                continue
+            handler = self._handlers.get(job["kind"])
+            if handler is None:
+                self._finish_retrying(job["id"], STATUS_FAILED, error=f"등록되지 않은 작업 종류입니다: {job['kind']}")
+                continue
+            try:
+                outcome = {"status": STATUS_DONE, "result": handler(job["payload"])}
+            except Exception as e:
+                outcome = {"status": STATUS_FAILED, "error": str(e)}
+            self._finish_retrying(job["id"], **outcome)
+
+    def recover(self):
+        """
+        생존 신호가 끊긴 실행 중 작업 처리
+
+        JOB_RESUME_INTERRUPTED이고 시도 횟수가 남았으면 다시 대기열에 넣고, 아니면 중단됨으로 표시한다.
+        보관 시간이 지난 끝난 작업도 함께 지운다.
+        """
+        now = time.time()
+        stale = now - JOB_HEARTBEAT * 3
+        with sqlite_storage.transaction(self._conn()) as conn:
+            if JOB_RESUME_INTERRUPTED:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, worker = NULL WHERE status = ? AND heartbeat_at < ? AND attempts < ?",
+                    (STATUS_QUEUED, STATUS_RUNNING, stale, JOB_MAX_ATTEMPTS),
+                )
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE status = ? AND heartbeat_at < ?",
+                (STATUS_INTERRUPTED, "실행 중 프로세스가 종료되어 중단되었습니다.", now, STATUS_RUNNING, stale),
+            )
+            if JOB_RETENTION_HOURS > 0:
+                conn.execute(
+                    "DELETE FROM jobs WHERE finished_at IS NOT NULL AND finished_at < ?",
+                    (now - JOB_RETENTION_HOURS * 3600,),
+                )
+
+    def _heartbeat(self):
+        while True:
+            with self._running_lock:
+                running = list(self._running)
+            try:
+                if running:
+                    with sqlite_storage.transaction(self._conn()) as conn:
+                        conn.executemany(
+                            "UPDATE jobs SET heartbeat_at = ? WHERE id = ? AND worker = ?",
+                            [(time.time(), job_id, self.worker_id) for job_id in running],
+                        )
+                self.recover()
+            except Exception as e:
+                print(f"작업 큐 상태 갱신 중 오류 발생: {e}")
+            time.sleep(JOB_HEARTBEAT)
+
+    def start(self):
+        """프로세스당 한 번 작업 스레드와 생존 신호 스레드 시작"""
+        with self._start_lock:
+            if self._started:
+                return
+            self._started = True
+        self.recover()
+        for index in range(self.workers):
+            threading.Thread(target=self._work, name=f"job-worker-{index}", daemon=True).start()
+        threading.Thread(target=self._heartbeat, name="job-heartbeat", daemon=True).start()
+
+
+# ---------------------------------------------------------------------------
+# 테스터 요청
+# ---------------------------------------------------------------------------
+
+KIND_TEST_REQUEST = "test_request"
+
+
+def run_test_request(payload: dict) -> dict:
+    """
+    테스터의 단일 요청을 실행하고 이력에 기록 (화면이 없어도 결과가 남도록 작업 스레드에서 저장)
+
+    Args:
+        payload: {"full_url", "http_method", "prompt", "data_type", "data", "use_cache", "prompt_id",
+            "endpoint", "cassette": {"name", "mode", "rules"} 또는 None}
+
+    Returns:
+        dict: {"response", "status", "status_code", "timings", "resilience", "history_id", "from_cache",
+        "from_cassette"}
+    """
+    cassette = payload.get("cassette")
+    cassette = get_cassette(cassette["name"], cassette["mode"], cassette["rules"]) if cassette else None
+    data_type, data = payload["data_type"], payload["data"]
+    started_at = time.perf_counter()
+    result = {"status_code": None, "timings": None, "from_cache": False, "from_cassette": False}
+    try:
+        response = APIHandler.send_test_request(
+            payload["full_url"], payload["http_method"], payload["prompt"], data_type, data,
+            use_cache=payload.get("use_cache", False), cassette=cassette
+        )
+        result["timings"] = APIHandler.timings(response, started_at)
+        result["status_code"] = response.status_code
+        result["resilience"] = resilience.summary(getattr(response, "resilience", None))
+        result["from_cache"] = getattr(response, "from_cache", False)
+        result["from_cassette"] = getattr(response, "from_cassette", False)
+        try:
+            result["response"], result["status"] = response.json(), "OK"
+        except ValueError:
+            result["response"], result["status"] = response.text, "FAIL"
+    except Exception as e:
+        result["resilience"] = resilience.summary(getattr(e, "resilience", None))
+        result["response"], result["status"] = str(e), "FAIL"
+
+    image = data if data_type == "이미지" and data else None
+    result["history_id"] = save_history_entry(
+        payload["prompt"], image["name"] if image else None, result["response"], result["status"],
+        prompt_id=payload.get("prompt_id"), endpoint=payload.get("endpoint"),
+        image_blob=image["blob"] if image else None, timings=result["timings"], resilience=result["resilience"]
+    )
+    if payload.get("prompt_id"):
+        add_history_to_prompt(payload["prompt_id"], result["history_id"])
+    return result
+
+
+job_queue = JobQueue(JOB_QUEUE_FILE)
+job_queue.register(KIND_TEST_REQUEST, run_test_request)
+
+
+def start_job_workers():
+    """프로세스당 하나의 작업 스레드 묶음 시작"""
+    job_queue.start()
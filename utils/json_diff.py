@@ -0,0 +1,54 @@
+ADDED = "added"  # 오른쪽에만 있음
+REMOVED = "removed"  # 왼쪽에만 있음
+CHANGED = "changed"  # 같은 위치의 값이 다름 (타입이 다른 경우 포함)
+
+
+def _join(path: str, key) -> str:
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    return f"{path}.{key}" if path else str(key)
+
+
+def diff(left, right, path: str = ""):
+    """
+    두 JSON 값의 구조적 차이
+
+    dict는 키별로, list는 같은 위치끼리 재귀적으로 비교하고, 서로 다른 말단 값만 돌려준다.
+    키 순서는 차이로 보지 않는다.
+
+    Args:
+        left: 기준 값
+        right: 비교할 값
+        path: 차이 위치 앞에 붙일 경로
+
+    Returns:
+        list: {"path", "kind"(added/removed/changed), "left", "right"} 목록 (같으면 빈 목록)
+    """
+    if isinstance(left, dict) and isinstance(right, dict):
+        changes = []
+        for key in left:
+            if key not in right:
+                changes.append({"path": _join(path, key), "kind": REMOVED, "left": left[key], "right": None})
+            else:
+                changes.extend(diff(left[key], right[key], _join(path, key)))
+        for key in right:
+            if key not in left:
+                changes.append({"path": _join(path, key), "kind": ADDED, "left": None, "right": right[key]})
+        return changes
+
+    if isinstance(left, list) and isinstance(right, list):
+        changes = []
+        for index in range(max(len(left), len(right))):
+            if index >= len(right):
+                changes.append({"path": _join(path, index), "kind": REMOVED, "left": left[index], "right": None})
+            elif index >= len(left):
+                changes.append({"path": _join(path, index), "kind": ADDED, "left": None, "right": right[index]})
+            else:
+                changes.extend(diff(left[index], right[index], _join(path, index)))
+        return changes
+
+    # bool은 int의 하위 타입이므로 True와 1은 다른 값으로 봄
+    if type(left) is not type(right) or left != right:
+        return [{"path": path or "$", "kind": CHANGED, "left": left, "right": right}]
+    return []
+
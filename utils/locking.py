@@ -0,0 +1,129 @@
+import os
+import json
+import threading
+from utils import profiler
+
+try:
+    import fcntl
+except ImportError:  # Windows 등 fcntl이 없는 환경에서는 프로세스 내 잠금만 사용
+    fcntl = None
+
+
+class FileLock:
+    """
+    잠금 파일을 이용한 프로세스 간 권고(advisory) 잠금
+
+    같은 프로세스의 스레드끼리는 threading.Lock으로, 다른 프로세스와는 flock으로 배타 제어한다.
+    """
+
+    _thread_locks = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, lock_path: str):
+        self.lock_path = lock_path
+        with FileLock._registry_lock:
+            self._thread_lock = FileLock._thread_locks.setdefault(lock_path, threading.Lock())
+        self._fd = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            if fcntl is not None:
+                self._fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+        except Exception:
+            self._thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+                os.close(self._fd)
+                self._fd = None
+        finally:
+            self._thread_lock.release()
+        return False
+
+
+def atomic_write_json(path: str, data, indent=4):
+    """
+    임시 파일에 쓴 뒤 rename으로 교체하여, 쓰는 도중 중단되어도 기존 파일이 손상되지 않게 함
+    """
+    directory = os.path.dirname(path) or "."
+    tmp_path = os.path.join(directory, f".{os.path.basename(path)}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+        profiler.count_write(os.path.getsize(path))
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+class _Request:
+    __slots__ = ("item", "result", "error", "done")
+
+    def __init__(self, item):
+        self.item = item
+        self.result = None
+        self.error = None
+        self.done = False
+
+
+class GroupCommitter:
+    """
+    그룹 커밋: 동시에 들어온 쓰기 요청을 모아 한 번의 잠금/쓰기/fsync로 처리
+
+    먼저 도착한 스레드가 리더가 되어, 그동안 쌓인 요청 전체를 commit_fn(items)로 한 번에 반영한다.
+    commit_fn은 요청 순서대로 결과 목록을 돌려주며, 예외 객체인 결과는 해당 요청자에게 다시 발생시킨다.
+    """
+
+    def __init__(self, lock_path: str, commit_fn):
+        self.lock = FileLock(lock_path)
+        self.commit_fn = commit_fn
+        self._cond = threading.Condition()
+        self._queue = []
+        self._leader_active = False
+
+    def submit(self, item):
+        request = _Request(item)
+        with self._cond:
+            self._queue.append(request)
+            while not request.done and self._leader_active:
+                self._cond.wait()
+            if request.done:
+                return self._result(request)
+            # 리더가 되어 쌓인 요청을 한 번에 처리
+            self._leader_active = True
+            batch, self._queue = self._queue, []
+
+        try:
+            with self.lock:
+                results = self.commit_fn([r.item for r in batch])
+            for r, result in zip(batch, results):
+                if isinstance(result, Exception):
+                    r.error = result
+                else:
+                    r.result = result
+        except Exception as e:
+            for r in batch:
+                r.error = e
+        finally:
+            with self._cond:
+                for r in batch:
+                    r.done = True
+                self._leader_active = False
+                self._cond.notify_all()
+        return self._result(request)
+
+    @staticmethod
+    def _result(request):
+        if request.error is not None:
+            raise request.error
+        return request.result
@@ -0,0 +1,223 @@
+import os
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# Prometheus 수집용 HTTP 포트 (0이면 사용 안 함), Streamlit과 같은 프로세스에서 별도 스레드로 응답
+METRICS_PORT = int(os.environ.get("METRICS_PORT", "9464"))
+METRICS_HOST = os.environ.get("METRICS_HOST", "0.0.0.0")
+
+# 지연 시간 히스토그램 구간(초)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+PHASES = ("dns", "connect", "tls", "wait", "download")
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """단조 증가 카운터"""
+
+    def __init__(self, name: str, documentation: str, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, value: float = 1):
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0) + value
+
+    def expose(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} counter"
+        with self._lock:
+            values = list(self._values.items())
+        for label_values, value in values:
+            yield f"{self.name}{_format_labels(self.labels, label_values)} {_format_value(value)}"
+
+
+class Histogram:
+    """구간별 누적 개수, 합계, 전체 개수를 내보내는 히스토그램"""
+
+    def __init__(self, name: str, documentation: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labels = tuple(labels)
+        self.buckets = tuple(buckets) + (float("inf"),)
+        self._values = {}  # 레이블 값 -> [구간별 개수..., 합계, 전체 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        with self._lock:
+            state = self._values.setdefault(label_values, [0] * len(self.buckets) + [0.0, 0])
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+                    break
+            state[-2] += value
+            state[-1] += 1
+
+    def expose(self):
+        yield f"# HELP {self.name} {self.documentation}"
+        yield f"# TYPE {self.name} histogram"
+        with self._lock:
+            values = [(label_values, list(state)) for label_values, state in self._values.items()]
+        for label_values, state in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                labels = _format_labels(self.labels, label_values, f'le="{_format_value(bound)}"')
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labels, label_values)
+            yield f"{self.name}_sum{labels} {_format_value(state[-2])}"
+            yield f"{self.name}_count{labels} {state[-1]}"
+
+
+http_requests = Counter(
+    "promptbox_http_requests_total", "API requests sent by the app (per attempt).", ("endpoint", "method", "status")
+)
+http_duration = Histogram(
+    "promptbox_http_request_duration_seconds", "Total time of an API request attempt.", ("endpoint", "method")
+)
+http_phase_duration = Histogram(
+    "promptbox_http_phase_duration_seconds", "Time spent in each phase of an API request.", ("endpoint", "phase")
+)
+http_request_bytes = Counter("promptbox_http_request_bytes_total", "Bytes sent in API requests.", ("endpoint",))
+http_response_bytes = Counter("promptbox_http_response_bytes_total", "Bytes received in API responses.", ("endpoint",))
+http_new_connections = Counter(
+    "promptbox_http_new_connections_total", "API requests that had to open a new connection.", ("endpoint",)
+)
+
+_metrics = [http_requests, http_duration, http_phase_duration, http_request_bytes, http_response_bytes,
+            http_new_connections]
+# 수집 시점에 값을 계산해 게이지로 내보내는 함수들 (이름 -> (설명, 함수: {레이블 튜플: 값}, 레이블 이름))
+_collectors = {}
+
+
+def register(metric):
+    """다른 모듈에서 정의한 Counter/Histogram을 /metrics에 추가"""
+    _metrics.append(metric)
+    return metric
+
+
+def register_gauge(name: str, documentation: str, collect_fn, labels=()):
+    """수집할 때마다 collect_fn()의 결과를 게이지로 내보냄"""
+    _collectors[name] = (documentation, collect_fn, tuple(labels))
+
+
+def observe_request(endpoint: str, method: str, status, total: float, phases=None):
+    """
+    API 요청 한 번(시도 단위)의 결과 기록
+
+    Args:
+        endpoint: 엔드포인트 (scheme://host:port)
+        method: HTTP 메소드
+        status: 상태 코드, 예외로 끝났으면 "error"
+        total: 전체 소요 시간(초)
+        phases: 응답의 단계별 시간과 크기 (http_pool이 붙인 response.phases)
+    """
+    http_requests.inc(endpoint, method, str(status))
+    http_duration.observe(total, endpoint, method)
+    if not phases:
+        return
+    if not phases["reused"]:
+        http_new_connections.inc(endpoint)
+    for phase in PHASES:
+        if phases.get(phase) is not None and (phase not in ("dns", "connect", "tls") or not phases["reused"]):
+            http_phase_duration.observe(phases[phase], endpoint, phase)
+    http_request_bytes.inc(endpoint, value=phases["request_bytes"])
+    if phases.get("response_bytes") is not None:
+        http_response_bytes.inc(endpoint, value=phases["response_bytes"])
+
+
+def format_timings(timings: dict) -> str:
+    """이력/화면에 표시할 시간 요약 (단계별 시간이 있으면 함께 표시)"""
+    parts = []
+    if timings.get("ttfb") is not None:
+        parts.append(f"첫 바이트 {timings['ttfb'] * 1000:.0f} ms")
+    parts.append(f"전체 {timings['total'] * 1000:.0f} ms")
+    if "wait" in timings:
+        if timings.get("reused"):
+            parts.append("연결 재사용")
+        else:
+            parts.append(f"DNS {timings['dns'] * 1000:.0f} · 연결 {timings['connect'] * 1000:.0f} · "
+                         f"TLS {timings['tls'] * 1000:.0f} ms")
+        parts.append(f"대기 {timings['wait'] * 1000:.0f} ms")
+        if timings.get("download") is not None:
+            parts.append(f"다운로드 {timings['download'] * 1000:.0f} ms")
+        parts.append(f"보냄 {timings['request_bytes'] / 1024:.1f} KB")
+        if timings.get("response_bytes") is not None:
+            parts.append(f"받음 {timings['response_bytes'] / 1024:.1f} KB")
+    return " · ".join(parts)
+
+
+def render() -> str:
+    """Prometheus text exposition 형식 (version 0.0.4)"""
+    lines = []
+    for metric in _metrics:
+        lines.extend(metric.expose())
+    for name, (documentation, collect_fn, labels) in list(_collectors.items()):
+        try:
+            values = collect_fn()
+        except Exception as e:
+            print(f"메트릭 수집 중 오류 발생 ({name}): {e}")
+            continue
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} gauge")
+        for label_values, value in values.items():
+            if value is not None:
+                lines.append(f"{name}{_format_labels(labels, label_values)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+_server = None
+_server_lock = threading.Lock()
+_server_started = False
+
+
+def start_metrics_server(port: int = METRICS_PORT, host: str = METRICS_HOST):
+    """프로세스당 하나의 /metrics HTTP 서버 시작 (포트가 사용 중이면 건너뜀)"""
+    global _server, _server_started
+    with _server_lock:
+        if _server_started or port <= 0:
+            return _server
+        _server_started = True
+        try:
+            _server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        except OSError as e:
+            print(f"메트릭 서버를 시작할 수 없습니다 ({host}:{port}): {e}")
+            return None
+        _server.daemon_threads = True
+    threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
@@ -0,0 +1,111 @@
+import os
+import uuid
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _quote(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\r", " ").replace("\n", " ")
+
+
+class MultipartBody:
+    """
+    multipart/form-data 본문을 디스크의 파일에서 조금씩 읽어 보내는 스트림
+
+    requests의 files= 인자는 본문 전체를 메모리에 만든 뒤 전송하지만, 이 객체를 data=로 넘기면
+    길이(Content-Length)는 미리 계산하고 파일 내용은 CHUNK_SIZE씩 읽으며 보낸다.
+    파일 대신 메모리 매핑(mmap) 같은 버퍼를 넘기면 파이썬 메모리로 전체를 복사하지 않고 조각씩 잘라 보낸다.
+    seek(0)으로 처음부터 다시 읽을 수 있어 재시도에도 사용할 수 있다.
+    """
+
+    def __init__(self, fields=None, files=None, boundary: str = None):
+        """
+        Args:
+            fields: 일반 폼 필드 {이름: 값}
+            files: 파일 필드 {이름: (파일명, 파일 경로 또는 버퍼, MIME 타입)}
+            boundary: 파트 구분자 (지정하지 않으면 임의 생성)
+        """
+        self.boundary = boundary or uuid.uuid4().hex
+        self._parts = []  # bytes 또는 (파일 경로/버퍼, 크기)
+        for name, value in (fields or {}).items():
+            self._parts.append(
+                f'--{self.boundary}\r\nContent-Disposition: form-data; name="{_quote(name)}"\r\n\r\n'.encode("utf-8")
+                + str(value).encode("utf-8") + b"\r\n"
+            )
+        for name, (filename, source, mime_type) in (files or {}).items():
+            self._parts.append(
+                f'--{self.boundary}\r\nContent-Disposition: form-data; name="{_quote(name)}"; '
+                f'filename="{_quote(filename)}"\r\n'
+                f'Content-Type: {mime_type or "application/octet-stream"}\r\n\r\n'.encode("utf-8")
+            )
+            self._parts.append((source, os.path.getsize(source) if isinstance(source, str) else len(source)))
+            self._parts.append(b"\r\n")
+        self._parts.append(f"--{self.boundary}--\r\n".encode("utf-8"))
+        self._length = sum(len(p) if isinstance(p, bytes) else p[1] for p in self._parts)
+        self._position = 0
+        self._chunks = None
+        self._pending = b""  # 요청한 크기보다 큰 조각에서 남은 부분
+
+    @property
+    def content_type(self) -> str:
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self):
+        return self._length
+
+    def _generate(self):
+        for part in self._parts:
+            if isinstance(part, bytes):
+                yield part
+                continue
+            source, size = part
+            if not isinstance(source, str):
+                for start in range(0, size, CHUNK_SIZE):
+                    yield source[start:start + CHUNK_SIZE]
+                continue
+            with open(source, "rb") as f:
+                while True:
+                    chunk = f.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    yield chunk
+
+    def __iter__(self):
+        self.seek(0)
+        for chunk in self._generate():
+            self._position += len(chunk)
+            yield chunk
+
+    def read(self, size: int = -1) -> bytes:
+        """최대 size바이트 읽기 (파일 조각 경계에서 더 적게 돌려줄 수 있음, 끝이면 b"")"""
+        if self._chunks is None:
+            self._chunks = self._generate()
+        # 지난 읽기에서 남은 부분을 먼저 돌려줌
+        buffer, self._pending = self._pending, b""
+        while size < 0 or not buffer:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                break
+            buffer += chunk
+        if size >= 0 and len(buffer) > size:
+            buffer, self._pending = buffer[:size], buffer[size:]
+        self._position += len(buffer)
+        return buffer
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        """처음으로 되감기(seek(0))만 지원"""
+        if offset != 0 or whence != 0:
+            raise ValueError("MultipartBody는 처음으로 되감기만 지원합니다.")
+        self._chunks = None
+        self._pending = b""
+        self._position = 0
+        return 0
+
+    def close(self):
+        """파일 대신 넘긴 버퍼(메모리 매핑 등)를 닫음"""
+        for part in self._parts:
+            if isinstance(part, tuple) and hasattr(part[0], "close"):
+                part[0].close()
@@ -0,0 +1,194 @@
+import os
+import time
+import functools
+import threading
+from contextlib import contextmanager
+from utils import metrics
+
+# 모든 rerun을 측정할지 여부 (꺼져 있어도 페이지 URL에 ?debug=1을 붙이면 해당 세션만 측정)
+PROFILE_RERUNS = os.environ.get("PROFILE_RERUNS", "false").lower() in ("1", "true", "yes")
+# 구간이 rerun 전체 시간에서 이 비율 이상을 차지하면 느린 구간으로 표시
+SLOW_SECTION_RATIO = float(os.environ.get("PROFILE_SLOW_SECTION_RATIO", "0.3"))
+
+COUNTERS = ("reads", "writes", "bytes_parsed", "bytes_written")
+
+rerun_duration = metrics.register(metrics.Histogram(
+    "promptbox_rerun_duration_seconds", "Time of a profiled Streamlit page rerun.", ("page",)
+))
+
+_local = threading.local()
+# 프로세스 전체의 페이지별 누적 (어느 페이지가 CPU를 많이 쓰는지 비교용)
+_page_totals = {}
+_page_totals_lock = threading.Lock()
+
+
+class RerunProfile:
+    """
+    Streamlit 스크립트 한 번 실행(rerun)의 측정 결과
+
+    구간(section)별로 호출 횟수, 포함 시간(하위 구간 포함), 자체 시간과 저장소 읽기/쓰기 횟수,
+    파싱/기록한 바이트 수를 모은다. 저장소 카운터는 실행 중인 가장 안쪽 구간에 더해진다.
+    """
+
+    def __init__(self, page: str):
+        self.page = page
+        self.started_at = time.time()
+        self._start = time.perf_counter()
+        self.total = None
+        self.sections = {}
+        self.totals = dict.fromkeys(COUNTERS, 0)
+        self._stack = []  # [구간 이름, 시작 시각, 하위 구간 시간]
+
+    def _section(self, name):
+        return self.sections.setdefault(name, {"calls": 0, "time": 0.0, "self_time": 0.0, **dict.fromkeys(COUNTERS, 0)})
+
+    @contextmanager
+    def section(self, name: str):
+        frame = [name, time.perf_counter(), 0.0]
+        self._stack.append(frame)
+        try:
+            yield
+        finally:
+            self._stack.pop()
+            elapsed = time.perf_counter() - frame[1]
+            stats = self._section(name)
+            stats["calls"] += 1
+            # 재귀 호출은 바깥 호출에서 한 번만 포함 시간으로 셈
+            if not any(f[0] == name for f in self._stack):
+                stats["time"] += elapsed
+            stats["self_time"] += elapsed - frame[2]
+            if self._stack:
+                self._stack[-1][2] += elapsed
+
+    def count(self, counter: str, value: int = 1):
+        self.totals[counter] += value
+        if self._stack:
+            self._section(self._stack[-1][0])[counter] += value
+
+    def finish(self):
+        self.total = time.perf_counter() - self._start
+        return self
+
+    def slow_sections(self):
+        """전체 시간의 SLOW_SECTION_RATIO 이상을 자체 시간으로 쓴 구간 (느린 순)"""
+        if not self.total:
+            return []
+        slow = [name for name, s in self.sections.items() if s["self_time"] >= self.total * SLOW_SECTION_RATIO]
+        return sorted(slow, key=lambda name: self.sections[name]["self_time"], reverse=True)
+
+    def to_dict(self) -> dict:
+        return {
+            "page": self.page,
+            "started_at": self.started_at,
+            "total": self.total,
+            **self.totals,
+            "slow_sections": self.slow_sections(),
+            "sections": self.sections,
+        }
+
+
+def current():
+    """현재 스레드에서 측정 중인 rerun (측정 중이 아니면 None)"""
+    return getattr(_local, "profile", None)
+
+
+@contextmanager
+def rerun(page: str, enabled: bool = True):
+    """
+    페이지 스크립트 실행 전체를 측정
+
+    st.rerun()/st.stop() 등으로 중간에 끝나도 측정 결과는 기록된다.
+
+    Yields:
+        RerunProfile: 측정 결과 (enabled가 False면 None)
+    """
+    if not enabled:
+        yield None
+        return
+    profile = _local.profile = RerunProfile(page)
+    try:
+        with profile.section("(page)"):
+            yield profile
+    finally:
+        _local.profile = None
+        profile.finish()
+        rerun_duration.observe(profile.total, page)
+        with _page_totals_lock:
+            totals = _page_totals.setdefault(page, {"reruns": 0, "time": 0.0, "max": 0.0, **dict.fromkeys(COUNTERS, 0)})
+            totals["reruns"] += 1
+            totals["time"] += profile.total
+            totals["max"] = max(totals["max"], profile.total)
+            for counter in COUNTERS:
+                totals[counter] += profile.totals[counter]
+
+
+@contextmanager
+def section(name: str):
+    """측정 중이면 구간으로 기록 (아니면 아무것도 하지 않음)"""
+    profile = current()
+    if profile is None:
+        yield
+        return
+    with profile.section(name):
+        yield
+
+
+def count_read(bytes_parsed: int = 0):
+    """저장소 읽기 1회 (파일을 실제로 다시 파싱했다면 그 바이트 수)"""
+    profile = current()
+    if profile is not None:
+        profile.count("reads")
+        if bytes_parsed:
+            profile.count("bytes_parsed", bytes_parsed)
+
+
+def count_write(bytes_written: int = 0):
+    """저장소 쓰기 1회"""
+    profile = current()
+    if profile is not None:
+        profile.count("writes")
+        if bytes_written:
+            profile.count("bytes_written", bytes_written)
+
+
+def sql_trace(statement: str):
+    """SQLite 커넥션의 trace 콜백 (SELECT는 읽기, 변경 문장은 쓰기로 셈)"""
+    if current() is None:
+        return
+    keyword = statement.lstrip()[:6].upper()
+    if keyword == "SELECT" or keyword.startswith("WITH"):
+        count_read()
+    elif keyword in ("INSERT", "UPDATE", "DELETE", "REPLAC"):
+        count_write()
+
+
+def profiled(cls):
+    """
+    페이지 클래스의 __init__과 render*/handle* 메서드를 구간으로 측정하도록 감싸는 클래스 데코레이터
+
+    측정 중이 아닐 때는 현재 rerun 여부만 확인하고 원래 메서드를 그대로 호출한다.
+    """
+    for name, method in list(vars(cls).items()):
+        if isinstance(method, (staticmethod, classmethod)) or not callable(method):
+            continue
+        if not (name == "__init__" or name.startswith(("render", "handle"))):
+            continue
+
+        def wrap(method, label):
+            @functools.wraps(method)
+            def wrapper(*args, **kwargs):
+                profile = current()
+                if profile is None:
+                    return method(*args, **kwargs)
+                with profile.section(label):
+                    return method(*args, **kwargs)
+            return wrapper
+
+        setattr(cls, name, wrap(method, f"{cls.__name__}.{name}"))
+    return cls
+
+
+def page_totals() -> dict:
+    """프로세스 시작 후 페이지별 측정된 rerun 누적"""
+    with _page_totals_lock:
+        return {page: dict(totals) for page, totals in _page_totals.items()}
@@ -0,0 +1,158 @@
+import io
+import re
+import threading
+from collections import OrderedDict
+import pandas as pd
+from utils.storage import prompt_content_hash
+
+# {{ 변수 }} 형식 (변수 이름은 영문/숫자/밑줄/한글, 숫자로 시작할 수 없음)
+VARIABLE_PATTERN = re.compile(r"\{\{\s*([A-Za-z_가-힣][A-Za-z0-9_가-힣]*)\s*\}\}")
+# 컴파일한 템플릿을 보관하는 최대 개수
+TEMPLATE_CACHE_SIZE = 256
+
+
+class TemplateError(ValueError):
+    """템플릿 변수와 데이터셋이 맞지 않음 (요청을 보내기 전에 발생)"""
+
+
+class PromptTemplate:
+    """
+    {{ 변수 }}를 포함한 프롬프트를 고정 문자열과 변수 조각으로 나눠 둔 컴파일 결과
+
+    render_frame은 행마다 문자열을 조립하지 않고 열 단위 문자열 연결로 DataFrame 전체를 한 번에 채운다.
+    """
+
+    def __init__(self, content: str):
+        self.content = content
+        self.literals = []  # 변수 사이의 고정 문자열 (항상 변수 수 + 1개)
+        self.fields = []  # 등장 순서대로의 변수 이름 (중복 포함)
+        position = 0
+        for match in VARIABLE_PATTERN.finditer(content):
+            self.literals.append(content[position:match.start()])
+            self.fields.append(match.group(1))
+            position = match.end()
+        self.literals.append(content[position:])
+
+    @property
+    def variables(self) -> list:
+        """사용하는 변수 이름 (처음 등장한 순서, 중복 제거)"""
+        return list(dict.fromkeys(self.fields))
+
+    @property
+    def is_template(self) -> bool:
+        return bool(self.fields)
+
+    def render(self, values: dict) -> str:
+        missing = [name for name in self.variables if values.get(name) is None]
+        if missing:
+            raise TemplateError(f"값이 없는 변수가 있습니다: {', '.join(missing)}")
+        parts = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            parts.append(str(values[field]))
+            parts.append(literal)
+        return "".join(parts)
+
+    def validate(self, frame: pd.DataFrame):
+        """
+        데이터셋에 변수 열이 모두 있고 비어 있는 값이 없는지 확인
+
+        Raises:
+            TemplateError: 없는 열이나 빈 값이 있는 행 (처음 몇 행 번호를 함께 알려줌)
+        """
+        missing = [name for name in self.variables if name not in frame.columns]
+        if missing:
+            raise TemplateError(
+                f"데이터셋에 없는 변수가 있습니다: {', '.join(missing)} (열: {', '.join(map(str, frame.columns))})"
+            )
+        if not self.variables:
+            return
+        empty = frame[self.variables].isna()
+        rows = empty.any(axis=1)
+        if rows.any():
+            counts = {name: int(count) for name, count in empty.sum().items() if count}
+            sample = ", ".join(str(index) for index in frame.index[rows][:5])
+            raise TemplateError(
+                f"값이 비어 있는 행이 {int(rows.sum())}개 있습니다 (행 {sample} ...): "
+                + ", ".join(f"{name} {count}개" for name, count in counts.items())
+            )
+
+    def render_frame(self, frame: pd.DataFrame) -> pd.Series:
+        """
+        DataFrame의 모든 행에 대해 템플릿을 채운 프롬프트
+
+        Returns:
+            pd.Series: 행 순서대로 완성된 프롬프트 (frame과 같은 index)
+        """
+        self.validate(frame)
+        if not self.fields:
+            return pd.Series(self.content, index=frame.index, dtype=object)
+        columns = {name: frame[name].astype(str).to_numpy(dtype=object) for name in self.variables}
+        rendered = self.literals[0] + columns[self.fields[0]]
+        for field, literal in zip(self.fields[1:], self.literals[1:-1]):
+            rendered = rendered + literal + columns[field]
+        if self.literals[-1]:
+            rendered = rendered + self.literals[-1]
+        return pd.Series(rendered, index=frame.index, dtype=object)
+
+
+_cache = OrderedDict()  # 내용 해시 -> PromptTemplate
+_cache_lock = threading.Lock()
+
+
+def compile_template(content: str) -> PromptTemplate:
+    """프롬프트를 컴파일 (같은 내용은 내용 해시 기준으로 한 번만 컴파일)"""
+    key = prompt_content_hash(content)
+    with _cache_lock:
+        template = _cache.get(key)
+        if template is not None:
+            _cache.move_to_end(key)
+            return template
+    template = PromptTemplate(content)
+    with _cache_lock:
+        _cache[key] = template
+        while len(_cache) > TEMPLATE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return template
+
+
+def expand_prompts(prompts: list, frame: pd.DataFrame) -> list:
+    """
+    저장된 프롬프트(템플릿) 각각을 데이터셋 모든 행으로 채워 배치 실행용 프롬프트 목록 생성
+
+    모든 템플릿을 먼저 검증하므로 하나라도 맞지 않으면 아무것도 만들지 않는다.
+
+    Returns:
+        list: [{"id": 템플릿 프롬프트 ID, "name": "이름 #행", "content": 완성된 프롬프트}, ...]
+    """
+    templates = [(prompt, compile_template(prompt["content"])) for prompt in prompts]
+    for prompt, template in templates:
+        try:
+            template.validate(frame)
+        except TemplateError as e:
+            raise TemplateError(f"{prompt['name']}: {e}")
+    expanded = []
+    for prompt, template in templates:
+        rendered = template.render_frame(frame)
+        expanded.extend(
+            {"id": prompt["id"], "name": f"{prompt['name']} #{index}", "content": content}
+            for index, content in zip(rendered.index, rendered.to_numpy())
+        )
+    return expanded
+
+
+def load_frame(filename: str, content: bytes) -> pd.DataFrame:
+    """
+    변수 데이터셋 읽기 (CSV 또는 Parquet, 열 이름이 변수 이름)
+
+    CSV는 모든 값을 문자열로 읽어 숫자 앞의 0 등이 바뀌지 않게 한다.
+    Parquet은 pyarrow 또는 fastparquet이 설치되어 있어야 한다.
+    """
+    lower = filename.lower()
+    if lower.endswith(".csv"):
+        return pd.read_csv(io.BytesIO(content), dtype=str, keep_default_na=False, na_values=[""])
+    if lower.endswith(".parquet"):
+        try:
+            return pd.read_parquet(io.BytesIO(content))
+        except ImportError as e:
+            raise ValueError(f"Parquet 파일을 읽으려면 pyarrow가 필요합니다: {e}")
+    raise ValueError("CSV 또는 Parquet 파일만 지원합니다.")
@@ -0,0 +1,263 @@
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+import requests
+from utils.http_pool import endpoint_key, HTTP_CONNECT_TIMEOUT, HTTP_READ_TIMEOUT
+
+# 엔드포인트별 정책 기본값 (환경설정 페이지에서 엔드포인트마다 바꿀 수 있음)
+DEFAULT_POLICY = {
+    "connect_timeout": HTTP_CONNECT_TIMEOUT,  # 연결 타임아웃(초)
+    "read_timeout": HTTP_READ_TIMEOUT,  # 응답 대기 타임아웃(초)
+    "max_retries": 2,  # 최대 재시도 횟수 (0이면 재시도 안 함)
+    "backoff_base": 0.5,  # 첫 재시도 전 대기 시간(초), 재시도마다 2배
+    "backoff_max": 8.0,  # 재시도 대기 시간 상한(초)
+    "retry_post": False,  # POST(비멱등) 요청도 재시도할지 여부
+    "breaker_threshold": 5,  # 연속 실패가 이 횟수에 이르면 차단(open)
+    "breaker_reset": 30.0,  # 차단 후 시험 요청을 허용하기까지의 시간(초)
+    "hedge": False,  # 응답이 늦으면 같은 요청을 한 번 더 보내 먼저 온 응답 사용
+    "hedge_percentile": 95,  # 최근 지연 시간의 이 백분위수만큼 기다린 뒤 두 번째 요청
+}
+
+IDEMPOTENT_METHODS = ("GET", "HEAD", "OPTIONS", "PUT", "DELETE")
+RETRY_STATUS_CODES = (429, 502, 503, 504)
+HEDGE_MIN_SAMPLES = 20
+
+BREAKER_CLOSED = "closed"
+BREAKER_OPEN = "open"
+BREAKER_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """차단기가 열려 있어 요청을 보내지 않고 바로 실패"""
+
+
+def normalize_policy(policy=None) -> dict:
+    """저장된 정책에 빠진 항목을 기본값으로 채움"""
+    return {**DEFAULT_POLICY, **{k: v for k, v in (policy or {}).items() if k in DEFAULT_POLICY}}
+
+
+class CircuitBreaker:
+    """
+    연속 실패가 threshold에 이르면 reset_after초 동안 요청을 바로 실패시키는 차단기
+
+    시간이 지나면 half_open 상태에서 시험 요청 하나만 보내고, 성공하면 닫고 실패하면 다시 연다.
+    """
+
+    def __init__(self):
+        self.state = BREAKER_CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self, reset_after: float) -> bool:
+        with self._lock:
+            if self.state == BREAKER_CLOSED:
+                return True
+            if self.state == BREAKER_OPEN and time.monotonic() - self.opened_at >= reset_after:
+                self.state = BREAKER_HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == BREAKER_HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.state = BREAKER_CLOSED
+            self.failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self, threshold: int):
+        with self._lock:
+            self.failures += 1
+            if self.state == BREAKER_HALF_OPEN or (threshold > 0 and self.failures >= threshold):
+                self.state = BREAKER_OPEN
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def reset(self):
+        self.record_success()
+
+
+class LatencyWindow:
+    """최근 성공 응답 지연 시간 (헤징 대기 시간 계산용)"""
+
+    def __init__(self, size: int = 200):
+        self._samples = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, seconds: float):
+        with self._lock:
+            self._samples.append(seconds)
+
+    def percentile(self, q: float):
+        with self._lock:
+            samples = sorted(self._samples)
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(int(q / 100 * len(samples)), len(samples) - 1)]
+
+
+_breakers = {}
+_latencies = {}
+_registry_lock = threading.Lock()
+# 헤징으로 보낸 요청을 실행하는 공용 스레드 풀
+_hedge_executor = ThreadPoolExecutor(max_workers=32, thread_name_prefix="hedge")
+
+
+def get_breaker(url: str) -> CircuitBreaker:
+    key = endpoint_key(url)
+    with _registry_lock:
+        return _breakers.setdefault(key, CircuitBreaker())
+
+
+def _latency_window(url: str) -> LatencyWindow:
+    key = endpoint_key(url)
+    with _registry_lock:
+        return _latencies.setdefault(key, LatencyWindow())
+
+
+def breaker_states() -> dict:
+    """엔드포인트별 차단기 상태와 연속 실패 횟수"""
+    with _registry_lock:
+        breakers = list(_breakers.items())
+    return {key: {"state": b.state, "failures": b.failures} for key, b in breakers}
+
+
+def backoff_delay(attempt: int, base: float, cap: float) -> float:
+    """지수 백오프 + full jitter: 0 ~ min(cap, base * 2^attempt) 사이 임의의 시간"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def _retryable_error(error, method: str, policy: dict) -> bool:
+    if isinstance(error, CircuitOpenError):
+        return False
+    # 연결 자체가 안 된 경우는 요청이 서버에 도달하지 않았으므로 POST도 안전하게 재시도
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if method.upper() not in IDEMPOTENT_METHODS and not policy["retry_post"]:
+        return False
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+def _retryable_response(response, method: str, policy: dict) -> bool:
+    if response.status_code not in RETRY_STATUS_CODES:
+        return False
+    return method.upper() in IDEMPOTENT_METHODS or policy["retry_post"]
+
+
+class ResilientCall:
+    """
+    정책에 따라 타임아웃, 재시도(지터 포함 지수 백오프), 차단기, 헤징을 적용해 요청 하나를 실행
+
+    send_fn(timeout)은 매 시도마다 호출되어 requests.Response를 돌려준다.
+    실행 정보(시도 횟수, 재시도 횟수, 헤징 여부, 차단기 상태)는 info에 남고,
+    응답에는 response.resilience로, 최종 예외에는 error.resilience로 붙는다.
+    """
+
+    def __init__(self, method: str, url: str, policy=None, hedge_allowed: bool = True):
+        self.method = method.upper()
+        self.url = url
+        self.policy = normalize_policy(policy)
+        self.hedge_allowed = hedge_allowed
+        self.breaker = get_breaker(url)
+        self.latencies = _latency_window(url)
+        self.info = {"attempts": 0, "retries": 0, "hedged": False, "breaker": self.breaker.state, "errors": []}
+
+    @property
+    def timeout(self):
+        return (self.policy["connect_timeout"], self.policy["read_timeout"])
+
+    def _attempt(self, send_fn):
+        """한 번 시도 (헤징 조건이면 늦을 때 두 번째 요청을 보내 먼저 끝난 쪽을 사용)"""
+        if not self.breaker.allow(self.policy["breaker_reset"]):
+            raise CircuitOpenError(f"차단기가 열려 있어 요청을 보내지 않았습니다: {endpoint_key(self.url)}")
+
+        hedge_delay = None
+        if self.policy["hedge"] and self.hedge_allowed and (
+            self.method in IDEMPOTENT_METHODS or self.policy["retry_post"]
+        ):
+            hedge_delay = self.latencies.percentile(self.policy["hedge_percentile"])
+
+        started_at = time.perf_counter()
+        if hedge_delay is None:
+            response = send_fn(self.timeout)
+        else:
+            response = self._hedged(send_fn, hedge_delay)
+        self.latencies.record(time.perf_counter() - started_at)
+        return response
+
+    def _hedged(self, send_fn, delay):
+        first = _hedge_executor.submit(send_fn, self.timeout)
+        done, _ = wait([first], timeout=delay)
+        if done:
+            return first.result()
+
+        self.info["hedged"] = True
+        second = _hedge_executor.submit(send_fn, self.timeout)
+        pending = {first, second}
+        error = None
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    response = future.result()
+                except Exception as e:
+                    error = e
+                    continue
+                # 늦게 끝나는 쪽의 응답은 연결을 풀로 돌려보냄
+                for other in pending:
+                    other.add_done_callback(lambda f: f.exception() is None and f.result().close())
+                return response
+        raise error
+
+    def run(self, send_fn):
+        attempt = 0
+        while True:
+            self.info["attempts"] += 1
+            try:
+                response = self._attempt(send_fn)
+            except Exception as e:
+                self.info["errors"].append(f"{type(e).__name__}: {e}")
+                if not isinstance(e, CircuitOpenError):
+                    self.breaker.record_failure(self.policy["breaker_threshold"])
+                if attempt < self.policy["max_retries"] and _retryable_error(e, self.method, self.policy):
+                    attempt = self._wait_before_retry(attempt)
+                    continue
+                self.info["breaker"] = self.breaker.state
+                e.resilience = self.info
+                raise
+
+            if response.status_code >= 500 or response.status_code == 429:
+                self.breaker.record_failure(self.policy["breaker_threshold"])
+                if attempt < self.policy["max_retries"] and _retryable_response(response, self.method, self.policy):
+                    self.info["errors"].append(f"HTTP {response.status_code}")
+                    response.close()
+                    attempt = self._wait_before_retry(attempt)
+                    continue
+            else:
+                self.breaker.record_success()
+            self.info["breaker"] = self.breaker.state
+            response.resilience = self.info
+            return response
+
+    def _wait_before_retry(self, attempt):
+        time.sleep(backoff_delay(attempt, self.policy["backoff_base"], self.policy["backoff_max"]))
+        self.info["retries"] += 1
+        return attempt + 1
+
+
+def summary(info) -> dict:
+    """이력에 남길 실행 정보 (오류 메시지는 최근 3개까지)"""
+    if not info:
+        return None
+    return {
+        "attempts": info["attempts"],
+        "retries": info["retries"],
+        "hedged": info["hedged"],
+        "breaker": info["breaker"],
+        "errors": info["errors"][-3:],
+    }
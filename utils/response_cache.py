@@ -0,0 +1,213 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+import requests
+from requests.structures import CaseInsensitiveDict
+from utils import sqlite_storage
+
+# 기본 사용 여부 (화면에서 세션별로 끄고 켤 수 있음)
+RESPONSE_CACHE_ENABLED = os.environ.get("RESPONSE_CACHE_ENABLED", "false").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "3600"))
+# 메모리 계층: 최대 항목 수와 최대 크기(바이트)
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "256"))
+RESPONSE_CACHE_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+# 디스크 계층 최대 크기(바이트), 재시작 후에도 유지됨
+RESPONSE_CACHE_DISK_MAX_BYTES = int(os.environ.get("RESPONSE_CACHE_DISK_MAX_BYTES", str(512 * 1024 * 1024)))
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    expires_at REAL NOT NULL,
+    last_used_at REAL NOT NULL,
+    size INTEGER NOT NULL,
+    status_code INTEGER NOT NULL,
+    headers TEXT NOT NULL,
+    content BLOB NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_responses_last_used_at ON responses(last_used_at);
+"""
+
+
+def _canonical(value):
+    """dict 키 순서나 공백과 무관하게 같은 값이면 같은 문자열이 되도록 직렬화"""
+    return json.dumps(value, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def cache_key(method: str, url: str, prompt=None, data_type=None, data=None) -> str:
+    """
+    요청의 정규화된 해시 (URL, 메소드, 프롬프트, 데이터)
+
+    이미지는 내용 해시(sha256)로 비교하므로 파일명이 달라도 같은 이미지면 같은 키가 된다.
+    전송 전 변환을 거친 이미지는 변환 결과의 해시가 들어오므로 변환 설정이 다르면 키도 다르다.
+    """
+    if data_type == "이미지" and data:
+        data = {"sha256": data["blob"]}
+    return hashlib.sha256(_canonical({
+        "method": method.upper(),
+        "url": url.strip(),
+        "prompt": prompt,
+        "data_type": data_type,
+        "data": data,
+    }).encode("utf-8")).hexdigest()
+
+
+def _to_response(status_code, headers, content, url=None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status_code
+    response.headers = CaseInsensitiveDict(headers)
+    response._content = content
+    response.encoding = requests.utils.get_encoding_from_headers(response.headers)
+    response.url = url
+    response.from_cache = True
+    return response
+
+
+class ResponseCache:
+    """
+    같은 요청의 응답을 재사용하는 2단계 캐시
+
+    메모리 계층은 항목 수와 바이트 크기로 제한되는 LRU이고, 디스크 계층(SQLite)은 재시작 후에도 유지되며
+    크기를 넘으면 가장 오래 사용하지 않은 응답부터 지운다. 두 계층 모두 TTL이 지나면 무효다.
+    성공(2xx) 응답만 저장한다.
+    """
+
+    def __init__(self, db_path: str, ttl: float = RESPONSE_CACHE_TTL, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES,
+                 max_bytes: int = RESPONSE_CACHE_MAX_BYTES, disk_max_bytes: int = RESPONSE_CACHE_DISK_MAX_BYTES):
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.disk_max_bytes = disk_max_bytes
+        self._memory = OrderedDict()  # key -> (만료 시각, 상태 코드, 헤더, 본문)
+        self._memory_bytes = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._ready = False
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            os.makedirs(os.path.dirname(self.db_path) or ".", exist_ok=True)
+            conn = sqlite_storage.open_connection(self.db_path)
+            self._local.conn = conn
+        if not self._ready:
+            conn.executescript(SCHEMA)
+            self._ready = True
+        return conn
+
+    # -----------------------------------------------------------------------
+    # 메모리 계층
+    # -----------------------------------------------------------------------
+
+    def _remember(self, key, item):
+        """메모리 계층에 추가하고 한도를 넘으면 가장 오래 사용하지 않은 항목부터 제거 (잠금 안에서 호출)"""
+        size = len(item[3])
+        if size > self.max_bytes:
+            return
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= len(old[3])
+        self._memory[key] = item
+        self._memory_bytes += size
+        while len(self._memory) > self.max_entries or self._memory_bytes > self.max_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted[3])
+
+    # -----------------------------------------------------------------------
+    # 조회 / 저장
+    # -----------------------------------------------------------------------
+
+    def get(self, key: str, url: str = None):
+        """
+        캐시된 응답 조회
+
+        Returns:
+            requests.Response | None: 캐시된 응답 (from_cache 속성이 True), 없거나 만료되었으면 None
+        """
+        now = time.time()
+        with self._lock:
+            item = self._memory.get(key)
+            if item is not None:
+                if item[0] > now:
+                    self._memory.move_to_end(key)
+                    self.memory_hits += 1
+                    return _to_response(item[1], item[2], item[3], url)
+                del self._memory[key]
+                self._memory_bytes -= len(item[3])
+
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT expires_at, status_code, headers, content FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or row[0] <= now:
+            with self._lock:
+                self.misses += 1
+            return None
+        item = (row[0], row[1], json.loads(row[2]), bytes(row[3]))
+        with sqlite_storage.transaction(conn):
+            conn.execute("UPDATE responses SET last_used_at = ? WHERE key = ?", (now, key))
+        with self._lock:
+            self.disk_hits += 1
+            self._remember(key, item)
+        return _to_response(item[1], item[2], item[3], url)
+
+    def put(self, key: str, response: requests.Response):
+        """성공 응답을 두 계층에 저장"""
+        if not 200 <= response.status_code < 300 or getattr(response, "from_cache", False):
+            return
+        now = time.time()
+        headers = {k: v for k, v in response.headers.items() if k.lower() not in ("content-encoding", "transfer-encoding")}
+        item = (now + self.ttl, response.status_code, headers, response.content)
+        with self._lock:
+            self._remember(key, item)
+
+        with sqlite_storage.transaction(self._conn()) as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (key, expires_at, last_used_at, size, status_code, headers, content) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, item[0], now, len(item[3]), item[1], json.dumps(headers), item[3]),
+            )
+            self._prune_disk(conn, now)
+
+    def _prune_disk(self, conn, now):
+        """만료된 응답을 지우고, 크기 한도를 넘으면 가장 오래 사용하지 않은 응답부터 삭제"""
+        conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total <= self.disk_max_bytes:
+            return
+        excess = total - self.disk_max_bytes
+        removed = []
+        for key, size in conn.execute("SELECT key, size FROM responses ORDER BY last_used_at"):
+            removed.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM responses WHERE key = ?", removed)
+
+    def clear(self):
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        with sqlite_storage.transaction(self._conn()) as conn:
+            conn.execute("DELETE FROM responses")
+
+    def stats(self) -> dict:
+        """캐시 적중/미스 통계 (이 프로세스 기준)"""
+        with self._lock:
+            hits = self.memory_hits + self.disk_hits
+            total = hits + self.misses
+            return {
+                "hits": hits,
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "hit_rate": hits / total if total else 0.0,
+                "memory_entries": len(self._memory),
+                "memory_bytes": self._memory_bytes,
+            }
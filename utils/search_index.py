@@ -0,0 +1,282 @@
+import re
+import json
+import hashlib
+import threading
+from utils import sqlite_storage
+
+KIND_PROMPT = "prompt"
+KIND_HISTORY = "history"
+
+# 문서 하나에서 색인할 최대 글자 수 (큰 응답 본문이 인덱스를 과도하게 키우지 않도록)
+MAX_DOC_CHARS = 20000
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS search_docs (
+    rowid INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    doc_id TEXT NOT NULL,
+    prompt_id TEXT,
+    timestamp TEXT,
+    digest TEXT NOT NULL,
+    UNIQUE (kind, doc_id)
+);
+CREATE INDEX IF NOT EXISTS idx_search_docs_prompt_id ON search_docs(prompt_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS search_fts USING fts5(body, tokenize = 'unicode61 remove_diacritics 0');
+CREATE TABLE IF NOT EXISTS search_state (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+WORD_RE = re.compile(r"[가-힣]+|[^\W_]+")
+HANGUL_RE = re.compile(r"[가-힣]+")
+
+
+def _words(text: str):
+    return WORD_RE.findall(text.lower())
+
+
+def tokenize(text: str) -> list:
+    """
+    색인용 토큰 목록
+
+    영어/숫자는 단어 단위로, 한글은 조사가 붙어도 검색되도록 두 글자씩 겹쳐 자른다(bigram).
+    예: "이미지를 분석" -> ["이미", "미지", "지를", "분석"]
+    """
+    tokens = []
+    for word in _words(text):
+        if HANGUL_RE.fullmatch(word) and len(word) > 1:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+        else:
+            tokens.append(word)
+    return tokens
+
+
+def build_match_query(query: str, prefix: bool = True):
+    """
+    검색어를 FTS5 MATCH 식으로 변환 (모든 단어를 포함하는 문서)
+
+    한글 단어는 bigram이 연속으로 나오는 구문으로, 한 글자 한글은 그 글자로 시작하는 토큰으로 찾는다.
+    prefix가 True면 마지막 영어 단어는 접두어로 검색한다 (입력 중인 단어).
+
+    Returns:
+        str | None: MATCH 식 (검색할 단어가 없으면 None)
+    """
+    words = _words(query)
+    terms = []
+    for i, word in enumerate(words):
+        if HANGUL_RE.fullmatch(word):
+            if len(word) == 1:
+                terms.append(f'"{word}"*')
+            else:
+                terms.append('"' + " ".join(word[j:j + 2] for j in range(len(word) - 1)) + '"')
+        elif prefix and i == len(words) - 1:
+            terms.append(f'"{word}"*')
+        else:
+            terms.append(f'"{word}"')
+    return " ".join(terms) or None
+
+
+def _flatten(value):
+    """JSON 응답에서 문자열/숫자 값만 꺼냄"""
+    if isinstance(value, dict):
+        for item in value.values():
+            yield from _flatten(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _flatten(item)
+    elif value is not None and not isinstance(value, bool):
+        yield str(value)
+
+
+def prompt_text(prompt: dict) -> str:
+    return " ".join(str(prompt.get(key) or "") for key in ("name", "description", "content"))
+
+
+def history_text(entry: dict) -> str:
+    parts = [entry.get("prompt") or "", entry.get("image_path") or ""]
+    parts.extend(_flatten(entry.get("response")))
+    return " ".join(parts)
+
+
+class SearchIndex:
+    """
+    프롬프트와 이력(프롬프트, 응답 본문)에 대한 전문 검색 역색인 (SQLite FTS5)
+
+    저장할 때마다 해당 문서만 추가/갱신하므로(증분 색인) 검색 시 전체 이력을 읽지 않는다.
+    결과는 BM25 점수 순으로 정렬된다.
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._local = threading.local()
+        self._ready = False
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite_storage.open_connection(self.db_path)
+            self._local.conn = conn
+        if not self._ready:
+            conn.executescript(SCHEMA)
+            self._ready = True
+        return conn
+
+    def is_built(self) -> bool:
+        """기존 데이터 전체 색인(최초 1회)이 끝났는지 여부"""
+        row = self._conn().execute("SELECT value FROM search_state WHERE key = 'built'").fetchone()
+        return bool(row and json.loads(row[0]))
+
+    def mark_built(self):
+        with sqlite_storage.transaction(self._conn()) as conn:
+            conn.execute("INSERT OR REPLACE INTO search_state (key, value) VALUES ('built', 'true')")
+
+    # -----------------------------------------------------------------------
+    # 색인
+    # -----------------------------------------------------------------------
+
+    def _upsert(self, conn, kind, doc_id, text, prompt_id=None, timestamp=None):
+        """문서 추가/갱신 (내용이 바뀌지 않았으면 아무것도 하지 않음)"""
+        body = " ".join(tokenize(text[:MAX_DOC_CHARS]))
+        digest = hashlib.md5(body.encode("utf-8")).hexdigest()
+        row = conn.execute(
+            "SELECT rowid, digest FROM search_docs WHERE kind = ? AND doc_id = ?", (kind, doc_id)
+        ).fetchone()
+        if row is not None:
+            if row[1] == digest:
+                return
+            conn.execute("DELETE FROM search_fts WHERE rowid = ?", (row[0],))
+            conn.execute(
+                "UPDATE search_docs SET prompt_id = ?, timestamp = ?, digest = ? WHERE rowid = ?",
+                (prompt_id, timestamp, digest, row[0]),
+            )
+            rowid = row[0]
+        else:
+            rowid = conn.execute(
+                "INSERT INTO search_docs (kind, doc_id, prompt_id, timestamp, digest) VALUES (?, ?, ?, ?, ?)",
+                (kind, doc_id, prompt_id, timestamp, digest),
+            ).lastrowid
+        conn.execute("INSERT INTO search_fts (rowid, body) VALUES (?, ?)", (rowid, body))
+
+    def _delete(self, conn, kind, doc_ids):
+        for doc_id in doc_ids:
+            row = conn.execute(
+                "SELECT rowid FROM search_docs WHERE kind = ? AND doc_id = ?", (kind, doc_id)
+            ).fetchone()
+            if row is not None:
+                conn.execute("DELETE FROM search_fts WHERE rowid = ?", (row[0],))
+                conn.execute("DELETE FROM search_docs WHERE rowid = ?", (row[0],))
+
+    def index_prompts(self, prompts, replace: bool = False):
+        """
+        프롬프트 색인 (바뀐 프롬프트만 다시 색인)
+
+        Args:
+            replace: True면 목록에 없는 프롬프트를 인덱스에서 제거 (전체 목록 저장 시)
+        """
+        with sqlite_storage.transaction(self._conn()) as conn:
+            for prompt in prompts:
+                self._upsert(conn, KIND_PROMPT, prompt["id"], prompt_text(prompt), prompt["id"],
+                             prompt.get("created_at"))
+            if replace:
+                current = {prompt["id"] for prompt in prompts}
+                indexed = [row[0] for row in conn.execute(
+                    "SELECT doc_id FROM search_docs WHERE kind = ?", (KIND_PROMPT,)
+                )]
+                self._delete(conn, KIND_PROMPT, [doc_id for doc_id in indexed if doc_id not in current])
+
+    def index_history(self, entries):
+        """이력 색인"""
+        with sqlite_storage.transaction(self._conn()) as conn:
+            for entry in entries:
+                self._upsert(conn, KIND_HISTORY, entry["id"], history_text(entry), entry.get("prompt_id"),
+                             entry.get("timestamp"))
+
+    def build(self, prompts, history, batch_size: int = 1000):
+        """
+        기존 데이터 전체 색인 (최초 1회)
+
+        이력은 반복자로 받아 batch_size 단위로 나눠 커밋하므로 전체 이력을 메모리에 올리지 않는다.
+        """
+        self.index_prompts(prompts)
+        batch = []
+        for entry in history:
+            batch.append(entry)
+            if len(batch) >= batch_size:
+                self.index_history(batch)
+                batch = []
+        if batch:
+            self.index_history(batch)
+        self.mark_built()
+
+    def prune_history(self, existing_history_ids, batch_size: int = 500):
+        """
+        삭제된 이력(보관 기간 만료 등)을 인덱스에서 제거
+
+        Args:
+            existing_history_ids: 이력 ID 목록 -> 실제로 존재하는 ID 집합을 돌려주는 함수
+        """
+        conn = self._conn()
+        last = 0
+        while True:
+            rows = conn.execute(
+                "SELECT rowid, doc_id FROM search_docs WHERE kind = ? AND rowid > ? ORDER BY rowid LIMIT ?",
+                (KIND_HISTORY, last, batch_size),
+            ).fetchall()
+            if not rows:
+                break
+            last = rows[-1][0]
+            ids = [doc_id for _, doc_id in rows]
+            missing = set(ids) - set(existing_history_ids(ids))
+            if missing:
+                with sqlite_storage.transaction(conn):
+                    self._delete(conn, KIND_HISTORY, missing)
+
+    # -----------------------------------------------------------------------
+    # 검색
+    # -----------------------------------------------------------------------
+
+    def search(self, query: str, kind: str = None, limit: int = 20, prefix: bool = True):
+        """
+        검색어를 모두 포함하는 문서를 관련도 순으로 조회
+
+        Returns:
+            list: {"kind", "id", "prompt_id", "timestamp", "score"} 목록 (score가 작을수록 관련도 높음)
+        """
+        match = build_match_query(query, prefix)
+        if match is None:
+            return []
+        sql = (
+            "SELECT d.kind, d.doc_id, d.prompt_id, d.timestamp, bm25(search_fts) AS score "
+            "FROM search_fts JOIN search_docs d ON d.rowid = search_fts.rowid "
+            "WHERE search_fts MATCH ?"
+        )
+        params = [match]
+        if kind is not None:
+            sql += " AND d.kind = ?"
+            params.append(kind)
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+        keys = ("kind", "id", "prompt_id", "timestamp", "score")
+        return [dict(zip(keys, row)) for row in self._conn().execute(sql, params)]
+
+    def search_prompts_by_response(self, query: str, limit: int = 20, prefix: bool = True):
+        """
+        응답(이력)에 검색어가 나온 프롬프트를 관련도 순으로 조회
+
+        Returns:
+            list: {"prompt_id", "hits", "score"} 목록 (hits: 검색어가 나온 이력 수)
+        """
+        match = build_match_query(query, prefix)
+        if match is None:
+            return []
+        rows = self._conn().execute(
+            # 집계 안에서는 bm25()를 쓸 수 없으므로 같은 값인 rank 컬럼을 사용
+            "SELECT d.prompt_id, COUNT(*) AS hits, MIN(f.rank) AS score "
+            "FROM (SELECT rowid, rank FROM search_fts WHERE search_fts MATCH ?) f "
+            "JOIN search_docs d ON d.rowid = f.rowid "
+            "WHERE d.kind = ? AND d.prompt_id IS NOT NULL "
+            "GROUP BY d.prompt_id ORDER BY score LIMIT ?",
+            (match, KIND_HISTORY, limit),
+        ).fetchall()
+        return [{"prompt_id": prompt_id, "hits": hits, "score": score} for prompt_id, hits, score in rows]
@@ -0,0 +1,421 @@
+import json
+import sqlite3
+import threading
+from utils import profiler
+
+# 스키마: 자주 조회하는 필드는 컬럼으로 분리해 인덱스를 걸고, 전체 레코드는 data 컬럼에 JSON으로 보관
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS prompts (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    name TEXT,
+    created_at TEXT,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS history (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    id TEXT NOT NULL UNIQUE,
+    timestamp TEXT,
+    prompt_id TEXT,
+    endpoint TEXT,
+    status TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_history_prompt_id ON history(prompt_id);
+CREATE INDEX IF NOT EXISTS idx_history_timestamp ON history(timestamp);
+CREATE INDEX IF NOT EXISTS idx_history_status ON history(status);
+CREATE INDEX IF NOT EXISTS idx_history_endpoint ON history(endpoint);
+CREATE TABLE IF NOT EXISTS endpoints (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS endpoint_policies (
+    url TEXT PRIMARY KEY,
+    policy TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS endpoint_groups (
+    name TEXT PRIMARY KEY,
+    data TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+NEXT_PROMPT_NUMBER_KEY = "next_prompt_number"
+
+_local = threading.local()
+_db_path = None
+
+
+def configure(db_path: str):
+    """사용할 데이터베이스 파일 경로 설정"""
+    global _db_path
+    _db_path = db_path
+
+
+def open_connection(db_path: str) -> sqlite3.Connection:
+    """WAL 모드로 설정된 새 커넥션 생성"""
+    # isolation_level=None: 트랜잭션은 BEGIN IMMEDIATE로 직접 관리
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    # rerun 측정 중이면 실행된 SELECT/변경 문장 수를 셈
+    conn.set_trace_callback(profiler.sql_trace)
+    return conn
+
+
+def get_connection() -> sqlite3.Connection:
+    """스레드별 커넥션 반환 (Streamlit 세션은 각자 다른 스레드에서 실행됨)"""
+    conn = getattr(_local, "conn", None)
+    if conn is None or getattr(_local, "path", None) != _db_path:
+        conn = open_connection(_db_path)
+        _local.conn = conn
+        _local.path = _db_path
+    return conn
+
+
+class _Transaction:
+    """쓰기 트랜잭션: 시작 시점에 쓰기 잠금을 잡아 동시 세션 간 갱신 유실을 막음"""
+
+    def __init__(self, conn=None):
+        self.conn = conn
+
+    def __enter__(self):
+        if self.conn is None:
+            self.conn = get_connection()
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.conn.execute("COMMIT")
+        else:
+            self.conn.execute("ROLLBACK")
+        return False
+
+
+def transaction(conn=None):
+    return _Transaction(conn)
+
+
+def init_db(hash_fn, number_fn):
+    """
+    테이블과 인덱스 생성
+
+    Args:
+        hash_fn: 프롬프트 내용 -> 내용 해시 (중복 검사 인덱스용)
+        number_fn: 프롬프트 목록 -> 다음 이름 번호 (카운터가 없을 때 재구성용)
+    """
+    conn = get_connection()
+    conn.executescript(SCHEMA)
+
+    # 이전 스키마로 만들어진 DB에 내용 해시 컬럼 추가
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(prompts)")]
+    if "content_hash" not in columns:
+        conn.execute("ALTER TABLE prompts ADD COLUMN content_hash TEXT")
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_prompts_content_hash ON prompts(content_hash)")
+
+    with transaction() as conn:
+        # 해시가 비어 있는 행을 채워 인덱스 재구성
+        rows = conn.execute("SELECT id, data FROM prompts WHERE content_hash IS NULL").fetchall()
+        for prompt_id, data in rows:
+            content = json.loads(data).get("content", "")
+            conn.execute("UPDATE prompts SET content_hash = ? WHERE id = ?", (hash_fn(content), prompt_id))
+
+        if _get_meta(conn, NEXT_PROMPT_NUMBER_KEY) is None:
+            prompts = [json.loads(row[0]) for row in conn.execute("SELECT data FROM prompts")]
+            _set_meta(conn, NEXT_PROMPT_NUMBER_KEY, number_fn(prompts))
+
+
+def _get_meta(conn, key):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else None
+
+
+def _set_meta(conn, key, value):
+    conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value)))
+
+
+def is_empty() -> bool:
+    """아직 아무 데이터도 없는지 확인 (JSON 데이터 가져오기 여부 판단용)"""
+    conn = get_connection()
+    for table in ("prompts", "history", "endpoints"):
+        if conn.execute(f"SELECT 1 FROM {table} LIMIT 1").fetchone():
+            return False
+    return True
+
+
+def import_data(prompts, history, endpoints, hash_fn, number_fn):
+    """기존 JSON 저장소의 데이터를 한 번에 가져옴"""
+    with transaction() as conn:
+        for prompt in prompts:
+            _insert_prompt(conn, prompt, hash_fn(prompt.get("content", "")))
+        _advance_prompt_number(conn, number_fn(prompts))
+        for entry in history:
+            _insert_history(conn, entry)
+        conn.executemany("INSERT OR IGNORE INTO endpoints (url) VALUES (?)", [(url,) for url in endpoints])
+
+
+# ---------------------------------------------------------------------------
+# 프롬프트
+# ---------------------------------------------------------------------------
+
+def _insert_prompt(conn, prompt, content_hash=None):
+    conn.execute(
+        "INSERT OR REPLACE INTO prompts (id, name, created_at, content_hash, data) VALUES (?, ?, ?, ?, ?)",
+        (
+            prompt["id"],
+            prompt.get("name"),
+            prompt.get("created_at"),
+            content_hash,
+            json.dumps(prompt, ensure_ascii=False),
+        ),
+    )
+
+
+def load_prompts():
+    rows = get_connection().execute("SELECT data FROM prompts ORDER BY seq").fetchall()
+    return [json.loads(row[0]) for row in rows]
+
+
+def _advance_prompt_number(conn, number):
+    """이름 번호 카운터는 줄어들지 않도록 더 큰 값으로만 갱신"""
+    current = int(_get_meta(conn, NEXT_PROMPT_NUMBER_KEY) or 1)
+    if number > current:
+        _set_meta(conn, NEXT_PROMPT_NUMBER_KEY, number)
+
+
+def save_prompts(prompts, hash_fn, number_fn):
+    """프롬프트 목록 전체를 주어진 목록으로 교체"""
+    with transaction() as conn:
+        conn.execute("DELETE FROM prompts")
+        for prompt in prompts:
+            _insert_prompt(conn, prompt, hash_fn(prompt.get("content", "")))
+        _advance_prompt_number(conn, number_fn(prompts))
+
+
+def add_prompt(prompt, content_hash, number_fn):
+    with transaction() as conn:
+        _insert_prompt(conn, prompt, content_hash)
+        _advance_prompt_number(conn, number_fn([prompt]))
+
+
+def save_new_prompt(content_hash, make_prompt):
+    """
+    내용이 중복되지 않으면 다음 번호로 새 프롬프트를 만들어 저장
+
+    중복 검사, 번호 발급, 저장이 하나의 트랜잭션에서 이루어진다.
+
+    Returns:
+        dict | None: 저장된 프롬프트, 이미 같은 내용이 있으면 None
+    """
+    with transaction() as conn:
+        if conn.execute("SELECT 1 FROM prompts WHERE content_hash = ? LIMIT 1", (content_hash,)).fetchone():
+            return None
+        number = int(_get_meta(conn, NEXT_PROMPT_NUMBER_KEY) or 1)
+        prompt = make_prompt(number)
+        _insert_prompt(conn, prompt, content_hash)
+        _set_meta(conn, NEXT_PROMPT_NUMBER_KEY, number + 1)
+    return prompt
+
+
+def get_prompt_by_id(prompt_id):
+    row = get_connection().execute("SELECT data FROM prompts WHERE id = ?", (prompt_id,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+def add_history_to_prompt(prompt_id, history_id):
+    with transaction() as conn:
+        row = conn.execute("SELECT data FROM prompts WHERE id = ?", (prompt_id,)).fetchone()
+        if row is None:
+            return False
+        prompt = json.loads(row[0])
+        prompt.setdefault("related_history", []).append(history_id)
+        conn.execute(
+            "UPDATE prompts SET data = ? WHERE id = ?",
+            (json.dumps(prompt, ensure_ascii=False), prompt_id),
+        )
+    return True
+
+
+def add_history_to_prompts(links):
+    """여러 프롬프트에 이력 ID들을 한 트랜잭션으로 추가 (prompt_id -> 이력 ID 목록)"""
+    with transaction() as conn:
+        for prompt_id, history_ids in links.items():
+            row = conn.execute("SELECT data FROM prompts WHERE id = ?", (prompt_id,)).fetchone()
+            if row is None:
+                continue
+            prompt = json.loads(row[0])
+            prompt.setdefault("related_history", []).extend(history_ids)
+            conn.execute(
+                "UPDATE prompts SET data = ? WHERE id = ?",
+                (json.dumps(prompt, ensure_ascii=False), prompt_id),
+            )
+
+
+# ---------------------------------------------------------------------------
+# 이력
+# ---------------------------------------------------------------------------
+
+def _insert_history(conn, entry):
+    conn.execute(
+        "INSERT OR IGNORE INTO history (id, timestamp, prompt_id, endpoint, status, data) VALUES (?, ?, ?, ?, ?, ?)",
+        (
+            entry["id"],
+            entry.get("timestamp"),
+            entry.get("prompt_id"),
+            entry.get("endpoint"),
+            entry.get("status"),
+            json.dumps(entry, ensure_ascii=False),
+        ),
+    )
+
+
+def load_history():
+    rows = get_connection().execute("SELECT data FROM history ORDER BY seq").fetchall()
+    return [json.loads(row[0]) for row in rows]
+
+
+def insert_history(entry):
+    with transaction() as conn:
+        _insert_history(conn, entry)
+
+
+def insert_history_entries(entries):
+    with transaction() as conn:
+        for entry in entries:
+            _insert_history(conn, entry)
+
+
+def delete_history_before(timestamp):
+    """보관 기간이 지난 이력 삭제"""
+    with transaction() as conn:
+        conn.execute("DELETE FROM history WHERE timestamp < ?", (timestamp,))
+
+
+def history_after(seq, limit=None):
+    """seq 이후에 저장된 이력 (seq, 이력) 목록을 저장 순으로"""
+    rows = get_connection().execute(
+        "SELECT seq, data FROM history WHERE seq > ? ORDER BY seq" + (" LIMIT ?" if limit else ""),
+        (seq, limit) if limit else (seq,),
+    ).fetchall()
+    return [(row[0], json.loads(row[1])) for row in rows]
+
+
+def get_history_by_id(history_id):
+    row = get_connection().execute("SELECT data FROM history WHERE id = ?", (history_id,)).fetchone()
+    return json.loads(row[0]) if row else None
+
+
+# SQLite가 한 쿼리에서 허용하는 바인딩 변수 수를 넘지 않도록 나눠서 조회
+MAX_SQL_VARIABLES = 900
+
+
+def history_filter_sql(prompt_id=None, status=None, endpoint=None, since=None, until=None, cursor=None):
+    """
+    이력 조회 조건을 WHERE 절로 변환 (history, history_index 테이블 공용)
+
+    since/until은 ISO 형식 문자열로 [since, until) 구간을 의미하고,
+    cursor는 이전 페이지의 마지막 seq로 그보다 오래된 이력만 조회한다.
+    """
+    clauses, params = [], []
+    for column, value in (("prompt_id", prompt_id), ("status", status), ("endpoint", endpoint)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if since is not None:
+        clauses.append("timestamp >= ?")
+        params.append(since)
+    if until is not None:
+        clauses.append("timestamp < ?")
+        params.append(until)
+    if cursor is not None:
+        clauses.append("seq < ?")
+        params.append(int(cursor))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+def query_history(limit, **filters):
+    """
+    조건에 맞는 이력을 최신순으로 한 페이지 조회
+
+    Returns:
+        Tuple[list, Optional[str]]: (이력 목록, 다음 페이지 커서)
+    """
+    where, params = history_filter_sql(**filters)
+    rows = get_connection().execute(
+        f"SELECT seq, data FROM history {where} ORDER BY seq DESC LIMIT ?", params + [limit + 1]
+    ).fetchall()
+    next_cursor = str(rows[limit - 1][0]) if len(rows) > limit else None
+    return [json.loads(row[1]) for row in rows[:limit]], next_cursor
+
+
+def get_history_by_ids(history_ids):
+    """여러 이력을 한 번에 조회 (id -> 이력)"""
+    found = {}
+    conn = get_connection()
+    for i in range(0, len(history_ids), MAX_SQL_VARIABLES):
+        chunk = history_ids[i:i + MAX_SQL_VARIABLES]
+        placeholders = ",".join("?" * len(chunk))
+        for row in conn.execute(f"SELECT data FROM history WHERE id IN ({placeholders})", chunk):
+            entry = json.loads(row[0])
+            found[entry["id"]] = entry
+    return found
+
+
+# ---------------------------------------------------------------------------
+# 엔드포인트
+# ---------------------------------------------------------------------------
+
+def load_endpoints():
+    rows = get_connection().execute("SELECT url FROM endpoints ORDER BY seq").fetchall()
+    return [row[0] for row in rows]
+
+
+def save_endpoint(url):
+    with transaction() as conn:
+        cursor = conn.execute("INSERT OR IGNORE INTO endpoints (url) VALUES (?)", (url,))
+        return cursor.rowcount > 0
+
+
+def delete_endpoint(url):
+    with transaction() as conn:
+        cursor = conn.execute("DELETE FROM endpoints WHERE url = ?", (url,))
+        conn.execute("DELETE FROM endpoint_policies WHERE url = ?", (url,))
+        return cursor.rowcount > 0
+
+
+def load_endpoint_policies():
+    rows = get_connection().execute("SELECT url, policy FROM endpoint_policies").fetchall()
+    return {url: json.loads(policy) for url, policy in rows}
+
+
+def save_endpoint_policy(url, policy):
+    with transaction() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO endpoint_policies (url, policy) VALUES (?, ?)",
+            (url, json.dumps(policy)),
+        )
+
+
+def load_endpoint_groups():
+    rows = get_connection().execute("SELECT name, data FROM endpoint_groups ORDER BY name").fetchall()
+    return {name: json.loads(data) for name, data in rows}
+
+
+def save_endpoint_group(name, group):
+    with transaction() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO endpoint_groups (name, data) VALUES (?, ?)",
+            (name, json.dumps(group)),
+        )
+
+
+def delete_endpoint_group(name):
+    with transaction() as conn:
+        cursor = conn.execute("DELETE FROM endpoint_groups WHERE name = ?", (name,))
+        return cursor.rowcount > 0
@@ -2,125 +2,800 @@ import os
 import json
 from datetime import datetime
 import uuid
+import hashlib
+import threading
+import time
+from utils.history_log import HistoryLog, parse_lines
+from utils.file_cache import FileCache, stat_key
+from utils.history_index import HistoryIndex
+from utils.locking import FileLock, GroupCommitter, atomic_write_json
+from utils.blob_store import BlobStore
+from utils.search_index import SearchIndex, KIND_PROMPT, KIND_HISTORY
+from utils.response_cache import ResponseCache
+from utils import cassette as cassettes
+from utils import sqlite_storage, metrics
 
 # 데이터 경로를 현재 디렉토리로 설정
 DATA_PATH = "./app_data"  # 현재 디렉토리
 PROMPTS_FILE = os.path.join(DATA_PATH, "prompts.json")
-HISTORY_FILE = os.path.join(DATA_PATH, "history.json")
+PROMPT_INDEX_FILE = os.path.join(DATA_PATH, "prompts_index.json")  # 내용 해시 -> 프롬프트 ID, 이름 번호 카운터
+HISTORY_FILE = os.path.join(DATA_PATH, "history.json")  # 이전 형식(JSON 배열), 마이그레이션 용도
+HISTORY_LOG_FILE = os.path.join(DATA_PATH, "history.jsonl")  # 이전 형식(단일 로그 파일), 마이그레이션 용도
+HISTORY_DIR = os.path.join(DATA_PATH, "history")  # 시간 구간별 이력 세그먼트
+HISTORY_INDEX_FILE = os.path.join(DATA_PATH, "history_index.db")  # 이력 로그 조회용 인덱스
 ENDPOINTS_FILE = os.path.join(DATA_PATH, "endpoints.json")
+ENDPOINT_POLICY_FILE = os.path.join(DATA_PATH, "endpoint_policies.json")  # 엔드포인트 URL -> 타임아웃/재시도/차단기 정책
+ENDPOINT_GROUP_FILE = os.path.join(DATA_PATH, "endpoint_groups.json")  # 그룹 이름 -> 복제 엔드포인트 목록과 라우팅 방식
+SQLITE_FILE = os.path.join(DATA_PATH, "prompt_box.db")
+SEARCH_INDEX_FILE = os.path.join(DATA_PATH, "search_index.db")  # 프롬프트/응답 전문 검색 인덱스
+BENCHMARK_FILE = os.path.join(DATA_PATH, "benchmarks.jsonl")  # 저장된 벤치마크 실행 결과
+RESPONSE_CACHE_FILE = os.path.join(DATA_PATH, "response_cache.db")  # API 응답 캐시 (디스크 계층)
+BLOB_DIR = os.path.join(DATA_PATH, "blobs")  # 업로드된 테스트 이미지 (내용 해시 기준 저장)
+CASSETTE_DIR = os.path.join(DATA_PATH, "cassettes")  # 녹화된 요청/응답 (카세트 이름별 SQLite 파일)
+JOB_QUEUE_FILE = os.path.join(DATA_PATH, "jobs.db")  # 백그라운드 작업 큐 (작업과 결과)
+ANALYTICS_DIR = os.path.join(DATA_PATH, "analytics")  # 실험실 분석용 열 단위 저장소 (Parquet)
+
+# 저장소 백엔드 선택 (json / sqlite)
+STORAGE_BACKEND = os.environ.get("STORAGE_BACKEND", "json")
+
+# 이력 로그 fsync 정책 (always / interval / never)
+HISTORY_FSYNC = os.environ.get("HISTORY_FSYNC", "always")
+HISTORY_FSYNC_INTERVAL = float(os.environ.get("HISTORY_FSYNC_INTERVAL", "1.0"))
+
+# 이력 세그먼트 구간(시간), 보관 기간(일, 0이면 무제한), 압축/정리 주기(초)
+HISTORY_SEGMENT_HOURS = float(os.environ.get("HISTORY_SEGMENT_HOURS", "24"))
+HISTORY_RETENTION_DAYS = float(os.environ.get("HISTORY_RETENTION_DAYS", "0"))
+HISTORY_COMPACT_INTERVAL = float(os.environ.get("HISTORY_COMPACT_INTERVAL", "600"))
+
+# 참조가 없어진 이미지를 삭제하기까지의 유예 시간(초)
+BLOB_GC_GRACE = float(os.environ.get("BLOB_GC_GRACE", "3600"))
+
+history_log = HistoryLog(HISTORY_DIR, HISTORY_SEGMENT_HOURS, HISTORY_FSYNC, HISTORY_FSYNC_INTERVAL)
+history_index = HistoryIndex(HISTORY_INDEX_FILE, history_log)
+blob_store = BlobStore(BLOB_DIR, BLOB_GC_GRACE)
+search_index = SearchIndex(SEARCH_INDEX_FILE)
+response_cache = ResponseCache(RESPONSE_CACHE_FILE)
+sqlite_storage.configure(SQLITE_FILE)
+
+metrics.register_gauge(
+    "promptbox_response_cache_lookups", "Response cache lookups since process start, by result.",
+    lambda: {(result,): response_cache.stats()[key]
+             for result, key in (("memory_hit", "memory_hits"), ("disk_hit", "disk_hits"), ("miss", "misses"))},
+    ("result",)
+)
+
+# 프로세스 공용 파일 캐시 (Streamlit 재실행마다 JSON을 다시 파싱하지 않도록)
+file_cache = FileCache()
+
+_sqlite_ready = False
+
+def _use_sqlite():
+    """SQLite 백엔드 사용 여부 (사용 시 스키마가 준비되어 있음을 보장)"""
+    if STORAGE_BACKEND != "sqlite":
+        return False
+    _ensure_sqlite()
+    return True
 
 def ensure_data_dir():
     """데이터 디렉토리와 필요한 파일들이 존재하는지 확인하고 없으면 생성"""
     # 데이터 디렉토리 확인
     if not os.path.exists(DATA_PATH):
         os.makedirs(DATA_PATH)
-    
+
     # 프롬프트 파일 초기화
     if not os.path.exists(PROMPTS_FILE):
         with open(PROMPTS_FILE, "w") as f:
             json.dump([], f)
-    
-    # 이력 파일 초기화
-    if not os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, "w") as f:
-            json.dump([], f)
-    
+
+    # 이력 세그먼트 디렉토리 초기화 (이전 형식의 이력 파일은 1회만 변환하고 원본은 그대로 둠)
+    history_log.create()
+    for legacy_file in (HISTORY_FILE, HISTORY_LOG_FILE):
+        if os.path.exists(legacy_file):
+            history_log.migrate_from_json(legacy_file)
+
     # 엔드포인트 파일 초기화
     if not os.path.exists(ENDPOINTS_FILE):
         with open(ENDPOINTS_FILE, "w") as f:
             json.dump([], f)
 
-def load_prompts():
-    """저장된 프롬프트 목록 로드"""
+    # SQLite 백엔드라면 스키마 준비
+    _use_sqlite()
+
+    start_history_compactor()
+
+def _ensure_sqlite():
+    """SQLite 스키마 생성, 비어 있으면 기존 JSON 데이터를 가져옴"""
+    global _sqlite_ready
+    if _sqlite_ready:
+        return
+    sqlite_storage.init_db(prompt_content_hash, _next_prompt_number)
+    if sqlite_storage.is_empty():
+        sqlite_storage.import_data(
+            _load_json(PROMPTS_FILE), history_log, _load_json(ENDPOINTS_FILE),
+            prompt_content_hash, _next_prompt_number
+        )
+    _sqlite_ready = True
+
+def _load_json(path):
+    """JSON 파일 로드 (파일이 없거나 손상된 경우 빈 리스트 반환)"""
     try:
-        with open(PROMPTS_FILE, "r") as f:
+        with open(path, "r") as f:
             return json.load(f)
     except (FileNotFoundError, json.JSONDecodeError):
-        # 파일이 없거나 손상된 경우 빈 리스트 반환
         return []
 
-def save_prompts(prompts):
-    """프롬프트 목록 저장"""
-    with open(PROMPTS_FILE, "w") as f:
-        json.dump(prompts, f, indent=4)
+def _load_json_cached(path):
+    """파일이 바뀌지 않았다면 캐시된 파싱 결과 반환 (반환값은 공유 객체이므로 수정 금지)"""
+    return file_cache.get(path, _load_json)
 
-def load_history():
-    """API 호출 이력 로드"""
+def _save_json(path, data):
+    """임시 파일 + rename으로 원자적으로 저장하고, 저장한 객체를 캐시에 바로 반영"""
+    atomic_write_json(path, data)
+    file_cache.put(path, data)
+
+def _apply_mutations(state, mutations):
+    """
+    변경 함수들을 차례로 적용 (그룹 커밋용)
+
+    각 변경 함수는 현재 상태를 받아 (새 상태, 결과)를 돌려주며 상태를 직접 수정하지 않는다.
+    실패한 변경은 건너뛰고 그 예외를 결과로 남긴다.
+    """
+    results = []
+    for mutate in mutations:
+        try:
+            state, result = mutate(state)
+        except Exception as e:
+            result = e
+        results.append(result)
+    return state, results
+
+def get_cache_stats():
+    """파일 캐시 적중/미스 통계"""
+    return file_cache.stats()
+
+def get_response_cache_stats():
+    """API 응답 캐시 적중/미스 통계"""
+    return response_cache.stats()
+
+def clear_response_cache():
+    response_cache.clear()
+
+def get_cassette(name, mode, rules=None):
+    """녹화/재생할 카세트 (모드는 cassette.MODE_RECORD 또는 MODE_REPLAY)"""
+    return cassettes.open_cassette(CASSETTE_DIR, name, mode, rules)
+
+def list_cassettes():
+    return cassettes.list_cassettes(CASSETTE_DIR)
+
+def prompt_content_hash(content):
+    """프롬프트 텍스트의 해시값을 계산하여 중복 확인에 사용"""
+    return hashlib.md5(content.encode()).hexdigest()
+
+def _prompt_number(name):
+    """'Prompt #N' 형식의 이름에서 번호 추출 (형식이 다르면 0)"""
+    try:
+        return int(name.split("#")[1]) if "#" in name else 0
+    except ValueError:
+        return 0
+
+def _next_prompt_number(prompts):
+    """목록에 있는 이름 번호 중 가장 큰 값 + 1"""
+    return max((_prompt_number(p.get("name", "")) for p in prompts), default=0) + 1
+
+def _build_prompt_index(prompts, next_number=1):
+    """프롬프트 목록으로부터 해시 인덱스 생성 (번호 카운터는 줄어들지 않음)"""
+    return {
+        "hashes": {prompt_content_hash(p.get("content", "")): p["id"] for p in prompts},
+        "next_number": max(next_number, _next_prompt_number(prompts)),
+    }
+
+def _load_prompt_index():
+    """
+    프롬프트 해시 인덱스 로드
+
+    인덱스에는 저장 당시 prompts.json의 (mtime, size, inode)가 기록되어 있어,
+    인덱스가 없거나 프롬프트 파일과 맞지 않으면(다른 경로로 수정된 경우 등) 다시 만든다.
+    """
+    index = file_cache.get(PROMPT_INDEX_FILE, _load_json)
+    if not isinstance(index, dict):
+        index = {}
+    source = stat_key(PROMPTS_FILE)
+    if "hashes" not in index or index.get("source") != (list(source) if source else None):
+        index = _build_prompt_index(load_prompts(), index.get("next_number", 1))
+        _save_prompt_index(index)
+    return index
+
+def _save_prompt_index(index):
+    source = stat_key(PROMPTS_FILE)
+    _save_json(PROMPT_INDEX_FILE, {**index, "source": list(source) if source else None})
+
+def _save_prompts_with_index(prompts, index):
+    """프롬프트 파일과 해시 인덱스를 함께 저장"""
+    _save_json(PROMPTS_FILE, prompts)
+    _save_prompt_index(index)
+
+def _commit_prompts(mutations):
+    """잠금을 잡은 상태에서 프롬프트 변경들을 한 번에 적용하고 한 번만 저장"""
+    original = (_load_json_cached(PROMPTS_FILE), _load_prompt_index())
+    state, results = _apply_mutations(original, mutations)
+    if state is not original:
+        _save_prompts_with_index(*state)
+    return results
+
+def _commit_endpoints(mutations):
+    """잠금을 잡은 상태에서 엔드포인트 변경들을 한 번에 적용하고 한 번만 저장"""
+    original = _load_json_cached(ENDPOINTS_FILE)
+    state, results = _apply_mutations(original, mutations)
+    if state is not original:
+        _save_json(ENDPOINTS_FILE, state)
+    return results
+
+def _load_json_dict(path):
     try:
-        with open(HISTORY_FILE, "r") as f:
+        with open(path, "r") as f:
             return json.load(f)
     except (FileNotFoundError, json.JSONDecodeError):
-        # 파일이 없거나 손상된 경우 빈 리스트 반환
-        return []
+        return {}
 
-def save_history_entry(prompt, image_path, response, status):
-    """새로운 API 호출 이력 저장"""
-    history = load_history()
-    
-    # 새 이력 생성
-    entry_id = str(uuid.uuid4())
-    history_entry = {
-        "id": entry_id,
+def _commit_policies(mutations):
+    """잠금을 잡은 상태에서 엔드포인트 정책 변경들을 한 번에 적용하고 한 번만 저장"""
+    original = file_cache.get(ENDPOINT_POLICY_FILE, _load_json_dict)
+    state, results = _apply_mutations(original, mutations)
+    if state is not original:
+        _save_json(ENDPOINT_POLICY_FILE, state)
+    return results
+
+def _commit_groups(mutations):
+    """잠금을 잡은 상태에서 엔드포인트 그룹 변경들을 한 번에 적용하고 한 번만 저장"""
+    original = file_cache.get(ENDPOINT_GROUP_FILE, _load_json_dict)
+    state, results = _apply_mutations(original, mutations)
+    if state is not original:
+        _save_json(ENDPOINT_GROUP_FILE, state)
+    return results
+
+# 동시에 들어온 쓰기를 모아 잠금 한 번, 파일 쓰기 한 번으로 처리
+_prompt_committer = GroupCommitter(PROMPTS_FILE + ".lock", _commit_prompts)
+_endpoint_committer = GroupCommitter(ENDPOINTS_FILE + ".lock", _commit_endpoints)
+_policy_committer = GroupCommitter(ENDPOINT_POLICY_FILE + ".lock", _commit_policies)
+_group_committer = GroupCommitter(ENDPOINT_GROUP_FILE + ".lock", _commit_groups)
+
+def load_prompts():
+    """저장된 프롬프트 목록 로드"""
+    if _use_sqlite():
+        return sqlite_storage.load_prompts()
+    return _load_json_cached(PROMPTS_FILE)
+
+def save_prompts(prompts):
+    """프롬프트 목록 저장"""
+    prompts = list(prompts)
+    if _use_sqlite():
+        sqlite_storage.save_prompts(prompts, prompt_content_hash, _next_prompt_number)
+    else:
+        _prompt_committer.submit(
+            lambda state: ((prompts, _build_prompt_index(prompts, state[1]["next_number"])), None)
+        )
+    search_index.index_prompts(prompts, replace=True)
+
+def add_prompt(prompt):
+    """프롬프트 한 건 추가 (다른 세션이 동시에 추가한 프롬프트를 덮어쓰지 않음)"""
+    content_hash = prompt_content_hash(prompt.get("content", ""))
+    def mutate(state):
+        prompts, index = state
+        return (prompts + [prompt], {
+            "hashes": {**index["hashes"], content_hash: prompt["id"]},
+            "next_number": max(index["next_number"], _next_prompt_number([prompt])),
+        }), None
+
+    if _use_sqlite():
+        sqlite_storage.add_prompt(prompt, content_hash, _next_prompt_number)
+    else:
+        _prompt_committer.submit(mutate)
+    search_index.index_prompts([prompt])
+
+def _make_prompt(content, number):
+    return {
+        "id": str(uuid.uuid4()),
+        "name": f"Prompt #{number}",
+        "description": f"자동 저장된 프롬프트 #{number}",
+        "content": content,
+        "created_at": datetime.now().isoformat(),
+        "related_history": []
+    }
+
+def save_new_prompt(content):
+    """
+    자동 번호를 붙여 새 프롬프트 저장
+
+    중복 검사와 번호 발급은 해시 인덱스와 카운터로 처리하므로 프롬프트 수와 무관하다.
+
+    Returns:
+        dict | None: 저장된 프롬프트, 같은 내용의 프롬프트가 이미 있으면 None
+    """
+    content_hash = prompt_content_hash(content)
+
+    def mutate(state):
+        prompts, index = state
+        if content_hash in index["hashes"]:
+            return state, None
+        number = index["next_number"]
+        prompt = _make_prompt(content, number)
+        return (prompts + [prompt], {
+            "hashes": {**index["hashes"], content_hash: prompt["id"]},
+            "next_number": number + 1,
+        }), prompt
+
+    if _use_sqlite():
+        prompt = sqlite_storage.save_new_prompt(content_hash, lambda number: _make_prompt(content, number))
+    else:
+        prompt = _prompt_committer.submit(mutate)
+    if prompt is not None:
+        search_index.index_prompts([prompt])
+    return prompt
+
+def load_history():
+    """
+    API 호출 이력 전체 로드
+
+    전체 이력을 메모리에 올리므로, 화면에서는 query_history / iter_history를 사용한다.
+    """
+    if _use_sqlite():
+        return sqlite_storage.load_history()
+    history = []
+    active = history_log.active_segment()
+    for segment, _ in history_log.segments():
+        if segment == active:
+            continue
+        history.extend(entry for _, _, entry in history_log.iter_from(segment, 0) if entry is not None)
+    # 현재 세그먼트는 새로 추가된 줄만 파싱해 캐시에 이어 붙임
+    return history + file_cache.get_appendable(history_log.segment_path(active), parse_lines)
+
+def _make_history_entry(prompt, image_path, response, status, prompt_id=None, endpoint=None, image_blob=None,
+                        timings=None, resilience=None, group_id=None):
+    return {
+        "id": str(uuid.uuid4()),
         "timestamp": datetime.now().isoformat(),
         "prompt": prompt,
         "image_path": image_path,
         "response": response,
-        "status": status
+        "status": status,
+        "prompt_id": prompt_id,
+        "endpoint": endpoint,
+        "image_blob": image_blob,
+        "timings": timings,
+        "resilience": resilience,
+        "group_id": group_id,
+        # 실제로 보낸(템플릿을 채운) 프롬프트의 해시, 같은 프롬프트로 실행한 이력끼리 묶는 데 사용
+        "prompt_hash": prompt_content_hash(prompt) if prompt else None
     }
-    
-    # 이력에 추가
-    history.append(history_entry)
-    
-    # 파일에 저장
-    with open(HISTORY_FILE, "w") as f:
-        json.dump(history, f, indent=4)
-    
+
+def save_history_entry(prompt, image_path, response, status, prompt_id=None, endpoint=None, image_blob=None,
+                       timings=None, resilience=None, group_id=None):
+    """
+    새로운 API 호출 이력 저장
+
+    timings에는 요청 시작부터 첫 바이트까지(ttfb), 전체 응답까지(total) 걸린 시간(초)을,
+    resilience에는 시도/재시도 횟수, 헤징 여부, 차단기 상태를 담는다.
+    group_id는 함께 실행된 이력(엔드포인트 비교 등)을 묶는 ID다.
+    """
+    # 새 이력 생성
+    history_entry = _make_history_entry(prompt, image_path, response, status, prompt_id, endpoint, image_blob,
+                                        timings, resilience, group_id)
+    entry_id = history_entry["id"]
+
+    if _use_sqlite():
+        sqlite_storage.insert_history(history_entry)
+    else:
+        # 로그 끝에 한 줄 추가
+        history_log.append(history_entry)
+
+    search_index.index_history([history_entry])
+
+    # 이력이 이미지 파일을 참조함을 기록 (참조가 남아 있는 동안 정리되지 않음)
+    if image_blob:
+        blob_store.add_ref(image_blob, entry_id)
+
     return entry_id
 
+def save_history_entries(records):
+    """
+    여러 이력을 한 번에 저장 (배치 실행 결과를 모아서 기록)
+
+    로그 쓰기, 검색 색인, 이미지 참조 기록을 건별이 아니라 묶음당 한 번씩 처리한다.
+
+    Args:
+        records: save_history_entry의 인자(prompt, image_path, response, status, ...)를 담은 dict 목록
+
+    Returns:
+        list: 저장된 이력 ID 목록 (records와 같은 순서)
+    """
+    entries = [_make_history_entry(**record) for record in records]
+    if not entries:
+        return []
+
+    if _use_sqlite():
+        sqlite_storage.insert_history_entries(entries)
+    else:
+        history_log.import_entries(entries)
+
+    search_index.index_history(entries)
+    blob_store.add_refs((entry["image_blob"], entry["id"]) for entry in entries if entry["image_blob"])
+    return [entry["id"] for entry in entries]
+
+def compact_history():
+    """
+    지난 이력 세그먼트를 압축하고 보관 기간이 지난 이력을 삭제
+
+    압축/삭제 대상은 현재 세그먼트가 아니므로 이력 기록을 막지 않는다.
+    """
+    if _use_sqlite():
+        if HISTORY_RETENTION_DAYS > 0:
+            cutoff = datetime.now().timestamp() - HISTORY_RETENTION_DAYS * 86400
+            sqlite_storage.delete_history_before(datetime.fromtimestamp(cutoff).isoformat())
+    else:
+        # 압축 전에 인덱스를 최신으로 맞춰 두면 아카이브는 다시 읽을 필요가 없음
+        history_index.sync()
+        for segment in history_log.cold_segments():
+            try:
+                history_log.compress(segment)
+            except FileNotFoundError:
+                # 다른 프로세스가 이미 압축함
+                continue
+        for segment in history_log.expired_segments(HISTORY_RETENTION_DAYS):
+            history_log.delete(segment)
+        history_index.sync()
+
+    # 삭제된 이력을 검색 인덱스에서 제거하고, 그 이력만 참조하던 이미지 정리
+    search_index.prune_history(lambda ids: get_history_by_ids(ids).keys())
+    blob_store.gc(lambda ids: get_history_by_ids(ids).keys())
+
+_compactor_lock = threading.Lock()
+_compactor_started = False
+
+def _run_history_compactor():
+    while True:
+        try:
+            compact_history()
+        except Exception as e:
+            print(f"이력 압축 중 오류 발생: {e}")
+        time.sleep(HISTORY_COMPACT_INTERVAL)
+
+def start_history_compactor():
+    """프로세스당 하나의 백그라운드 이력 압축/정리 스레드 시작"""
+    global _compactor_started
+    with _compactor_lock:
+        if _compactor_started or HISTORY_COMPACT_INTERVAL <= 0:
+            return
+        _compactor_started = True
+    threading.Thread(target=_run_history_compactor, name="history-compactor", daemon=True).start()
+
+def save_image_blob(fileobj, name=None, mime_type=None):
+    """
+    이미지를 내용 해시 기준으로 저장 (같은 이미지는 한 번만 저장)
+
+    Returns:
+        str: 이미지 해시
+    """
+    return blob_store.put(fileobj, name, mime_type)
+
+def open_image_blob(digest):
+    """저장된 이미지를 메모리 매핑으로 열기 (파이썬 메모리로 복사하지 않음)"""
+    return blob_store.open_mmap(digest)
+
+def image_blob_path(digest):
+    return blob_store.path(digest)
+
+def load_recent_image_blobs(limit=20):
+    """최근에 사용한 이미지 목록"""
+    return blob_store.recent(limit)
+
 def get_history_by_id(history_id):
     """ID로 특정 이력 조회"""
-    history = load_history()
-    return next((h for h in history if h["id"] == history_id), None)
+    if _use_sqlite():
+        return sqlite_storage.get_history_by_id(history_id)
+    return history_index.get_by_ids([history_id]).get(history_id)
+
+def get_history_by_ids(history_ids):
+    """
+    여러 이력을 한 번에 조회
+
+    Returns:
+        dict: id -> 이력 (없는 id는 제외)
+    """
+    history_ids = list(history_ids)
+    if not history_ids:
+        return {}
+    if _use_sqlite():
+        return sqlite_storage.get_history_by_ids(history_ids)
+    return history_index.get_by_ids(history_ids)
+
+def query_history(prompt_id=None, status=None, endpoint=None, since=None, until=None, limit=50, cursor=None):
+    """
+    조건에 맞는 이력을 최신순으로 한 페이지 조회
+
+    Args:
+        prompt_id, status, endpoint: 일치 조건 (None이면 조건 없음)
+        since, until: ISO 형식 시각, [since, until) 구간
+        limit: 페이지 크기
+        cursor: 이전 호출이 돌려준 다음 페이지 커서
+
+    Returns:
+        Tuple[list, Optional[str]]: (이력 목록, 다음 페이지 커서 - 마지막 페이지면 None)
+    """
+    filters = dict(prompt_id=prompt_id, status=status, endpoint=endpoint, since=since, until=until, cursor=cursor)
+    if _use_sqlite():
+        return sqlite_storage.query_history(limit, **filters)
+    return history_index.query(limit, **filters)
+
+def read_history_changes(positions):
+    """
+    positions 이후 새로 기록된 이력 (분석 저장소처럼 이력 전체를 따라 읽는 곳에서 사용)
+
+    출처(source)는 JSON 백엔드에서는 세그먼트, SQLite 백엔드에서는 "sqlite" 하나다.
+    세그먼트가 줄어들었거나(다시 기록됨) 처음 읽는 경우 reset이 True이며, 그 출처의 기존 반영분을 버리고
+    entries로 대체해야 한다.
+
+    Args:
+        positions: 이전 호출이 돌려준 읽은 위치 {출처: {"offset", "complete"}} (처음이면 {})
+
+    Returns:
+        Tuple[list, dict, list]: ([(출처, reset, 이력 목록)], 새 위치, 디스크에서 사라진 출처 목록)
+    """
+    positions = dict(positions)
+    if _use_sqlite():
+        offset = (positions.get("sqlite") or {}).get("offset", 0)
+        rows = sqlite_storage.history_after(offset)
+        if not rows:
+            return [], positions, []
+        positions["sqlite"] = {"offset": rows[-1][0], "complete": False}
+        return [("sqlite", offset == 0, [entry for _, entry in rows])], positions, []
+
+    changes = []
+    segments = history_log.segments()
+    for segment, compressed in segments:
+        read = positions.get(segment)
+        if compressed and read is not None and read.get("complete"):
+            continue
+        try:
+            size = None if compressed else os.path.getsize(history_log.segment_path(segment))
+        except FileNotFoundError:
+            # 압축되는 중이면 다음에 아카이브로 읽음
+            continue
+        if read is not None and size is not None and read["offset"] == size:
+            continue
+        reset = read is None or (size is not None and read["offset"] > size)
+        offset = 0 if reset else read["offset"]
+        entries = []
+        for _, end, entry in history_log.iter_from(segment, offset):
+            if entry is not None and "id" in entry:
+                entries.append(entry)
+            offset = end
+        positions[segment] = {"offset": offset, "complete": compressed}
+        if entries or reset:
+            changes.append((segment, reset, entries))
+    present = {segment for segment, _ in segments}
+    removed = [source for source in positions if source not in present]
+    for source in removed:
+        positions.pop(source)
+    return changes, positions, removed
+
+def iter_history(page_size=500, **filters):
+    """조건에 맞는 이력을 최신순으로 한 페이지씩 읽어오는 지연 반복자"""
+    cursor = None
+    while True:
+        entries, cursor = query_history(limit=page_size, cursor=cursor, **filters)
+        yield from entries
+        if cursor is None:
+            return
+
+_search_build_lock = threading.Lock()
+
+def _ensure_search_index():
+    """검색 인덱스가 처음 만들어질 때 기존 프롬프트와 이력을 한 번 색인"""
+    if search_index.is_built():
+        return
+    with _search_build_lock:
+        if not search_index.is_built():
+            search_index.build(load_prompts(), iter_history())
+
+def search(query, kind=None, limit=20):
+    """
+    프롬프트와 이력(프롬프트, 응답 본문)을 전문 검색
+
+    한글/영어 모두 지원하며, 마지막 단어는 접두어로 검색한다.
+
+    Args:
+        query: 검색어 (공백으로 나눈 단어를 모두 포함하는 문서)
+        kind: "prompt" 또는 "history" (None이면 둘 다)
+        limit: 최대 결과 수
+
+    Returns:
+        list: 관련도 순 검색 결과, 각 결과의 "doc"에 프롬프트 또는 이력이 담김
+    """
+    _ensure_search_index()
+    hits = search_index.search(query, kind=kind, limit=limit)
+    history = get_history_by_ids([hit["id"] for hit in hits if hit["kind"] == KIND_HISTORY])
+    prompts = {p["id"]: p for p in load_prompts()} if any(hit["kind"] == KIND_PROMPT for hit in hits) else {}
+    results = []
+    for hit in hits:
+        doc = (history if hit["kind"] == KIND_HISTORY else prompts).get(hit["id"])
+        if doc is not None:
+            results.append({**hit, "doc": doc})
+    return results
+
+def search_prompts_by_response(query, limit=20):
+    """
+    응답에 검색어가 나온 프롬프트를 관련도 순으로 조회
+
+    Returns:
+        list: {"prompt", "hits", "score"} 목록 (hits: 검색어가 나온 이력 수)
+    """
+    _ensure_search_index()
+    prompts = {p["id"]: p for p in load_prompts()}
+    return [
+        {"prompt": prompts[row["prompt_id"]], "hits": row["hits"], "score": row["score"]}
+        for row in search_index.search_prompts_by_response(query, limit)
+        if row["prompt_id"] in prompts
+    ]
+
+def get_prompt_by_id(prompt_id):
+    """ID로 프롬프트 조회"""
+    if _use_sqlite():
+        return sqlite_storage.get_prompt_by_id(prompt_id)
+    return next((p for p in load_prompts() if p["id"] == prompt_id), None)
+
+def get_prompt_history(prompt_id):
+    """프롬프트의 related_history를 한 번의 일괄 조회로 이력 목록으로 변환"""
+    prompt = get_prompt_by_id(prompt_id)
+    if prompt is None:
+        return []
+    related = prompt.get("related_history", [])
+    found = get_history_by_ids(related)
+    return [found[history_id] for history_id in related if history_id in found]
 
 def add_history_to_prompt(prompt_id, history_id):
     """프롬프트에 이력 ID 추가"""
-    prompts = load_prompts()
-    for prompt in prompts:
-        if prompt["id"] == prompt_id:
-            if "related_history" not in prompt:
-                prompt["related_history"] = []
-            prompt["related_history"].append(history_id)
-            save_prompts(prompts)
-            return True
-    return False
+    if _use_sqlite():
+        return sqlite_storage.add_history_to_prompt(prompt_id, history_id)
+    def mutate(state):
+        prompts, index = state
+        # 캐시된 목록을 직접 수정하지 않고 새 목록을 만들어 저장
+        for i, prompt in enumerate(prompts):
+            if prompt["id"] == prompt_id:
+                updated = {**prompt, "related_history": prompt.get("related_history", []) + [history_id]}
+                return (prompts[:i] + [updated] + prompts[i + 1:], index), True
+        return state, False
+
+    return _prompt_committer.submit(mutate)
+
+def add_history_to_prompts(links):
+    """
+    여러 프롬프트에 이력 ID들을 한 번의 커밋으로 추가
+
+    Args:
+        links: prompt_id -> 이력 ID 목록
+    """
+    links = {prompt_id: list(history_ids) for prompt_id, history_ids in links.items() if history_ids}
+    if not links:
+        return
+    if _use_sqlite():
+        return sqlite_storage.add_history_to_prompts(links)
+    def mutate(state):
+        prompts, index = state
+        updated = [
+            {**prompt, "related_history": prompt.get("related_history", []) + links[prompt["id"]]}
+            if prompt["id"] in links else prompt
+            for prompt in prompts
+        ]
+        return (updated, index), None
+
+    _prompt_committer.submit(mutate)
+
+def save_benchmark_run(run):
+    """
+    벤치마크 실행 결과를 저장 (이전 실행과 비교할 수 있도록 로그 끝에 추가)
+
+    Returns:
+        str: 저장된 실행 ID
+    """
+    run = {"id": str(uuid.uuid4()), "timestamp": datetime.now().isoformat(), **run}
+    line = json.dumps(run, ensure_ascii=False).encode("utf-8") + b"\n"
+    with FileLock(BENCHMARK_FILE + ".lock"):
+        with open(BENCHMARK_FILE, "ab") as f:
+            f.write(line)
+            f.flush()
+            os.fsync(f.fileno())
+    return run["id"]
+
+def load_benchmark_runs():
+    """저장된 벤치마크 실행 결과 목록 (오래된 순)"""
+    return file_cache.get_appendable(BENCHMARK_FILE, parse_lines)
 
 def load_endpoints():
     """저장된 엔드포인트 목록 로드"""
-    try:
-        with open(ENDPOINTS_FILE, "r") as f:
-            return json.load(f)
-    except (FileNotFoundError, json.JSONDecodeError):
-        return []
+    if _use_sqlite():
+        return sqlite_storage.load_endpoints()
+    return _load_json_cached(ENDPOINTS_FILE)
 
 def save_endpoint(url):
     """새로운 엔드포인트 추가"""
-    endpoints = load_endpoints()
-    
-    # 중복 검사
-    if url in endpoints:
-        return False
-    
-    endpoints.append(url)
-    with open(ENDPOINTS_FILE, "w") as f:
-        json.dump(endpoints, f, indent=4)
-    return True
+    if _use_sqlite():
+        return sqlite_storage.save_endpoint(url)
+    def mutate(endpoints):
+        # 중복 검사
+        if url in endpoints:
+            return endpoints, False
+        return endpoints + [url], True
+
+    return _endpoint_committer.submit(mutate)
 
 def delete_endpoint(url):
     """엔드포인트 삭제"""
-    endpoints = load_endpoints()
-    if url in endpoints:
-        endpoints.remove(url)
-        with open(ENDPOINTS_FILE, "w") as f:
-            json.dump(endpoints, f, indent=4)
-        return True
-    return False
+    if _use_sqlite():
+        return sqlite_storage.delete_endpoint(url)
+    def mutate(endpoints):
+        if url in endpoints:
+            return [e for e in endpoints if e != url], True
+        return endpoints, False
+
+    deleted = _endpoint_committer.submit(mutate)
+    if deleted:
+        _policy_committer.submit(lambda policies: ({k: v for k, v in policies.items() if k != url}, None))
+    return deleted
+
+def load_endpoint_policies():
+    """
+    엔드포인트별 요청 정책 (타임아웃, 재시도, 차단기, 헤징)
+
+    Returns:
+        dict: 엔드포인트 URL -> 정책 (설정하지 않은 항목은 기본값 사용)
+    """
+    if _use_sqlite():
+        return sqlite_storage.load_endpoint_policies()
+    return file_cache.get(ENDPOINT_POLICY_FILE, _load_json_dict)
+
+def save_endpoint_policy(url, policy):
+    """엔드포인트 요청 정책 저장"""
+    policy = dict(policy)
+    if _use_sqlite():
+        return sqlite_storage.save_endpoint_policy(url, policy)
+    _policy_committer.submit(lambda policies: ({**policies, url: policy}, None))
+
+def _matches_endpoint(url, endpoint):
+    """URL이 엔드포인트 주소 자체이거나 그 아래 경로인지 (http://host:80 이 http://host:8000 과 일치하지 않도록 경계 확인)"""
+    prefix = endpoint.rstrip("/")
+    return url.startswith(prefix) and (len(url) == len(prefix) or url[len(prefix)] in "/?#")
+
+def get_endpoint_policy(url):
+    """요청 URL에 적용할 정책 (등록된 엔드포인트 중 URL이 가장 길게 일치하는 것의 정책)"""
+    policies = load_endpoint_policies()
+    matches = [endpoint for endpoint in policies if _matches_endpoint(url, endpoint)]
+    return policies[max(matches, key=len)] if matches else None
+
+def load_endpoint_groups():
+    """
+    엔드포인트 그룹 (같은 API를 제공하는 복제 엔드포인트 묶음)
+
+    Returns:
+        dict: 그룹 이름 -> {"endpoints": 엔드포인트 URL 목록, "strategy": 라우팅 방식}
+    """
+    if _use_sqlite():
+        return sqlite_storage.load_endpoint_groups()
+    return file_cache.get(ENDPOINT_GROUP_FILE, _load_json_dict)
+
+def save_endpoint_group(name, endpoints, strategy):
+    """엔드포인트 그룹 저장 (같은 이름이 있으면 덮어씀)"""
+    group = {"endpoints": list(endpoints), "strategy": strategy}
+    if _use_sqlite():
+        return sqlite_storage.save_endpoint_group(name, group)
+    _group_committer.submit(lambda groups: ({**groups, name: group}, None))
+
+def delete_endpoint_group(name):
+    """엔드포인트 그룹 삭제"""
+    if _use_sqlite():
+        return sqlite_storage.delete_endpoint_group(name)
+    def mutate(groups):
+        if name in groups:
+            return {k: v for k, v in groups.items() if k != name}, True
+        return groups, False
+
+    return _group_committer.submit(mutate)
@@ -0,0 +1,145 @@
+import json
+import time
+import codecs
+
+SSE_CONTENT_TYPE = "text/event-stream"
+NDJSON_CONTENT_TYPES = ("application/x-ndjson", "application/jsonl", "application/json-seq")
+# SSE 이벤트(JSON)에서 화면에 이어 붙일 텍스트가 들어 있는 필드
+TEXT_FIELDS = ("text", "delta", "content", "token")
+
+
+def _event_text(data):
+    """SSE 이벤트 하나에서 화면에 이어 붙일 텍스트"""
+    if isinstance(data, dict):
+        for field in TEXT_FIELDS:
+            if isinstance(data.get(field), str):
+                return data[field]
+        return json.dumps(data, ensure_ascii=False) + "\n"
+    return data if isinstance(data, str) else json.dumps(data, ensure_ascii=False)
+
+
+class StreamReader:
+    """
+    스트리밍 응답(SSE, NDJSON 또는 chunked 본문)을 도착하는 대로 읽는 반복자
+
+    SSE와 NDJSON은 이벤트(줄) 단위로 나눠 JSON이면 텍스트 필드(TEXT_FIELDS)를, 그 밖의 본문은 받은 그대로
+    화면에 이어 붙일 텍스트 조각으로 돌려주고, 첫 바이트 도착 시간(ttfb)과
+    전체 수신 시간(total)을 요청 시작 시각 기준으로 측정한다. 다 읽은 뒤 result()로 전체 응답을 얻는다.
+    """
+
+    def __init__(self, response, started_at: float):
+        """
+        Args:
+            response: stream=True로 받은 requests.Response
+            started_at: 요청을 보내기 직전의 time.perf_counter() 값
+        """
+        self.response = response
+        self.started_at = started_at
+        content_type = response.headers.get("Content-Type", "")
+        self.is_sse = SSE_CONTENT_TYPE in content_type
+        self.is_ndjson = any(t in content_type for t in NDJSON_CONTENT_TYPES)
+        self.ttfb = None
+        self.total = None
+        self.bytes = 0
+        self.text = ""
+        self.events = []
+        self._raw = []
+
+    def _chunks(self):
+        # charset이 명시되지 않았다면 UTF-8 (SSE는 항상 UTF-8)
+        content_type = self.response.headers.get("Content-Type", "")
+        encoding = self.response.encoding if "charset=" in content_type and not self.is_sse else "utf-8"
+        decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+        try:
+            for chunk in self.response.iter_content(chunk_size=None):
+                if not chunk:
+                    continue
+                if self.ttfb is None:
+                    self.ttfb = time.perf_counter() - self.started_at
+                self.bytes += len(chunk)
+                text = decoder.decode(chunk)
+                if text:
+                    yield text
+            tail = decoder.decode(b"", final=True)
+            if tail:
+                yield tail
+        finally:
+            self.total = time.perf_counter() - self.started_at
+            if self.ttfb is None:
+                self.ttfb = self.total
+            self.response.close()
+
+    def _lines(self):
+        """본문을 완성된 줄 단위로 (마지막 줄은 개행이 없어도 포함)"""
+        buffer = ""
+        for text in self._chunks():
+            buffer += text
+            *lines, buffer = buffer.split("\n")
+            for line in lines:
+                yield line.rstrip("\r")
+        if buffer:
+            yield buffer.rstrip("\r")
+
+    def _sse_events(self):
+        """SSE 본문을 이벤트 단위로 분리 (data: 줄을 모아 빈 줄에서 이벤트 완성)"""
+        data_lines = []
+        for line in self._lines():
+            if not line:
+                if data_lines:
+                    yield "\n".join(data_lines)
+                    data_lines = []
+            elif line.startswith("data:"):
+                data_lines.append(line[5:].lstrip(" "))
+        if data_lines:
+            yield "\n".join(data_lines)
+
+    def _ndjson_events(self):
+        for line in self._lines():
+            if line.strip():
+                yield line
+
+    def __iter__(self):
+        if not self.is_sse and not self.is_ndjson:
+            for text in self._chunks():
+                self._raw.append(text)
+                self.text += text
+                yield text
+            return
+
+        for data in (self._sse_events() if self.is_sse else self._ndjson_events()):
+            if data == "[DONE]":
+                continue
+            try:
+                event = json.loads(data)
+            except json.JSONDecodeError:
+                event = data
+            self.events.append(event)
+            piece = _event_text(event)
+            self.text += piece
+            yield piece
+
+    def result(self):
+        """
+        전체 응답 (다 읽은 뒤 호출)
+
+        - SSE/NDJSON: 이벤트 목록
+        - 그 밖의 chunked 본문: 전체가 JSON이면 JSON, 줄마다 JSON이면 목록, 아니면 문자열
+        """
+        if self.is_sse or self.is_ndjson:
+            return self.events
+        body = "".join(self._raw)
+        try:
+            return json.loads(body)
+        except json.JSONDecodeError:
+            pass
+        lines = [line for line in body.splitlines() if line.strip()]
+        if not lines:
+            return body
+        try:
+            return [json.loads(line) for line in lines]
+        except json.JSONDecodeError:
+            return body
+
+    def timings(self) -> dict:
+        """요청 시작부터 첫 바이트까지, 전체 수신까지 걸린 시간(초)"""
+        return {"ttfb": self.ttfb, "total": self.total}